@@ -0,0 +1,222 @@
+"""
+Response cache with generation-scoped invalidation.
+
+Backends are async so a network store never blocks the event loop. The
+memory backend is per process: an invalidation only reaches the worker
+that made it, and other workers serve stale entries for up to
+CACHE_TTL_SECONDS. Run more than one worker only with CACHE_BACKEND=redis.
+"""
+
+import hashlib
+import json
+import logging
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+
+class LRUCache:
+    """In-process LRU with per-entry TTL. Counters never expire or get evicted."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._entries = OrderedDict()
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            value, expires_at = entry
+            if expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def set(self, key: str, value, ttl: float = None):
+        expires_at = time.monotonic() + (ttl or self.ttl)
+        with self._lock:
+            self._entries[key] = (value, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, *keys: str):
+        with self._lock:
+            for key in keys:
+                self._entries.pop(key, None)
+
+    def incr(self, key: str):
+        with self._lock:
+            self._counters[key] = self._counters.get(key, 0) + 1
+            return self._counters[key]
+
+    def get_counter(self, key: str):
+        with self._lock:
+            return self._counters.get(key, 0)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def size(self):
+        return len(self._entries)
+
+
+class MemoryCacheBackend:
+    """Async face of an LRUCache, interchangeable with RedisCacheBackend."""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 60):
+        self.cache = LRUCache(max_entries, ttl)
+
+    async def get(self, key: str):
+        return self.cache.get(key)
+
+    async def set(self, key: str, value, ttl: float = None):
+        self.cache.set(key, value, ttl)
+
+    async def delete(self, *keys: str):
+        self.cache.delete(*keys)
+
+    async def incr(self, key: str):
+        return self.cache.incr(key)
+
+    async def get_counter(self, key: str):
+        return self.cache.get_counter(key)
+
+    async def clear(self):
+        self.cache.clear()
+
+    def size(self):
+        return self.cache.size()
+
+
+class RedisCacheBackend:
+    """Shared cache on a redis.asyncio client (or anything with its get/set/delete/incr API)."""
+
+    def __init__(self, client, ttl: float = 60, prefix: str = "bike:"):
+        self.client = client
+        self.ttl = ttl
+        self.prefix = prefix
+
+    async def get(self, key: str):
+        raw = await self.client.get(self.prefix + key)
+        return json.loads(raw) if raw is not None else None
+
+    async def set(self, key: str, value, ttl: float = None):
+        # Redis expiry is in whole seconds; never round a short TTL down to "no expiry"
+        await self.client.set(self.prefix + key, json.dumps(value), ex=max(1, math.ceil(ttl or self.ttl)))
+
+    async def delete(self, *keys: str):
+        if keys:
+            await self.client.delete(*(self.prefix + key for key in keys))
+
+    async def incr(self, key: str):
+        return int(await self.client.incr(self.prefix + key))
+
+    async def get_counter(self, key: str):
+        return int(await self.client.get(self.prefix + key) or 0)
+
+    async def clear(self):
+        pass
+
+    def size(self):
+        return None
+
+
+class ResponseCache:
+    """Caches endpoint payloads under generation-scoped keys.
+
+    Each namespace ("listings", "brands", "vehicle:<id>") has a generation
+    counter that is part of every key; bumping it invalidates the whole
+    namespace without having to enumerate keys.
+    """
+
+    # Matched case-insensitively, so "Honda " and "honda" share an entry.
+    # Every other string (cursors, base URLs) is opaque and kept verbatim
+    FREE_TEXT = {"search", "brand"}
+
+    def __init__(self, backend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+
+    @classmethod
+    def normalize(cls, name: str, value):
+        if isinstance(value, str):
+            return " ".join(value.lower().split()) if name in cls.FREE_TEXT else value
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return float(value)
+        return value
+
+    async def key(self, namespace: str, **params):
+        generation = await self.backend.get_counter(f"gen:{namespace}")
+        normalized = {
+            name: self.normalize(name, value)
+            for name, value in sorted(params.items())
+            if value is not None
+        }
+        digest = hashlib.sha1(json.dumps(normalized, sort_keys=True).encode()).hexdigest()
+        return f"{namespace}:{generation}:{digest}"
+
+    async def get(self, key: str):
+        value = await self.backend.get(key)
+        if value is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return value
+
+    async def set(self, key: str, value):
+        await self.backend.set(key, value)
+
+    async def invalidate(self, *namespaces: str):
+        for namespace in namespaces:
+            await self.backend.incr(f"gen:{namespace}")
+
+    async def invalidate_vehicle(self, vehicle_id: int, listings: bool = True, brands: bool = False):
+        namespaces = [f"vehicle:{vehicle_id}"]
+        if listings:
+            namespaces.append("listings")
+        if brands:
+            namespaces.append("brands")
+        await self.invalidate(*namespaces)
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            "backend": type(self.backend).__name__,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_ratio": round(self.hits / lookups, 4) if lookups else 0.0,
+            "entries": self.backend.size(),
+        }
+
+
+def create_cache_backend():
+    if settings.CACHE_BACKEND == "redis":
+        import redis.asyncio
+
+        client = redis.asyncio.Redis.from_url(settings.CACHE_URL)
+        return RedisCacheBackend(client, ttl=settings.CACHE_TTL_SECONDS)
+
+    # uvicorn and gunicorn both read WEB_CONCURRENCY for their worker count
+    if int(os.environ.get("WEB_CONCURRENCY", "1") or 1) > 1:
+        logger.warning(
+            "CACHE_BACKEND=memory with WEB_CONCURRENCY>1: each worker keeps its own cache, "
+            "so writes are only invalidated in the worker that made them; use CACHE_BACKEND=redis"
+        )
+    return MemoryCacheBackend(max_entries=settings.CACHE_MAX_ENTRIES, ttl=settings.CACHE_TTL_SECONDS)
+
+
+response_cache = ResponseCache(create_cache_backend())
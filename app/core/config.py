@@ -1,3 +1,5 @@
+from typing import List
+
 from pydantic_settings import BaseSettings
 
 
@@ -9,5 +11,121 @@ class Settings(BaseSettings):
     JWT_ALGORITHM: str = "HS256"
     ACCESS_TOKEN_EXPIRE_MINUTES: int = 60 * 24
 
+    # Connection pool, applied per engine (and so per worker process)
+    DB_POOL_SIZE: int = 5
+    DB_MAX_OVERFLOW: int = 10
+    DB_POOL_TIMEOUT: float = 30
+    # Recycle before the Neon pooler drops idle connections server-side
+    DB_POOL_RECYCLE: int = 300
+    DB_POOL_PRE_PING: bool = True
+    # 0 disables; Postgres only
+    DB_STATEMENT_TIMEOUT_MS: int = 15000
+
+    # Startup never touches the schema unless asked: run `python migrate_db.py`
+    # before rolling out workers, or opt in to migrating (single process, dev)
+    # or to refusing readiness while migrations are pending
+    DB_MIGRATE_ON_STARTUP: bool = False
+    DB_SCHEMA_CHECK_ON_STARTUP: bool = False
+    # Connections opened and caches filled before the worker reports ready
+    STARTUP_WARM_CONNECTIONS: int = 2
+    STARTUP_WARM_CACHES: bool = True
+    READY_CHECK_TIMEOUT_SECONDS: float = 2
+
+    # Read replicas for listing reads; empty sends everything to DATABASE_URL
+    DATABASE_REPLICA_URLS: List[str] = []
+    REPLICA_HEALTH_INTERVAL_SECONDS: int = 10
+    REPLICA_HEALTH_TIMEOUT_SECONDS: float = 2
+    # Postgres replicas further behind than this are taken out of rotation
+    REPLICA_MAX_LAG_SECONDS: float = 5
+    # After a write, that user's reads stay on the primary this long
+    READ_YOUR_WRITES_SECONDS: int = 5
+
+    # "auto" picks postgres / sqlite from the database dialect, else "like"
+    SEARCH_BACKEND: str = "auto"
+
+    # "memory" (per-process LRU: invalidation only reaches the worker that
+    # wrote, so run a single worker with it) or "redis" (shared by all workers)
+    CACHE_BACKEND: str = "memory"
+    CACHE_URL: str = "redis://localhost:6379/0"
+    CACHE_TTL_SECONDS: int = 60
+    CACHE_MAX_ENTRIES: int = 2048
+
+    # bcrypt cost; changing it rehashes existing passwords on their next login
+    BCRYPT_ROUNDS: int = 12
+    # Hashing worker processes per API worker (0 = use the threadpool)
+    HASH_WORKERS: int = 2
+    # Hashes running at once, and how many more may wait before we answer 503
+    HASH_MAX_CONCURRENCY: int = 4
+    HASH_QUEUE_LIMIT: int = 32
+
+    # Image uploads
+    MAX_UPLOAD_FILE_BYTES: int = 10 * 1024 * 1024
+    MAX_UPLOAD_REQUEST_BYTES: int = 50 * 1024 * 1024
+    UPLOAD_CHUNK_BYTES: int = 256 * 1024
+    # Background thumbnail/card/full rendering (needs Pillow; 0 disables)
+    IMAGE_WORKERS: int = 2
+    IMAGE_VARIANT_FORMAT: str = "webp"
+    # Orphaned upload sweeper (0 disables the periodic run)
+    FILE_GC_INTERVAL_SECONDS: int = 6 * 60 * 60
+    FILE_GC_GRACE_SECONDS: int = 60 * 60
+    # Deleted listings' files written or re-uploaded this recently wait for the sweeper
+    FILE_REAP_GRACE_SECONDS: int = 5 * 60
+    FILE_GC_BATCH_SIZE: int = 500
+
+    # Bulk CSV / NDJSON import and export
+    BULK_IMPORT_BATCH_SIZE: int = 500
+    BULK_IMPORT_MAX_ROWS: int = 10000
+    BULK_IMPORT_MAX_BYTES: int = 20 * 1024 * 1024
+    BULK_IMPORT_MAX_ERRORS: int = 100
+    BULK_EXPORT_CHUNK_ROWS: int = 500
+
+    # Facet buckets: years are grouped by FACET_YEAR_BUCKET, prices by the
+    # lower bounds below. Changing either needs a facet rebuild.
+    FACET_YEAR_BUCKET: int = 5
+    FACET_PRICE_BANDS: List[int] = [0, 1000, 5000, 25000, 50000, 100000, 250000, 500000, 1000000]
+    # Full rebuild to correct any drift (0 disables)
+    FACET_REBUILD_INTERVAL_SECONDS: int = 6 * 60 * 60
+
+    # Sold listings move to the *_archive tables this long after the sale,
+    # ARCHIVE_BATCH_SIZE per transaction (interval 0 disables the periodic run)
+    ARCHIVE_SOLD_AFTER_DAYS: int = 7
+    ARCHIVE_BATCH_SIZE: int = 500
+    ARCHIVE_INTERVAL_SECONDS: int = 60 * 60
+
+    # Bearer token for /metrics and /internal/*; empty answers 404 there
+    INTERNAL_TOKEN: str = ""
+
+    # Request metrics: Server-Timing header on every response
+    METRICS_SERVER_TIMING: bool = True
+    # Opt-in query log: statements slower than SLOW_QUERY_MS, and statements
+    # repeated N_PLUS_ONE_THRESHOLD+ times within one request
+    SLOW_QUERY_LOG: bool = False
+    SLOW_QUERY_MS: int = 200
+    N_PLUS_ONE_THRESHOLD: int = 5
+
+    # Token buckets as "<requests>/<second|minute|hour|day>", applied per client
+    # IP and per signed-in user (LOGIN_ACCOUNT: per email tried); empty disables
+    RATE_LIMIT_ENABLED: bool = True
+    # "memory" (per process) or "redis" (shared by all workers)
+    RATE_LIMIT_BACKEND: str = "memory"
+    RATE_LIMIT_URL: str = "redis://localhost:6379/0"
+    RATE_LIMIT_MAX_KEYS: int = 100000
+    RATE_LIMIT_LOGIN: str = "20/minute"
+    RATE_LIMIT_LOGIN_ACCOUNT: str = "10/minute"
+    RATE_LIMIT_REGISTER: str = "10/hour"
+    RATE_LIMIT_UPLOAD: str = "30/minute"
+    RATE_LIMIT_IMPORT: str = "20/hour"
+    RATE_LIMIT_EXPORT: str = "10/hour"
+    # Proxies in front of the app that append to X-Forwarded-For (0 = use the peer)
+    TRUSTED_PROXY_HOPS: int = 0
+    # Answer 503 + Retry-After once this many requests queue for a database
+    # connection (0 disables); bcrypt routes also shed when hashing is saturated
+    LOAD_SHED_POOL_WAITERS: int = 20
+    LOAD_SHED_RETRY_AFTER_SECONDS: int = 2
+
+    # Per-process caches of decoded tokens and authenticated users
+    AUTH_CACHE_TTL_SECONDS: int = 60
+    AUTH_CACHE_MAX_ENTRIES: int = 10000
+
 
 settings = Settings()
@@ -1,10 +1,98 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.orm import sessionmaker, declarative_base
 from app.core.config import settings
+from app.core.metrics import instrument_engine
+from app.core.pool import MeteredAsyncQueuePool, MeteredQueuePool, PoolMetrics
 
-engine = create_engine(settings.DATABASE_URL, future=True)
+# requirements.txt ships psycopg2; newer SQLAlchemy defaults to psycopg 3
+SYNC_DRIVERS = {
+    "postgresql": "postgresql+psycopg2",
+}
+
+ASYNC_DRIVERS = {
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+    "sqlite": "sqlite+aiosqlite",
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+}
+
+
+def async_database_url(url: str):
+    url = make_url(url)
+    drivername = ASYNC_DRIVERS.get(url.drivername, url.drivername)
+    query = dict(url.query)
+
+    if drivername == "postgresql+asyncpg":
+        # asyncpg takes "ssl" and does not understand libpq-only options
+        if "sslmode" in query:
+            query["ssl"] = query.pop("sslmode")
+        query.pop("channel_binding", None)
+
+    return url.set(drivername=drivername, query=query)
+
+
+def create_db_engine(url: str, asynchronous: bool = False):
+    if asynchronous:
+        url = async_database_url(url)
+    else:
+        url = make_url(url)
+        url = url.set(drivername=SYNC_DRIVERS.get(url.drivername, url.drivername))
+
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+
+    # In-memory SQLite keeps its single-connection pool
+    if url.get_backend_name() != "sqlite" or url.database not in (None, "", ":memory:"):
+        options.update(
+            poolclass=MeteredAsyncQueuePool if asynchronous else MeteredQueuePool,
+            pool_size=settings.DB_POOL_SIZE,
+            max_overflow=settings.DB_MAX_OVERFLOW,
+            pool_timeout=settings.DB_POOL_TIMEOUT,
+            pool_recycle=settings.DB_POOL_RECYCLE,
+        )
+
+    if asynchronous:
+        db_engine = create_async_engine(url, **options)
+        sync_engine = db_engine.sync_engine
+    else:
+        db_engine = sync_engine = create_engine(url, future=True, **options)
+
+    if hasattr(sync_engine.pool, "metrics"):
+        sync_engine.pool.metrics = PoolMetrics()
+
+    if url.get_backend_name() == "postgresql" and settings.DB_STATEMENT_TIMEOUT_MS:
+        @event.listens_for(sync_engine, "connect")
+        def set_statement_timeout(dbapi_connection, connection_record):
+            cursor = dbapi_connection.cursor()
+            cursor.execute(f"SET statement_timeout = {int(settings.DB_STATEMENT_TIMEOUT_MS)}")
+            cursor.close()
+            # Commit so a later pool reset (rollback) does not undo the SET
+            dbapi_connection.commit()
+
+    instrument_engine(sync_engine)
+    return db_engine
+
+
+# Sync engine: scripts (seed_data.py, migrate_db.py) and startup DDL
+engine = create_db_engine(settings.DATABASE_URL)
 
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+# Async engine: request handlers
+async_engine = create_db_engine(settings.DATABASE_URL, asynchronous=True)
+
+AsyncSessionLocal = async_sessionmaker(
+    async_engine,
+    class_=AsyncSession,
+    autoflush=False,
+    expire_on_commit=False,
+)
+
 Base = declarative_base()
 
+
+async def get_db():
+    async with AsyncSessionLocal() as db:
+        yield db
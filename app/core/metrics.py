@@ -0,0 +1,245 @@
+"""
+Per-route request metrics, DB query accounting and Prometheus rendering.
+
+Query accounting follows the request through a ContextVar: SQLAlchemy runs
+the sync event hooks inside a greenlet that inherits the caller's context,
+and anyio copies it into threadpool workers, so hooks always see the stats
+of the request that issued the query.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import Counter, defaultdict
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from starlette.routing import Mount
+
+from app.core.config import settings
+from app.core.pool import pool_stats
+
+logger = logging.getLogger("app.queries")
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 3, 5, 10, 20, 50)
+
+current_request = ContextVar("current_request", default=None)
+
+
+class RequestStats:
+    __slots__ = ("queries", "db_seconds", "statements")
+
+    def __init__(self, track_statements: bool = False):
+        self.queries = 0
+        self.db_seconds = 0.0
+        self.statements = Counter() if track_statements else None
+
+
+class Histogram:
+    def __init__(self, buckets):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.total = 0
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.total += 1
+        self.sum += value
+        for i, bound in enumerate(self.buckets):
+            if value <= bound:
+                self.counts[i] += 1
+
+
+class RouteMetrics:
+    def __init__(self):
+        self.statuses = Counter()
+        self.latency = Histogram(LATENCY_BUCKETS)
+        self.queries = Histogram(QUERY_COUNT_BUCKETS)
+        self.db_seconds = 0.0
+        self.response_bytes = 0
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self.routes = defaultdict(RouteMetrics)
+        self._lock = threading.Lock()
+
+    def record(self, method, route, status, seconds, stats: RequestStats, response_bytes):
+        with self._lock:
+            metrics = self.routes[(method, route)]
+            metrics.statuses[status] += 1
+            metrics.latency.observe(seconds)
+            metrics.queries.observe(stats.queries)
+            metrics.db_seconds += stats.db_seconds
+            metrics.response_bytes += response_bytes
+
+    def render(self, extra_gauges=()):
+        lines = []
+
+        def header(name, kind, help_text):
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+
+        def histogram(name, attribute):
+            for (method, route), metrics in items:
+                hist = getattr(metrics, attribute)
+                labels = f'method="{method}",route="{escape(route)}"'
+                for bound, count in zip(hist.buckets, hist.counts):
+                    lines.append(f'{name}_bucket{{{labels},le="{bound}"}} {count}')
+                lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.total}')
+                lines.append(f"{name}_sum{{{labels}}} {hist.sum}")
+                lines.append(f"{name}_count{{{labels}}} {hist.total}")
+
+        with self._lock:
+            items = sorted(self.routes.items())
+
+            header("http_requests_total", "counter", "Requests by route template and status.")
+            for (method, route), metrics in items:
+                for status, count in sorted(metrics.statuses.items()):
+                    lines.append(f'http_requests_total{{method="{method}",route="{escape(route)}",status="{status}"}} {count}')
+
+            header("http_request_duration_seconds", "histogram", "Request latency by route template.")
+            histogram("http_request_duration_seconds", "latency")
+
+            header("db_queries_per_request", "histogram", "Database queries issued per request.")
+            histogram("db_queries_per_request", "queries")
+
+            header("db_query_duration_seconds_total", "counter", "Time spent in database queries.")
+            for (method, route), metrics in items:
+                lines.append(f'db_query_duration_seconds_total{{method="{method}",route="{escape(route)}"}} {metrics.db_seconds}')
+
+            header("http_response_size_bytes_total", "counter", "Response body bytes sent.")
+            for (method, route), metrics in items:
+                lines.append(f'http_response_size_bytes_total{{method="{method}",route="{escape(route)}"}} {metrics.response_bytes}')
+
+        for name, help_text, samples in extra_gauges:
+            header(name, "gauge", help_text)
+            for labels, value in samples:
+                label_text = ",".join(f'{key}="{escape(str(val))}"' for key, val in labels.items())
+                lines.append(f"{name}{{{label_text}}} {value}" if label_text else f"{name} {value}")
+
+        return "\n".join(lines) + "\n"
+
+
+def pool_gauges(engines):
+    """Numeric pool_stats() values as (name, help, samples) gauges, labelled by engine."""
+    samples = defaultdict(list)
+    for label, engine in engines.items():
+        for key, value in pool_stats(engine).items():
+            if isinstance(value, (int, float)) and not isinstance(value, bool):
+                samples[f"db_pool_{key}"].append(({"engine": label}, value))
+    return [(name, "Connection pool statistic.", values) for name, values in samples.items()]
+
+
+def escape(value: str):
+    return value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+registry = MetricsRegistry()
+
+WHITESPACE = re.compile(r"\s+")
+
+
+def instrument_engine(sync_engine):
+    """Attribute every query on this engine to the request that issued it."""
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        conn.info.setdefault("query_started", []).append(time.perf_counter())
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+        started = conn.info["query_started"].pop()
+        elapsed = time.perf_counter() - started
+
+        stats = current_request.get()
+        if stats is not None:
+            stats.queries += 1
+            stats.db_seconds += elapsed
+            if stats.statements is not None:
+                stats.statements[WHITESPACE.sub(" ", statement).strip()] += 1
+
+        if settings.SLOW_QUERY_LOG and elapsed * 1000 >= settings.SLOW_QUERY_MS:
+            logger.warning("Slow query (%.1f ms): %s", elapsed * 1000, WHITESPACE.sub(" ", statement)[:1000])
+
+    @event.listens_for(sync_engine, "handle_error")
+    def handle_error(exception_context):
+        # after_cursor_execute does not run for a failed statement
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("query_started"):
+            conn.info["query_started"].pop()
+
+
+def mount_for(scope):
+    # Not every FastAPI version records a matched Mount in scope["route"]
+    path = scope["path"]
+    for route in getattr(scope.get("app"), "routes", ()):
+        if isinstance(route, Mount) and (path == route.path or path.startswith(route.path + "/")):
+            return route
+    return None
+
+
+def route_template(scope):
+    route = scope.get("route") or mount_for(scope)
+    if route is None:
+        return "unmatched"
+    # Mounts (static files) report their prefix, not the file path
+    return route.path + "/{path}" if isinstance(route, Mount) else route.path
+
+
+class MetricsMiddleware:
+    """Records per-route metrics and adds a Server-Timing header.
+
+    With SLOW_QUERY_LOG on, a statement repeated N_PLUS_ONE_THRESHOLD times
+    or more within one request is logged as a likely N+1.
+    """
+
+    def __init__(self, app, server_timing: bool = True):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        stats = RequestStats(track_statements=settings.SLOW_QUERY_LOG)
+        token = current_request.set(stats)
+        started = time.perf_counter()
+        status = 500
+        response_bytes = 0
+
+        async def send_wrapper(message):
+            nonlocal status, response_bytes
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if self.server_timing:
+                    elapsed_ms = (time.perf_counter() - started) * 1000
+                    timing = (
+                        f"app;dur={elapsed_ms:.1f}, "
+                        f'db;dur={stats.db_seconds * 1000:.1f};desc="{stats.queries} queries"'
+                    )
+                    message["headers"] = list(message.get("headers", [])) + [(b"server-timing", timing.encode())]
+            elif message["type"] == "http.response.body":
+                response_bytes += len(message.get("body", b""))
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            current_request.reset(token)
+            route = route_template(scope)
+            registry.record(scope["method"], route, status, time.perf_counter() - started, stats, response_bytes)
+            if stats.statements:
+                self.report_repeats(scope["method"], route, stats)
+
+    @staticmethod
+    def report_repeats(method, route, stats):
+        for statement, count in stats.statements.items():
+            if count >= settings.N_PLUS_ONE_THRESHOLD:
+                logger.warning(
+                    "Possible N+1 on %s %s: %d executions of %s",
+                    method, route, count, statement[:500],
+                )
@@ -0,0 +1,28 @@
+from starlette.responses import JSONResponse
+
+
+class RequestSizeLimitMiddleware:
+    """Rejects oversized bodies from their Content-Length before they are parsed.
+
+    FastAPI spools the whole multipart form before the handler runs, so the
+    handler's own limits cannot stop a huge upload from being read first.
+    """
+
+    def __init__(self, app, max_bytes: int, path_suffix: str):
+        self.app = app
+        self.max_bytes = max_bytes
+        self.path_suffix = path_suffix
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].endswith(self.path_suffix):
+            headers = dict(scope["headers"])
+            content_length = headers.get(b"content-length")
+            if content_length and content_length.isdigit() and int(content_length) > self.max_bytes:
+                response = JSONResponse(
+                    {"detail": f"Request body exceeds {self.max_bytes} bytes"},
+                    status_code=413,
+                )
+                await response(scope, receive, send)
+                return
+
+        await self.app(scope, receive, send)
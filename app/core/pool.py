@@ -0,0 +1,99 @@
+import threading
+import time
+
+from sqlalchemy.exc import TimeoutError as PoolTimeoutError
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
+
+
+class PoolMetrics:
+    def __init__(self):
+        self.checkouts = 0
+        self.timeouts = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+        # Callers inside checkout right now, most of them queued for a connection
+        self.waiting = 0
+        self._lock = threading.Lock()
+
+    def enter(self):
+        with self._lock:
+            self.waiting += 1
+
+    def leave(self):
+        with self._lock:
+            self.waiting -= 1
+
+    def record(self, waited: float, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.wait_total += waited
+            self.wait_max = max(self.wait_max, waited)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "wait_avg_ms": round(self.wait_total / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "wait_max_ms": round(self.wait_max * 1000, 3),
+                "waiting": self.waiting,
+            }
+
+
+class MeteredPoolMixin:
+    """Times how long callers wait for a connection to become available."""
+
+    metrics = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        if self.metrics is not None:
+            self.metrics.enter()
+        try:
+            record = super()._do_get()
+        except PoolTimeoutError:
+            if self.metrics is not None:
+                self.metrics.record(time.perf_counter() - started, timed_out=True)
+            raise
+        finally:
+            if self.metrics is not None:
+                self.metrics.leave()
+        if self.metrics is not None:
+            self.metrics.record(time.perf_counter() - started)
+        return record
+
+    def recreate(self):
+        # engine.dispose() swaps in a fresh pool; keep the counters
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+
+class MeteredQueuePool(MeteredPoolMixin, QueuePool):
+    pass
+
+
+class MeteredAsyncQueuePool(MeteredPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def pool_stats(engine):
+    pool = engine.pool
+    if not isinstance(pool, QueuePool):
+        return {"pool": type(pool).__name__, "status": pool.status()}
+
+    stats = {
+        "pool": type(pool).__name__,
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "idle": pool.checkedin(),
+        # negative while the core pool has not been filled yet
+        "overflow": max(pool.overflow(), 0),
+        "max_overflow": pool._max_overflow,
+    }
+    if getattr(pool, "metrics", None) is not None:
+        stats.update(pool.metrics.snapshot())
+    return stats
@@ -0,0 +1,266 @@
+"""
+Token-bucket rate limiting and load shedding for expensive endpoints.
+
+Checks run in AdmissionMiddleware, before FastAPI reads the body, so a
+rejected upload costs nothing. Buckets live in a store: per-process memory by
+default, or Redis (one Lua script per check, on redis.asyncio) to share
+limits across workers. A store is anything with an async
+take(keys, capacity, rate, cost) -> [retry_after per key], which charges
+every bucket when all of them can pay (every wait is 0) and none otherwise.
+"""
+
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict
+
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+
+from app.core.config import settings
+
+logger = logging.getLogger(__name__)
+
+PERIODS = {"second": 1, "minute": 60, "hour": 3600, "day": 86400}
+
+# (method, path, limit); a leading "*" matches a path suffix
+RULES = [
+    ("POST", "/auth/login", "login"),
+    ("POST", "/auth/register", "register"),
+    ("POST", "*/upload-images", "upload"),
+    ("POST", "/vehicles/import", "import"),
+    ("GET", "/vehicles/export", "export"),
+    ("GET", "/vehicles/my-bikes/export", "export"),
+]
+HASHING_LIMITS = {"login", "register"}
+
+# Never shed the probes and diagnostics that tell you the app is overloaded
+SHED_EXEMPT_PREFIXES = ("/ready", "/metrics", "/internal/", "/static/")
+
+
+def parse_rate(rate: str):
+    """'10/minute' -> (capacity 10, refill 10/60 tokens per second); None when disabled."""
+    if not rate:
+        return None
+    count, _, period = rate.partition("/")
+    return int(count), int(count) / PERIODS[period.strip().rstrip("s")]
+
+
+class MemoryRateLimitStore:
+    def __init__(self, max_keys: int = 100000):
+        self.max_keys = max_keys
+        self._buckets = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, keys, capacity: int, rate: float, cost: int = 1):
+        now = time.monotonic()
+        with self._lock:
+            buckets = {}
+            for key in keys:
+                tokens, updated = self._buckets.get(key, (capacity, now))
+                buckets[key] = min(capacity, tokens + (now - updated) * rate)
+            waits = [max(0.0, (cost - tokens) / rate) for tokens in buckets.values()]
+            charge = cost if not any(waits) else 0
+            for key, tokens in buckets.items():
+                self._buckets[key] = (tokens - charge, now)
+                self._buckets.move_to_end(key)
+            # Evicting an idle bucket only forgets a partly drained limit
+            while len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)
+        return waits
+
+    def size(self):
+        return len(self._buckets)
+
+
+# Refill every bucket and charge them all or none, in one round trip; Redis
+# clock so workers agree on time
+TAKE_SCRIPT = """
+local capacity = tonumber(ARGV[1])
+local rate = tonumber(ARGV[2])
+local cost = tonumber(ARGV[3])
+local clock = redis.call('TIME')
+local now = tonumber(clock[1]) + tonumber(clock[2]) / 1000000
+local balances = {}
+local waits = {}
+local charge = cost
+for i, key in ipairs(KEYS) do
+  local state = redis.call('HMGET', key, 'tokens', 'updated')
+  local tokens = tonumber(state[1]) or capacity
+  local updated = tonumber(state[2]) or now
+  balances[i] = math.min(capacity, tokens + math.max(0, now - updated) * rate)
+  waits[i] = 0
+  if balances[i] < cost then
+    waits[i] = (cost - balances[i]) / rate
+    charge = 0
+  end
+end
+for i, key in ipairs(KEYS) do
+  redis.call('HSET', key, 'tokens', balances[i] - charge, 'updated', now)
+  redis.call('PEXPIRE', key, math.ceil(capacity / rate * 1000))
+  waits[i] = tostring(waits[i])
+end
+return waits
+"""
+
+
+class RedisRateLimitStore:
+    def __init__(self, client, prefix: str = "bike:rl:"):
+        self.prefix = prefix
+        self._take = client.register_script(TAKE_SCRIPT)
+
+    async def take(self, keys, capacity: int, rate: float, cost: int = 1):
+        waits = await self._take(keys=[self.prefix + key for key in keys], args=[capacity, rate, cost])
+        return [float(wait) for wait in waits]
+
+    def size(self):
+        return None
+
+
+def create_rate_limit_store():
+    if settings.RATE_LIMIT_BACKEND == "redis":
+        import redis.asyncio
+
+        return RedisRateLimitStore(redis.asyncio.Redis.from_url(settings.RATE_LIMIT_URL))
+    return MemoryRateLimitStore(settings.RATE_LIMIT_MAX_KEYS)
+
+
+class RateLimiter:
+    def __init__(self, store, enabled: bool = True):
+        self.store = store
+        self.enabled = enabled
+        self.rejected = Counter()
+        # reason -> requests answered 503 by AdmissionMiddleware
+        self.shed = Counter()
+
+    async def retry_after(self, limit: str, **identities):
+        """Seconds to wait if any identity's bucket is empty, else None (and every bucket spends a token)."""
+        rate = parse_rate(getattr(settings, f"RATE_LIMIT_{limit.upper()}"))
+        if not self.enabled or rate is None:
+            return None
+        capacity, refill = rate
+        kinds = [kind for kind, value in identities.items() if value is not None]
+        if not kinds:
+            return None
+        try:
+            # One call for every identity, so a rejection by one bucket
+            # does not spend tokens from the others
+            waits = await self.store.take([f"{limit}:{kind}:{identities[kind]}" for kind in kinds], capacity, refill)
+        except Exception:
+            # A broken shared store must not take the endpoints down with it
+            logger.warning("Rate limit store failed; allowing request", exc_info=True)
+            return None
+        if not any(waits):
+            return None
+        for kind, wait in zip(kinds, waits):
+            if wait:
+                self.rejected[f"{limit}:{kind}"] += 1
+        return max(1, math.ceil(max(waits)))
+
+    async def check(self, limit: str, **identities):
+        wait = await self.retry_after(limit, **identities)
+        if wait is not None:
+            raise HTTPException(
+                status_code=429,
+                detail="Too many requests, try again later",
+                headers={"Retry-After": str(wait)},
+            )
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "store": type(self.store).__name__,
+            "buckets": self.store.size(),
+            "rejected": dict(self.rejected),
+            "shed": dict(self.shed),
+        }
+
+
+rate_limiter = RateLimiter(create_rate_limit_store(), enabled=settings.RATE_LIMIT_ENABLED)
+
+
+def client_ip(scope):
+    # Behind N trusted proxies the client is the Nth address from the right
+    hops = settings.TRUSTED_PROXY_HOPS
+    if hops:
+        forwarded = dict(scope["headers"]).get(b"x-forwarded-for", b"").decode("latin-1")
+        addresses = [address.strip() for address in forwarded.split(",") if address.strip()]
+        if len(addresses) >= hops:
+            return addresses[-hops]
+    client = scope.get("client")
+    return client[0] if client else None
+
+
+def bearer_user(scope):
+    from app.routers.auth import decode_token
+
+    authorization = dict(scope["headers"]).get(b"authorization", b"").decode("latin-1")
+    scheme, _, token = authorization.partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return None
+    try:
+        return decode_token(token)
+    except HTTPException:
+        # The endpoint's own auth answers 401; limit by IP alone
+        return None
+
+
+def match_limit(method: str, path: str):
+    for rule_method, pattern, limit in RULES:
+        if method != rule_method:
+            continue
+        if path == pattern or (pattern.startswith("*") and path.endswith(pattern[1:])):
+            return limit
+    return None
+
+
+def pool_waiters(engine):
+    metrics = getattr(engine.pool, "metrics", None)
+    return metrics.waiting if metrics is not None else 0
+
+
+class AdmissionMiddleware:
+    """Sheds load with 503 + Retry-After and applies the RULES rate limits."""
+
+    def __init__(self, app, limiter: RateLimiter, engine, hashing_pool):
+        self.app = app
+        self.limiter = limiter
+        self.engine = engine
+        self.hashing_pool = hashing_pool
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        path = scope["path"]
+        limit = match_limit(scope["method"], path)
+        response = None
+
+        if settings.LOAD_SHED_POOL_WAITERS and not path.startswith(SHED_EXEMPT_PREFIXES) \
+                and pool_waiters(self.engine) >= settings.LOAD_SHED_POOL_WAITERS:
+            response = self.unavailable("database", "Server is busy, try again shortly")
+        elif limit in HASHING_LIMITS and self.hashing_pool.saturated:
+            response = self.unavailable("hashing", "Authentication is busy, try again shortly")
+        elif limit is not None:
+            wait = await self.limiter.retry_after(limit, ip=client_ip(scope), user=bearer_user(scope))
+            if wait is not None:
+                response = JSONResponse(
+                    {"detail": "Too many requests, try again later"},
+                    status_code=429,
+                    headers={"Retry-After": str(wait)},
+                )
+
+        if response is not None:
+            await response(scope, receive, send)
+            return
+        await self.app(scope, receive, send)
+
+    def unavailable(self, reason: str, detail: str):
+        self.limiter.shed[reason] += 1
+        return JSONResponse(
+            {"detail": detail},
+            status_code=503,
+            headers={"Retry-After": str(settings.LOAD_SHED_RETRY_AFTER_SECONDS)},
+        )
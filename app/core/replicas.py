@@ -0,0 +1,165 @@
+"""
+Read-replica routing.
+
+Read-only endpoints take get_read_db, which hands out a session on the next
+healthy replica, or on the primary when there are no replicas, none is
+healthy, or the caller wrote something in the last READ_YOUR_WRITES_SECONDS.
+Writes keep using get_db and call mark_written() after committing.
+"""
+
+import asyncio
+import itertools
+import logging
+import time
+
+from fastapi import HTTPException, Request
+from sqlalchemy import text
+from sqlalchemy.exc import DBAPIError, OperationalError
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal, create_db_engine
+
+logger = logging.getLogger(__name__)
+
+# Seconds since the last replayed transaction; 0 when the replica has
+# replayed everything it received (an idle primary sends nothing)
+LAG_SQL = text(
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()) END"
+)
+
+RECENT_WRITE_KEY = "replicas:recent-write"
+
+
+class Replica:
+    def __init__(self, name: str, url: str):
+        self.name = name
+        self.engine = create_db_engine(url, asynchronous=True)
+        self.sessionmaker = async_sessionmaker(
+            self.engine,
+            class_=AsyncSession,
+            autoflush=False,
+            expire_on_commit=False,
+            info={"replica": name},
+        )
+        # Optimistic until the first check; a failed request also takes it out
+        self.healthy = True
+        self.lag = None
+        self.error = None
+        self.checked_at = None
+
+    async def check(self, timeout: float, max_lag: float):
+        try:
+            async with self.engine.connect() as conn:
+                await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+                lag = None
+                if self.engine.dialect.name == "postgresql":
+                    lag = await asyncio.wait_for(conn.scalar(LAG_SQL), timeout)
+            self.lag = float(lag) if lag is not None else None
+            self.error = None if self.lag is None or self.lag <= max_lag else f"lag {self.lag:.1f}s"
+            detail = self.error
+        except Exception as exc:
+            # Driver messages can name hosts and users; only the log gets them
+            self.error = type(exc).__name__
+            detail = f"{self.error}: {exc}"
+        healthy = self.error is None
+        if healthy != self.healthy:
+            logger.warning("Replica %s is now %s%s", self.name, "healthy" if healthy else "unhealthy",
+                           f" ({detail})" if detail else "")
+        self.healthy = healthy
+        self.checked_at = time.time()
+
+    def stats(self):
+        return {
+            "healthy": self.healthy,
+            "lag_seconds": self.lag,
+            "error": self.error,
+            "checked_at": self.checked_at,
+        }
+
+
+class ReplicaSet:
+    def __init__(self, urls):
+        self.replicas = [Replica(f"replica{i}", url) for i, url in enumerate(urls)]
+        self._turn = itertools.count()
+
+    def choose(self):
+        healthy = [replica for replica in self.replicas if replica.healthy]
+        if not healthy:
+            return None
+        return healthy[next(self._turn) % len(healthy)]
+
+    async def check(self):
+        await asyncio.gather(*(
+            replica.check(settings.REPLICA_HEALTH_TIMEOUT_SECONDS, settings.REPLICA_MAX_LAG_SECONDS)
+            for replica in self.replicas
+        ))
+
+    async def check_periodically(self, interval: float):
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                await self.check()
+            except Exception:
+                logger.exception("Replica health check failed")
+
+    async def dispose(self):
+        for replica in self.replicas:
+            await replica.engine.dispose()
+
+    def stats(self):
+        return {replica.name: replica.stats() for replica in self.replicas}
+
+
+replica_set = ReplicaSet(settings.DATABASE_REPLICA_URLS)
+
+
+async def mark_written(user_id: int):
+    """Pin this user's reads to the primary until replicas have caught up."""
+    if not replica_set.replicas:
+        return
+    window = settings.READ_YOUR_WRITES_SECONDS
+    # Lives in the cache backend so every worker sees it when that is Redis
+    await response_cache.backend.set(f"replicas:sticky:{user_id}", 1, ttl=window)
+    await response_cache.backend.set(RECENT_WRITE_KEY, 1, ttl=window)
+
+
+async def sticky_user(request: Request):
+    # Reads are anonymous; a bearer token, when sent, only picks the database
+    from app.routers.auth import decode_token
+
+    scheme, _, token = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not token:
+        return False
+    try:
+        user_id = decode_token(token)
+    except HTTPException:
+        return False
+    return await response_cache.backend.get(f"replicas:sticky:{user_id}") is not None
+
+
+async def cacheable(db):
+    """False while a replica may still be missing a write the cache was just invalidated for."""
+    if db.info.get("replica") is None:
+        return True
+    return await response_cache.backend.get(RECENT_WRITE_KEY) is None
+
+
+async def get_read_db(request: Request):
+    replica = replica_set.choose() if replica_set.replicas else None
+    if replica is None or await sticky_user(request):
+        async with AsyncSessionLocal() as db:
+            yield db
+        return
+
+    async with replica.sessionmaker() as db:
+        try:
+            yield db
+        except (DBAPIError, OSError) as exc:
+            # Lost or refused connections take the replica out until the next check passes
+            if not isinstance(exc, DBAPIError) or exc.connection_invalidated or isinstance(exc, OperationalError):
+                replica.healthy = False
+                replica.error = type(exc).__name__
+            raise
@@ -1,6 +1,10 @@
 from passlib.context import CryptContext
 
+from app.core.config import settings
+
+# Hashes with a different cost are flagged by needs_update() and rehashed on login
 pwd_context = CryptContext(
     schemes=["bcrypt"],
-    deprecated="auto"
+    deprecated="auto",
+    bcrypt__rounds=settings.BCRYPT_ROUNDS
 )
@@ -0,0 +1,118 @@
+"""
+Application startup, run from the lifespan instead of at import time.
+
+Importing app.main touches neither the database nor the filesystem. Schema
+work is opt-in (DB_MIGRATE_ON_STARTUP, DB_SCHEMA_CHECK_ON_STARTUP); rollouts
+are expected to run `python migrate_db.py` once before starting workers.
+"""
+
+import asyncio
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from sqlalchemy import text
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.migrations.runner import pending_migrations
+from app.migrations.versions import MIGRATIONS, run_migrations
+from app.services.facets import ensure_facets
+from app.services.search import search_backend
+from app.services.storage import UPLOAD_DIR
+
+logger = logging.getLogger(__name__)
+
+
+class StartupState:
+    def __init__(self):
+        self.ready = False
+        self.error = None
+        # phase -> milliseconds
+        self.timings = {}
+
+    @contextmanager
+    def phase(self, name: str):
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.timings[name] = round((time.perf_counter() - started) * 1000, 1)
+
+
+startup_state = StartupState()
+
+
+def prepare_schema(engine):
+    """Migrations plus the search index and facet table they feed; idempotent."""
+    applied = run_migrations(engine)
+    search_backend.setup(engine)
+    ensure_facets()
+    return applied
+
+
+async def warm_pool(async_engine, connections: int):
+    # Opened side by side, so the pool keeps that many for the first requests
+    async def ping():
+        async with async_engine.connect() as conn:
+            await conn.execute(text("SELECT 1"))
+
+    await asyncio.gather(*(ping() for _ in range(connections)))
+
+
+async def warm_caches():
+    # The route handlers fill the response cache exactly as a request would
+    from app.core.database import AsyncSessionLocal
+    from app.routers.vehicles import get_brands, get_facets
+
+    async with AsyncSessionLocal() as db:
+        await get_brands(db)
+        await get_facets(
+            db, brand=None, fuel_type=None, min_year=None, max_year=None,
+            min_price=None, max_price=None, search=None,
+        )
+
+
+async def start(engine, async_engine, replica_set):
+    os.makedirs(UPLOAD_DIR, exist_ok=True)
+
+    if settings.DB_MIGRATE_ON_STARTUP:
+        with startup_state.phase("schema"):
+            applied = await run_in_threadpool(prepare_schema, engine)
+        if applied:
+            logger.info("Applied migrations %s", applied)
+    elif settings.DB_SCHEMA_CHECK_ON_STARTUP:
+        with startup_state.phase("schema"):
+            pending = await run_in_threadpool(pending_migrations, engine, MIGRATIONS)
+        if pending:
+            # Stays unready rather than serving against an old schema
+            startup_state.error = f"pending migrations: {[m.version for m in pending]}"
+            logger.error("Not ready, %s; run python migrate_db.py", startup_state.error)
+            return
+
+    # Warm-up is best effort; /ready reports whether the database answers
+    try:
+        if settings.STARTUP_WARM_CONNECTIONS:
+            with startup_state.phase("pool"):
+                connections = min(settings.STARTUP_WARM_CONNECTIONS, settings.DB_POOL_SIZE)
+                await warm_pool(async_engine, connections)
+        if replica_set.replicas:
+            with startup_state.phase("replicas"):
+                await replica_set.check()
+        if settings.STARTUP_WARM_CACHES:
+            with startup_state.phase("caches"):
+                await warm_caches()
+    except Exception:
+        logger.warning("Startup warm-up failed", exc_info=True)
+
+    startup_state.ready = True
+
+
+async def database_reachable(async_engine, timeout: float):
+    try:
+        async with async_engine.connect() as conn:
+            await asyncio.wait_for(conn.execute(text("SELECT 1")), timeout)
+        return True
+    except Exception:
+        return False
@@ -0,0 +1,102 @@
+import mimetypes
+import os
+import re
+import stat
+
+import anyio
+from fastapi.staticfiles import StaticFiles
+from starlette.datastructures import Headers
+from starlette.exceptions import HTTPException
+from starlette.responses import FileResponse
+from starlette.staticfiles import NotModifiedResponse
+
+# ab/<sha256>.jpg and its _thumb/_card/_full variants
+CONTENT_ADDRESSED = re.compile(r"^[0-9a-f]{2}/(?P<digest>[0-9a-f]{64})(?P<suffix>[._][\w.]+)$")
+
+IMMUTABLE_CACHE_CONTROL = "public, max-age=31536000, immutable"
+MUTABLE_CACHE_CONTROL = "public, max-age=3600"
+
+# Accept-Encoding token -> sibling file suffix, in order of preference
+PRECOMPRESSED = [("br", ".br"), ("gzip", ".gz")]
+
+
+def accepted_encodings(request_headers: Headers):
+    accepted = set()
+    for part in request_headers.get("accept-encoding", "").split(","):
+        token, _, params = part.strip().partition(";")
+        if token and params.replace(" ", "") not in ("q=0", "q=0.0", "q=0.00", "q=0.000"):
+            accepted.add(token.lower())
+    return accepted
+
+
+class UploadFiles(StaticFiles):
+    """Serves vehicle uploads with validators and caching tuned for images.
+
+    - strong ETags: the content digest for content-addressed files,
+      size + mtime_ns for legacy uploads
+    - year-long immutable Cache-Control for content-addressed files
+    - 304 on If-None-Match / If-Modified-Since
+    - Range / If-Range and zero-copy "pathsend" come from FileResponse
+    - a .br / .gz sibling is served when the client accepts it
+    """
+
+    async def get_response(self, path: str, scope):
+        if scope["method"] not in ("GET", "HEAD"):
+            raise HTTPException(status_code=405, headers={"Allow": "GET, HEAD"})
+
+        path = path.replace("\\", "/")
+        # Never expose in-flight ".part" files or other dotfiles
+        if any(part.startswith(".") for part in path.split("/")):
+            raise HTTPException(status_code=404)
+
+        request_headers = Headers(scope=scope)
+        encodings = accepted_encodings(request_headers)
+        try:
+            found = await anyio.to_thread.run_sync(self.find_representation, path, encodings)
+        except (OSError, ValueError):
+            raise HTTPException(status_code=404)
+        if found is None:
+            raise HTTPException(status_code=404)
+
+        full_path, stat_result, encoding = found
+        match = CONTENT_ADDRESSED.match(path)
+        if match:
+            etag = f"{match['digest']}{match['suffix']}"
+            cache_control = IMMUTABLE_CACHE_CONTROL
+        else:
+            etag = f"{stat_result.st_size:x}-{stat_result.st_mtime_ns:x}"
+            cache_control = MUTABLE_CACHE_CONTROL
+
+        headers = {"Cache-Control": cache_control, "Vary": "Accept-Encoding"}
+        if encoding:
+            headers["Content-Encoding"] = encoding
+            etag = f"{etag}-{encoding}"
+        headers["ETag"] = f'"{etag}"'
+
+        media_type, _ = mimetypes.guess_type(path)
+        response = FileResponse(
+            full_path,
+            stat_result=stat_result,
+            headers=headers,
+            media_type=media_type or "application/octet-stream",
+        )
+        if self.is_not_modified(response.headers, request_headers):
+            return NotModifiedResponse(response.headers)
+        return response
+
+    def find_representation(self, path: str, encodings):
+        full_path, stat_result = self.lookup_path(path)
+        if stat_result is None or not stat.S_ISREG(stat_result.st_mode):
+            return None
+
+        for encoding, suffix in PRECOMPRESSED:
+            if encoding not in encodings:
+                continue
+            try:
+                sibling_stat = os.stat(full_path + suffix)
+            except OSError:
+                continue
+            if stat.S_ISREG(sibling_stat.st_mode):
+                return full_path + suffix, sibling_stat, encoding
+
+        return full_path, stat_result, None
@@ -1,12 +1,80 @@
-from fastapi import FastAPI
+import time
+
+# Cold-start clock: covers importing the app and its dependencies
+IMPORT_STARTED = time.perf_counter()
+
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI
+from fastapi.responses import JSONResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
-from app.routers import auth, vehicles
-from app.core.database import Base, engine
+from app.routers import auth, vehicles, internal
+from app.core.config import settings
+from app.core.database import engine, async_engine
+from app.core.cache import response_cache
+from app.core.responses import FastJSONResponse
+from app.core.metrics import MetricsMiddleware, pool_gauges, registry
+from app.core.middleware import RequestSizeLimitMiddleware
+from app.core.ratelimit import AdmissionMiddleware, rate_limiter
+from app.core.replicas import replica_set
+from app.core.startup import database_reachable, start, startup_state
+from app.core.static import UploadFiles
+from app.services.archive import archive_periodically
+from app.services.facets import rebuild_periodically
+from app.services.file_gc import file_reaper, sweep_periodically
+from app.services.images import image_pipeline
+from app.services.storage import UPLOAD_DIR
+from app.utils.hashing import hashing_pool
 from fastapi.staticfiles import StaticFiles
 
-Base.metadata.create_all(bind=engine)
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    with startup_state.phase("startup"):
+        await start(engine, async_engine, replica_set)
+    startup_state.timings["cold_start"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+    logger.info("Startup finished: %s", startup_state.timings)
+
+    # Drain deletions left over from a previous run
+    file_reaper.kick()
+    sweeper = None
+    if settings.FILE_GC_INTERVAL_SECONDS:
+        sweeper = asyncio.create_task(sweep_periodically(settings.FILE_GC_INTERVAL_SECONDS))
+    facet_rebuilder = None
+    if settings.FACET_REBUILD_INTERVAL_SECONDS:
+        facet_rebuilder = asyncio.create_task(rebuild_periodically(settings.FACET_REBUILD_INTERVAL_SECONDS))
+    archiver = None
+    if settings.ARCHIVE_INTERVAL_SECONDS:
+        archiver = asyncio.create_task(archive_periodically(settings.ARCHIVE_INTERVAL_SECONDS))
+    replica_checker = None
+    if replica_set.replicas and settings.REPLICA_HEALTH_INTERVAL_SECONDS:
+        replica_checker = asyncio.create_task(replica_set.check_periodically(settings.REPLICA_HEALTH_INTERVAL_SECONDS))
+
+    yield
+
+    if sweeper is not None:
+        sweeper.cancel()
+    if facet_rebuilder is not None:
+        facet_rebuilder.cancel()
+    if archiver is not None:
+        archiver.cancel()
+    if replica_checker is not None:
+        replica_checker.cancel()
+    file_reaper.shutdown()
+    hashing_pool.shutdown()
+    image_pipeline.shutdown()
+    await async_engine.dispose()
+    await replica_set.dispose()
+
+
+app = FastAPI(title="Bike Rental API", lifespan=lifespan, default_response_class=FastJSONResponse)
 
-app = FastAPI(title="Bike Rental API")
+# Inside CORS, so browsers can read the 429 / 503 it answers with
+app.add_middleware(AdmissionMiddleware, limiter=rate_limiter, engine=async_engine.sync_engine, hashing_pool=hashing_pool)
 
 app.add_middleware(
     CORSMiddleware,
@@ -16,11 +84,55 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
-app.mount("/static", StaticFiles(directory="app/static"), name="static")
+app.add_middleware(
+    RequestSizeLimitMiddleware,
+    # Allow for multipart framing on top of the file bytes
+    max_bytes=settings.MAX_UPLOAD_REQUEST_BYTES + 64 * 1024,
+    path_suffix="/upload-images",
+)
+
+# Outermost, so its timings cover the other middleware too
+app.add_middleware(MetricsMiddleware, server_timing=settings.METRICS_SERVER_TIMING)
+
+# Mounted before /static so uploads get the tuned handler
+# The lifespan creates the directories, so they may not exist yet
+app.mount("/static/uploads/vehicles", UploadFiles(directory=UPLOAD_DIR, check_dir=False), name="uploads")
+app.mount("/static", StaticFiles(directory="app/static", check_dir=False), name="static")
 
 app.include_router(auth.router)
 app.include_router(vehicles.router)
+app.include_router(internal.router)
 
 @app.get("/")
 def root():
     return {"message": "Bike Rental API is running"}
+
+
+@app.get("/ready", include_in_schema=False)
+async def ready():
+    if not startup_state.ready:
+        return JSONResponse({"status": "starting", "error": startup_state.error}, status_code=503)
+    if not await database_reachable(async_engine, settings.READY_CHECK_TIMEOUT_SECONDS):
+        return JSONResponse({"status": "database unreachable"}, status_code=503)
+    return {"status": "ready", "startup_ms": startup_state.timings}
+
+
+@app.get("/metrics", include_in_schema=False, dependencies=[Depends(internal.require_internal_token)])
+def metrics():
+    cache = response_cache.stats()
+    engines = {"async": async_engine.sync_engine, "sync": engine}
+    engines.update({replica.name: replica.engine.sync_engine for replica in replica_set.replicas})
+    gauges = pool_gauges(engines)
+    gauges.append(("app_startup_seconds", "Time spent in each startup phase.", [
+        ({"phase": phase}, ms / 1000) for phase, ms in startup_state.timings.items()
+    ]))
+    if replica_set.replicas:
+        gauges.append(("db_replica_healthy", "1 while the replica is in rotation.", [
+            ({"engine": replica.name}, int(replica.healthy)) for replica in replica_set.replicas
+        ]))
+    gauges.append(("response_cache_hits", "Response cache hits since start.", [({}, cache["hits"])]))
+    gauges.append(("response_cache_misses", "Response cache misses since start.", [({}, cache["misses"])]))
+    return PlainTextResponse(registry.render(gauges), media_type="text/plain; version=0.0.4")
+
+
+startup_state.timings["import"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
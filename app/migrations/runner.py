@@ -0,0 +1,152 @@
+import logging
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, MetaData, String, Table, inspect, select, text
+
+logger = logging.getLogger(__name__)
+
+metadata = MetaData()
+
+schema_migrations = Table(
+    "schema_migrations",
+    metadata,
+    Column("version", Integer, primary_key=True),
+    Column("name", String(200), nullable=False),
+    Column("applied_at", DateTime, nullable=False, default=datetime.utcnow),
+)
+
+# Serializes runners across API workers starting at the same time (Postgres only)
+ADVISORY_LOCK_ID = 724_115_001
+
+
+class Migration:
+    """One schema version.
+
+    Steps are SQL strings, {dialect: SQL} dicts (other dialects skip the
+    step) or callables taking a connection. A concurrent migration runs
+    each step in autocommit mode, as CREATE INDEX CONCURRENTLY requires;
+    its steps must therefore be safe to re-run after a partial failure.
+    """
+
+    def __init__(self, version: int, name: str, steps, concurrent: bool = False):
+        self.version = version
+        self.name = name
+        self.steps = steps
+        self.concurrent = concurrent
+
+    def run_step(self, conn, step):
+        if callable(step):
+            step(conn)
+            return
+        if isinstance(step, dict):
+            step = step.get(conn.dialect.name)
+            if step is None:
+                return
+        conn.execute(text(step))
+
+
+def add_column(table: str, column: str, ddl: str):
+    def step(conn):
+        if column not in {c["name"] for c in inspect(conn).get_columns(table)}:
+            conn.execute(text(f"ALTER TABLE {table} ADD COLUMN {column} {ddl}"))
+    return step
+
+
+def for_dialect(value, dialect: str):
+    return value.get(dialect, value["default"]) if isinstance(value, dict) else value
+
+
+def create_index(name: str, table: str, columns, where=None, using: str = None):
+    """CREATE INDEX IF NOT EXISTS, concurrently on Postgres.
+
+    columns may be a {dialect: expression} dict with a "default" entry, for
+    orderings such as NULLS LAST that not every dialect accepts; a None
+    expression skips the index on that dialect. where takes the same form,
+    since SQLite only uses a partial index whose predicate matches the
+    query's text (is_sold = 0, not is_sold = FALSE). using names the index
+    method (gin) where it is not the default btree.
+    """
+    def step(conn):
+        dialect = conn.dialect.name
+        expression = for_dialect(columns, dialect)
+        if expression is None:
+            return
+        predicate = for_dialect(where, dialect)
+        concurrently = ""
+        if dialect == "postgresql":
+            concurrently = "CONCURRENTLY "
+            # A failed concurrent build leaves an INVALID index that IF NOT EXISTS would keep
+            invalid = conn.execute(text(
+                "SELECT 1 FROM pg_index i JOIN pg_class c ON c.oid = i.indexrelid "
+                "WHERE c.relname = :name AND NOT i.indisvalid"
+            ), {"name": name}).scalar()
+            if invalid:
+                conn.execute(text(f"DROP INDEX CONCURRENTLY IF EXISTS {name}"))
+
+        method = f"USING {using} " if using else ""
+        statement = f"CREATE INDEX {concurrently}IF NOT EXISTS {name} ON {table} {method}({expression})"
+        if predicate:
+            statement += f" WHERE {predicate}"
+        conn.execute(text(statement))
+    return step
+
+
+def applied_versions(conn):
+    # A database that was never migrated has no bookkeeping table yet
+    if not inspect(conn).has_table(schema_migrations.name):
+        return set()
+    return set(conn.scalars(select(schema_migrations.c.version)))
+
+
+def record(conn, migration: Migration):
+    conn.execute(schema_migrations.insert().values(
+        version=migration.version,
+        name=migration.name,
+        applied_at=datetime.utcnow(),
+    ))
+
+
+def apply(engine, migration: Migration):
+    if not migration.concurrent:
+        with engine.begin() as conn:
+            for step in migration.steps:
+                migration.run_step(conn, step)
+            record(conn, migration)
+        return
+
+    with engine.connect() as conn:
+        conn = conn.execution_options(isolation_level="AUTOCOMMIT")
+        for step in migration.steps:
+            migration.run_step(conn, step)
+        record(conn, migration)
+
+
+def pending_migrations(engine, migrations, target: int = None):
+    """Read-only: safe for readiness and schema checks on any worker."""
+    with engine.connect() as conn:
+        done = applied_versions(conn)
+    return [
+        migration for migration in sorted(migrations, key=lambda m: m.version)
+        if migration.version not in done and (target is None or migration.version <= target)
+    ]
+
+
+def migrate(engine, migrations, target: int = None):
+    """Apply pending migrations in version order; returns the versions applied."""
+    lock = None
+    if engine.dialect.name == "postgresql":
+        lock = engine.connect().execution_options(isolation_level="AUTOCOMMIT")
+        lock.execute(text("SELECT pg_advisory_lock(:id)"), {"id": ADVISORY_LOCK_ID})
+
+    applied = []
+    try:
+        metadata.create_all(engine)
+        for migration in pending_migrations(engine, migrations, target):
+            logger.info("Applying migration %s %s", migration.version, migration.name)
+            apply(engine, migration)
+            applied.append(migration.version)
+    finally:
+        if lock is not None:
+            lock.execute(text("SELECT pg_advisory_unlock(:id)"), {"id": ADVISORY_LOCK_ID})
+            lock.close()
+    return applied
@@ -0,0 +1,174 @@
+from sqlalchemy import inspect, text
+from sqlalchemy.schema import CreateTable
+
+from app.core.database import Base
+from app.migrations.runner import Migration, add_column, create_index, migrate
+
+# Registers every table on Base.metadata for the baseline
+import app.models.archive  # noqa: F401
+import app.models.facet  # noqa: F401
+import app.models.file_deletion  # noqa: F401
+import app.models.user  # noqa: F401
+import app.models.vehicle  # noqa: F401
+
+
+# Predicates of listing.active() and listing.sold(), as each dialect renders them
+UNSOLD = {"sqlite": "is_sold = 0", "default": "is_sold = FALSE"}
+SOLD = {"sqlite": "is_sold = 1", "default": "is_sold = TRUE"}
+
+
+def trigram(column: str):
+    # Only Postgres has pg_trgm; other dialects search without these indexes
+    return {"postgresql": f"{column} gin_trgm_ops", "default": None}
+
+
+# Live table -> archive table; archived rows keep their ids
+ARCHIVES = {
+    "vehicles": "vehicles_archive",
+    "bike_images": "bike_images_archive",
+    "bike_image_variants": "bike_image_variants_archive",
+}
+
+
+def create_tables(conn):
+    # Only creates tables that are missing; columns are added by later versions
+    Base.metadata.create_all(conn)
+
+
+def rebuild_with_autoincrement(conn, name: str):
+    """SQLite's recipe for what ALTER TABLE cannot change: copy, drop, rename."""
+    table = Base.metadata.tables[name]
+    existing = {column["name"] for column in inspect(conn).get_columns(name)}
+    columns = ", ".join(column.name for column in table.columns if column.name in existing)
+    indexes = conn.scalars(text(
+        "SELECT sql FROM sqlite_master WHERE type = 'index' AND tbl_name = :name AND sql IS NOT NULL"
+    ), {"name": name}).all()
+    create = str(CreateTable(table).compile(dialect=conn.dialect)).strip()
+
+    conn.execute(text(create.replace(f"CREATE TABLE {name} ", f"CREATE TABLE rebuilt_{name} ", 1)))
+    conn.execute(text(f"INSERT INTO rebuilt_{name} ({columns}) SELECT {columns} FROM {name}"))
+    conn.execute(text(f"DROP TABLE {name}"))
+    conn.execute(text(f"ALTER TABLE rebuilt_{name} RENAME TO {name}"))
+    for index in indexes:
+        conn.execute(text(index))
+
+
+def never_reuse_ids(conn):
+    """Give SQLite tables created before sqlite_autoincrement AUTOINCREMENT ids.
+
+    Without it SQLite hands out max(id) + 1, so once the newest rows are
+    archived their ids come back and the archive rejects the next copy.
+    Each table is rebuilt in its own transaction (pysqlite would commit the
+    DDL one statement at a time), hence a concurrent migration.
+    """
+    if conn.dialect.name != "sqlite":
+        return
+    for name, archive in ARCHIVES.items():
+        conn.execute(text("BEGIN"))
+        try:
+            ddl = conn.scalar(text("SELECT sql FROM sqlite_master WHERE type = 'table' AND name = :name"), {"name": name})
+            if "AUTOINCREMENT" not in ddl.upper():
+                rebuild_with_autoincrement(conn, name)
+            # The sequence must also clear ids that now only exist in the archive
+            conn.execute(text("DELETE FROM sqlite_sequence WHERE name = :name"), {"name": name})
+            conn.execute(text(
+                f"INSERT INTO sqlite_sequence (name, seq) SELECT :name, "
+                f"max((SELECT coalesce(max(id), 0) FROM {name}), (SELECT coalesce(max(id), 0) FROM {archive}))"
+            ), {"name": name})
+            conn.execute(text("COMMIT"))
+        except Exception:
+            conn.execute(text("ROLLBACK"))
+            raise
+
+
+MIGRATIONS = [
+    Migration(1, "baseline tables", [create_tables]),
+    Migration(2, "columns added since the first deploy", [
+        add_column("users", "phone", "VARCHAR(20)"),
+        add_column("vehicles", "owner_type", "VARCHAR(50) DEFAULT 'first_owner'"),
+        add_column("vehicles", "engine_cc", "INTEGER"),
+        add_column("vehicles", "mileage", "FLOAT"),
+        add_column("vehicles", "color", "VARCHAR(50)"),
+        add_column("vehicles", "insurance_valid", "VARCHAR(100)"),
+        add_column("vehicles", "registration_number", "VARCHAR(50)"),
+        add_column("vehicles", "is_negotiable", "BOOLEAN DEFAULT TRUE"),
+        add_column("vehicles", "is_sold", "BOOLEAN DEFAULT FALSE"),
+        add_column("bike_images", "content_hash", "VARCHAR(64)"),
+        {"postgresql": "ALTER TABLE vehicles ALTER COLUMN description TYPE TEXT"},
+        {"postgresql": "ALTER TABLE bike_images ALTER COLUMN image_url TYPE VARCHAR(500)"},
+    ]),
+    Migration(3, "indexes for listings and owner lookups", [
+        # get_my_bikes, /auth/my-bikes and ownership checks
+        create_index("ix_vehicles_owner_id_id", "vehicles", "owner_id, id"),
+        # selectinload(Vehicle.images) filters on bike_id and orders by id
+        create_index("ix_bike_images_bike_id_id", "bike_images", "bike_id, id"),
+        create_index("ix_bike_images_content_hash", "bike_images", "content_hash"),
+        # price_asc / price_desc sorts and min_price / max_price ranges. Listings
+        # only read unsold rows, so the indexes are partial and sorted pages stay
+        # index-only despite the is_sold filter. SQLite sorts NULLs first, so
+        # walking (price, id) backwards already gives price_desc. newest needs
+        # none: walking the primary key and skipping sold rows beats an index
+        # scan that looks up every row it returns
+        create_index("ix_vehicles_active_price_id", "vehicles", "price, id", where=UNSOLD),
+        create_index("ix_vehicles_active_price_desc_id", "vehicles", {
+            "postgresql": "price DESC NULLS LAST, id DESC",
+            "default": None,
+        }, where=UNSOLD),
+        create_index("ix_vehicles_active_year_id", "vehicles", {
+            "postgresql": "year DESC NULLS LAST, id DESC",
+            "default": "year, id",
+        }, where=UNSOLD),
+        # The brand substring filter (ILIKE '%...%') uses the pg_trgm index
+        # of migration 6; a btree cannot serve it
+
+        # Sold vehicles are a small slice; a partial index finds them without
+        # paying for the unsold majority on every write
+        create_index("ix_vehicles_sold_id", "vehicles", "id", where=SOLD),
+        # Without statistics SQLite takes any partial index whose predicate
+        # matches, even for a brand LIKE count it cannot serve, and then looks
+        # up every row
+        {"sqlite": "ANALYZE vehicles"},
+    ], concurrent=True),
+    Migration(4, "vehicle row version for ETags", [
+        add_column("vehicles", "version", "INTEGER NOT NULL DEFAULT 1"),
+        add_column("vehicles", "updated_at", "TIMESTAMP"),
+    ]),
+    Migration(5, "sold listings and archive tables", [
+        add_column("vehicles", "sold_at", "TIMESTAMP"),
+        # Listings filter on is_sold = FALSE, which a NULL would fall out of
+        "UPDATE vehicles SET is_sold = FALSE WHERE is_sold IS NULL",
+        # vehicles_archive, bike_images_archive, bike_image_variants_archive
+        create_tables,
+        # Facets now count unsold listings only; an empty table is rebuilt by
+        # prepare_schema (ensure_facets) or the periodic rebuild
+        "DELETE FROM vehicle_facet_counts",
+    ]),
+    Migration(6, "full-text and trigram search on Postgres", [
+        {"postgresql": "CREATE EXTENSION IF NOT EXISTS pg_trgm"},
+        # Generated, so Postgres keeps it current on every write and the
+        # search backend's index hooks have nothing to do
+        {"postgresql": """
+            ALTER TABLE vehicles ADD COLUMN IF NOT EXISTS search_vector tsvector
+            GENERATED ALWAYS AS (
+                setweight(to_tsvector('simple', coalesce(title, '')), 'A') ||
+                setweight(to_tsvector('simple', coalesce(brand, '') || ' ' || coalesce(model, '')), 'B')
+            ) STORED
+        """},
+        create_index("ix_vehicles_search_vector", "vehicles", {
+            "postgresql": "search_vector",
+            "default": None,
+        }, using="gin"),
+        create_index("ix_vehicles_title_trgm", "vehicles", trigram("title"), using="gin"),
+        create_index("ix_vehicles_model_trgm", "vehicles", trigram("model"), using="gin"),
+        create_index("ix_vehicles_brand_trgm", "vehicles", trigram("brand"), using="gin"),
+    ], concurrent=True),
+    Migration(7, "ids of archived rows are never reused on SQLite", [
+        never_reuse_ids,
+        # Dropping a table drops its statistics too (see migration 3)
+        {"sqlite": "ANALYZE"},
+    ], concurrent=True),
+]
+
+
+def run_migrations(engine, target: int = None):
+    return migrate(engine, MIGRATIONS, target)
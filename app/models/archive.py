@@ -0,0 +1,53 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, ForeignKey, Index, Integer, String
+from sqlalchemy.orm import relationship
+
+from app.core.database import Base
+from app.models.vehicle import ImageVariantLookup, VehicleColumns
+
+
+class ArchivedVehicle(VehicleColumns, Base):
+    """A sold listing moved out of vehicles by the archival job; ids are kept."""
+
+    __tablename__ = "vehicles_archive"
+    # History views list one owner's listings
+    __table_args__ = (Index("ix_vehicles_archive_owner_id_id", "owner_id", "id"),)
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    archived_at = Column(DateTime, default=datetime.utcnow)
+
+    owner = relationship("User")
+    images = relationship(
+        "ArchivedBikeImage",
+        order_by="ArchivedBikeImage.id",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class ArchivedBikeImage(ImageVariantLookup, Base):
+    __tablename__ = "bike_images_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    bike_id = Column(Integer, ForeignKey("vehicles_archive.id", ondelete="CASCADE"), index=True)
+    # Indexed because file GC checks archived images before removing a blob
+    image_url = Column(String(500), index=True)
+    content_hash = Column(String(64), index=True)
+
+    variants = relationship(
+        "ArchivedBikeImageVariant",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class ArchivedBikeImageVariant(Base):
+    __tablename__ = "bike_image_variants_archive"
+
+    id = Column(Integer, primary_key=True, autoincrement=False)
+    image_id = Column(Integer, ForeignKey("bike_images_archive.id", ondelete="CASCADE"), index=True)
+    variant = Column(String(20))
+    image_url = Column(String(500), index=True)
+    width = Column(Integer)
+    height = Column(Integer)
@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, String, UniqueConstraint
+from app.core.database import Base
+
+
+class VehicleFacetCount(Base):
+    """Vehicle counts per (brand, fuel type, year bucket, price band) combination.
+
+    Kept current from the vehicle write paths; NULLs are stored as '' / -1
+    so the unique key can be upserted on every dialect.
+    """
+
+    __tablename__ = "vehicle_facet_counts"
+    __table_args__ = (
+        UniqueConstraint("brand", "fuel_type", "year_bucket", "price_band", name="uq_vehicle_facet_counts_key"),
+    )
+
+    id = Column(Integer, primary_key=True, index=True)
+    brand = Column(String(100), nullable=False, default="")
+    fuel_type = Column(String(100), nullable=False, default="")
+    year_bucket = Column(Integer, nullable=False, default=-1)
+    price_band = Column(Integer, nullable=False, default=-1)
+    count = Column(Integer, nullable=False, default=0)
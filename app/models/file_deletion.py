@@ -0,0 +1,14 @@
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String
+from app.core.database import Base
+
+
+class FileDeletion(Base):
+    """Upload file queued for removal; written in the same transaction as the delete."""
+
+    __tablename__ = "file_deletions"
+
+    id = Column(Integer, primary_key=True, index=True)
+    path = Column(String(500), nullable=False)
+    requested_at = Column(DateTime, default=datetime.utcnow)
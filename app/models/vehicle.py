@@ -1,12 +1,13 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, Text, Boolean
+from datetime import datetime
+
+from sqlalchemy import Column, DateTime, Integer, String, ForeignKey, Float, Text, Boolean
 from sqlalchemy.orm import relationship
 from app.core.database import Base
 
 
-class Vehicle(Base):
-    __tablename__ = "vehicles"
+class VehicleColumns:
+    """Listing columns, shared by vehicles and vehicles_archive."""
 
-    id = Column(Integer, primary_key=True, index=True)
     title = Column(String(100))
     brand = Column(String(100))
     model = Column(String(100))
@@ -26,14 +27,66 @@ class Vehicle(Base):
     registration_number = Column(String(50))
     is_negotiable = Column(Boolean, default=True)
     is_sold = Column(Boolean, default=False)
+    sold_at = Column(DateTime)
+
+    # Bumped by every change that alters a response (see listing.bump_version);
+    # ETags are built from it. The server default covers COPY-based inserts.
+    version = Column(Integer, nullable=False, default=1, server_default="1")
+    updated_at = Column(DateTime, default=datetime.utcnow)
 
     owner_id = Column(Integer, ForeignKey("users.id"))
+
+
+class Vehicle(VehicleColumns, Base):
+    __tablename__ = "vehicles"
+    # Archived rows keep their id, so SQLite must never hand it out again
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, index=True)
     owner = relationship("User")
+    images = relationship(
+        "BikeImage",
+        order_by="BikeImage.id",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
 
 
-class BikeImage(Base):
+class ImageVariantLookup:
+    def variant_url(self, name: str):
+        for variant in self.variants:
+            if variant.variant == name:
+                return variant.image_url
+        return self.image_url
+
+
+class BikeImage(ImageVariantLookup, Base):
     __tablename__ = "bike_images"
+    # Archived with their ids, like vehicles
+    __table_args__ = {"sqlite_autoincrement": True}
 
     id = Column(Integer, primary_key=True, index=True)
     bike_id = Column(Integer, ForeignKey("vehicles.id", ondelete="CASCADE"))
+    image_url = Column(String(500), index=True)
+    # sha256 of the stored blob; identical uploads share one file on disk
+    content_hash = Column(String(64), index=True)
+
+    variants = relationship(
+        "BikeImageVariant",
+        cascade="all, delete-orphan",
+        passive_deletes=True,
+    )
+
+
+class BikeImageVariant(Base):
+    """Resized derivative of an upload (thumb/card/full), written by the image pipeline."""
+
+    __tablename__ = "bike_image_variants"
+    __table_args__ = {"sqlite_autoincrement": True}
+
+    id = Column(Integer, primary_key=True, index=True)
+    image_id = Column(Integer, ForeignKey("bike_images.id", ondelete="CASCADE"), index=True)
+    variant = Column(String(20))
     image_url = Column(String(500))
+    width = Column(Integer)
+    height = Column(Integer)
@@ -1,37 +1,57 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Request
+import time
+from typing import Annotated, Literal, Optional
+
+from fastapi import APIRouter, Depends, HTTPException, Query, status, Request
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy import event, select
+from sqlalchemy.ext.asyncio import AsyncSession
 from jose import jwt, JWTError
 
-from app.schemas.user import UserCreate, UserLogin
-from app.core.database import SessionLocal
+from app.schemas.user import CurrentUser, UserCreate, UserLogin
+from app.schemas.vehicle import MyBikesOut
+from app.core.cache import LRUCache
+from app.core.database import get_db
+from app.core.ratelimit import rate_limiter
 from app.models.user import User
-from app.utils.hashing import hash_password, verify_password
+from app.utils.hashing import hash_password_async, verify_and_update_async
 from app.utils.token import create_access_token
 from app.core.config import settings
 
 router = APIRouter(prefix="/auth", tags=["Auth"])
 security = HTTPBearer()
 
+# token -> user id, and user id -> CurrentUser (False once deleted); both
+# bounded LRU with TTL, so a user deleted elsewhere is refused within the TTL
+token_cache = LRUCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+user_cache = LRUCache(settings.AUTH_CACHE_MAX_ENTRIES, settings.AUTH_CACHE_TTL_SECONDS)
+
+
+def invalidate_user(user_id: int):
+    user_cache.delete(f"user:{user_id}")
+
+
+# Inserts too: SQLite can hand a deleted user's id to the next account
+@event.listens_for(User, "after_insert")
+@event.listens_for(User, "after_update")
+def invalidate_changed_user(mapper, connection, target):
+    invalidate_user(target.id)
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+
+@event.listens_for(User, "after_delete")
+def forget_deleted_user(mapper, connection, target):
+    user_cache.set(f"user:{target.id}", False)
 
 
 @router.post("/register")
-def register(user: UserCreate, db: Session = Depends(get_db)):
-    if db.query(User).filter(User.email == user.email).first():
+async def register(user: UserCreate, db: AsyncSession = Depends(get_db)):
+    existing = await db.execute(select(User.id).where(User.email == user.email))
+    if existing.first():
         raise HTTPException(400, "Email already exists")
 
-    hashed = hash_password(user.password)
+    hashed = await hash_password_async(user.password)
     new_user = User(name=user.name, email=user.email, phone=user.phone, password=hashed)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
 
     token = create_access_token({"id": new_user.id})
     return {
@@ -42,11 +62,22 @@ def register(user: UserCreate, db: Session = Depends(get_db)):
 
 
 @router.post("/login")
-def login(user: UserLogin, db: Session = Depends(get_db)):
-    db_user = db.query(User).filter(User.email == user.email).first()
-    if not db_user or not verify_password(user.password, db_user.password):
+async def login(user: UserLogin, db: AsyncSession = Depends(get_db)):
+    # Per-IP limits run in AdmissionMiddleware; this one slows guessing at one account
+    await rate_limiter.check("login_account", email=user.email.lower())
+    result = await db.execute(select(User).where(User.email == user.email))
+    db_user = result.scalar_one_or_none()
+    if not db_user:
+        raise HTTPException(400, "Invalid credentials")
+
+    valid, new_hash = await verify_and_update_async(user.password, db_user.password)
+    if not valid:
         raise HTTPException(400, "Invalid credentials")
 
+    if new_hash:
+        db_user.password = new_hash
+        await db.commit()
+
     token = create_access_token({"id": db_user.id})
     return {
         "message": "Login successful",
@@ -55,12 +86,11 @@ def login(user: UserLogin, db: Session = Depends(get_db)):
     }
 
 
-def get_current_user(
-    credentials: HTTPAuthorizationCredentials = Depends(security),
-    db: Session = Depends(get_db)
-):
-    token = credentials.credentials
-    
+def decode_token(token: str):
+    user_id = token_cache.get(token)
+    if user_id is not None:
+        return user_id
+
     try:
         payload = jwt.decode(token, settings.JWT_SECRET, algorithms=[settings.JWT_ALGORITHM])
         user_id: int = payload.get("id")
@@ -71,55 +101,63 @@ def get_current_user(
     except JWTError:
         raise HTTPException(status_code=401, detail="Invalid or expired token")
 
-    user = db.query(User).filter(User.id == user_id).first()
+    # Never cache a token past its own expiry
+    ttl = settings.AUTH_CACHE_TTL_SECONDS
+    if payload.get("exp"):
+        ttl = min(ttl, payload["exp"] - time.time())
+    if ttl > 0:
+        token_cache.set(token, user_id, ttl=ttl)
+
+    return user_id
+
+
+async def load_current_user(db: AsyncSession, user_id: int):
+    """CurrentUser for user_id, or None once the account is gone."""
+    cache_key = f"user:{user_id}"
+    current_user = user_cache.get(cache_key)
+    if current_user is None:
+        user = await db.get(User, user_id)
+        current_user = CurrentUser.model_validate(user) if user else False
+        user_cache.set(cache_key, current_user)
+    return current_user or None
+
+
+async def get_current_user(
+    credentials: HTTPAuthorizationCredentials = Depends(security),
+    db: AsyncSession = Depends(get_db),
+):
+    # A valid token outlives a deleted account; refuse it before any handler runs
+    current_user = await load_current_user(db, decode_token(credentials.credentials))
+    if current_user is None:
+        raise HTTPException(status_code=401, detail="User no longer exists")
+    return current_user
+
 
-    if not user:
-        raise HTTPException(status_code=404, detail="User not found")
+async def get_current_user_id(current_user: CurrentUser = Depends(get_current_user)):
+    return current_user.id
 
-    return user
+
+CurrentUserId = Annotated[int, Depends(get_current_user_id)]
 
 
 @router.get("/me")
-def get_me(current_user: User = Depends(get_current_user)):
+async def get_me(current_user: CurrentUser = Depends(get_current_user)):
     return {"id": current_user.id, "name": current_user.name, "email": current_user.email, "phone": current_user.phone}
 
 
-@router.get("/my-bikes")
-def get_my_bikes(
+@router.get("/my-bikes", response_model=MyBikesOut, response_model_exclude_unset=True)
+async def get_my_bikes(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user_id: CurrentUserId,
+    view: Literal["summary", "full"] = Query("summary"),
+    fields: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
+    db: AsyncSession = Depends(get_db)
 ):
-    from app.models.vehicle import Vehicle, BikeImage
-    
+    from app.services.listing import owner_listings, resolve_fields
+
     base_url = str(request.base_url).rstrip("/")
-    vehicles = db.query(Vehicle).filter(Vehicle.owner_id == current_user.id).all()
-    
-    result = []
-    for v in vehicles:
-        # Get images with full URL
-        images = db.query(BikeImage).filter(BikeImage.bike_id == v.id).all()
-        image_urls = []
-        for img in images:
-            url = img.image_url
-            if url and (url.startswith("http://") or url.startswith("https://")):
-                image_urls.append(url)
-            else:
-                image_urls.append(f"{base_url}/static/uploads/vehicles/{url}")
-        
-        result.append({
-            "id": v.id,
-            "title": v.title,
-            "brand": v.brand,
-            "model": v.model,
-            "price": v.price,
-            "year": v.year,
-            "km_driven": v.km_driven,
-            "fuel_type": v.fuel_type,
-            "location": v.location,
-            "description": v.description,
-            "owner_id": v.owner_id,
-            "images": image_urls
-        })
-    
+    selected = resolve_fields(view, fields)
+    result = await owner_listings(db, current_user_id, base_url, selected, include_archived)
+
     return {"vehicles": result, "total": len(result)}
@@ -0,0 +1,67 @@
+import hmac
+
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.security import HTTPAuthorizationCredentials, HTTPBearer
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import async_engine, engine
+from app.core.pool import pool_stats
+from app.core.ratelimit import rate_limiter
+from app.core.replicas import replica_set
+from app.services.file_gc import file_reaper
+from app.services.images import image_pipeline
+from app.utils.hashing import hashing_pool
+
+bearer = HTTPBearer(auto_error=False)
+
+
+def require_internal_token(credentials: HTTPAuthorizationCredentials = Depends(bearer)):
+    """Diagnostics answer only to `Authorization: Bearer <INTERNAL_TOKEN>`; unset hides them."""
+    if not settings.INTERNAL_TOKEN:
+        raise HTTPException(status_code=404, detail="Not Found")
+    token = credentials.credentials if credentials else ""
+    if not hmac.compare_digest(token.encode(), settings.INTERNAL_TOKEN.encode()):
+        raise HTTPException(status_code=401, detail="Invalid internal token", headers={"WWW-Authenticate": "Bearer"})
+
+
+router = APIRouter(prefix="/internal", tags=["Internal"], dependencies=[Depends(require_internal_token)])
+
+
+@router.get("/cache")
+def cache_stats():
+    return response_cache.stats()
+
+
+@router.get("/pool")
+def connection_pool_stats():
+    return {
+        "async": pool_stats(async_engine.sync_engine),
+        "sync": pool_stats(engine),
+        **{replica.name: pool_stats(replica.engine.sync_engine) for replica in replica_set.replicas},
+    }
+
+
+@router.get("/replicas")
+def replica_stats():
+    return replica_set.stats()
+
+
+@router.get("/rate-limits")
+def rate_limit_stats():
+    return rate_limiter.stats()
+
+
+@router.get("/hashing")
+def hashing_stats():
+    return hashing_pool.stats()
+
+
+@router.get("/images")
+def image_pipeline_stats():
+    return image_pipeline.stats()
+
+
+@router.get("/files")
+def file_reaper_stats():
+    return file_reaper.stats()
@@ -1,259 +1,520 @@
-from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request
-from sqlalchemy.orm import Session
+from fastapi import APIRouter, Depends, HTTPException, UploadFile, File, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import selectinload
+from datetime import datetime
 from app.models.vehicle import Vehicle, BikeImage
-from app.schemas.vehicle import VehicleCreate, VehicleOut
-from app.core.database import SessionLocal
-from app.routers.auth import get_current_user
-from app.models.user import User
-from typing import Optional, List
-import os
+from app.models.archive import ArchivedVehicle
+from app.models.file_deletion import FileDeletion
+from app.schemas.vehicle import MyBikesOut, VehicleCreate, VehicleDetailOut, VehiclePageOut
+from app.core.cache import response_cache
+from app.core.database import get_db
+from app.core.replicas import cacheable, get_read_db, mark_written
+from app.core.responses import conditional, make_etag, not_modified, not_modified_response
+from app.services.listing import (
+    active,
+    active_count,
+    bump_version,
+    history_order,
+    history_source,
+    listing_options,
+    load_listed,
+    owner_listings,
+    resolve_fields,
+    serialize_vehicle,
+    serialize_vehicles,
+)
+from app.services.pagination import (
+    SORT_ORDERS,
+    count_vehicles,
+    decode_cursor,
+    encode_cursor,
+    keyset_filter,
+    order_by_clause,
+)
+from app.services.search import search_backend
+from app.services.bulk import FORMATS, detect_format, export_vehicles, import_vehicles
+from app.services.facets import brand_names, facet_counts, facet_key, record_change
+from app.services.images import image_pipeline
+from app.services.file_gc import file_reaper
+from app.services.storage import save_uploads, unreferenced_files
+from app.routers.auth import CurrentUserId
+from typing import Optional, List, Literal
 
 router = APIRouter(prefix="/vehicles", tags=["Vehicles"], redirect_slashes=False)
 
-UPLOAD_DIR = "app/static/uploads/vehicles"
-os.makedirs(UPLOAD_DIR, exist_ok=True)
 
+# ------------------------------------------
+# STATIC ROUTES FIRST  (important!)
+# ------------------------------------------
 
-def get_db():
-    db = SessionLocal()
-    try:
-        yield db
-    finally:
-        db.close()
+@router.get("/brands/list")
+async def get_brands(db: AsyncSession = Depends(get_read_db)):
+    cache_key = await response_cache.key("brands")
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = list(await brand_names(db))
+    if await cacheable(db):
+        await response_cache.set(cache_key, result)
+    return result
 
 
-def get_image_urls(db: Session, vehicle_id: int, base_url: str):
-    images = db.query(BikeImage).filter(BikeImage.bike_id == vehicle_id).all()
-    result = []
-    for img in images:
-        url = img.image_url
-        if url and (url.startswith("http://") or url.startswith("https://")):
-            result.append(url)
-        else:
-            result.append(f"{base_url}/static/uploads/vehicles/{url}")
+@router.get("/facets")
+async def get_facets(
+    db: AsyncSession = Depends(get_read_db),
+    brand: Optional[str] = Query(None),
+    fuel_type: Optional[str] = Query(None),
+    min_year: Optional[int] = Query(None),
+    max_year: Optional[int] = Query(None),
+    min_price: Optional[float] = Query(None),
+    max_price: Optional[float] = Query(None),
+    search: Optional[str] = Query(None),
+):
+    filters = {
+        "brand": brand or None,
+        "fuel_type": fuel_type or None,
+        "min_year": min_year,
+        "max_year": max_year,
+        "min_price": min_price,
+        "max_price": max_price,
+    }
+    # Counts move with every listing write, so they share its namespace
+    cache_key = await response_cache.key("listings", view="facets", search=search or None, **filters)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return cached
+
+    result = await facet_counts(db, search=search or None, **filters)
+    if await cacheable(db):
+        await response_cache.set(cache_key, result)
     return result
 
 
-# ------------------------------------------
-# STATIC ROUTES FIRST  (important!)
-# ------------------------------------------
+@router.post("/import")
+async def import_vehicles_bulk(
+    request: Request,
+    current_user_id: CurrentUserId,
+    format: Optional[Literal["csv", "ndjson"]] = Query(None),
+    dry_run: bool = Query(False),
+    db: AsyncSession = Depends(get_db)
+):
+    fmt = detect_format(format, request.headers.get("content-type"))
+    report = await import_vehicles(db, request.stream(), fmt, current_user_id, dry_run=dry_run)
+    if report["imported"] and not dry_run:
+        await mark_written(current_user_id)
+    return report
 
-@router.get("/brands/list")
-def get_brands(db: Session = Depends(get_db)):
-    brands = db.query(Vehicle.brand).distinct().all()
-    return [b[0] for b in brands if b[0]]
+
+def export_response(fmt: str, owner_id: int = None):
+    filename = f"vehicles-{owner_id}.{fmt}" if owner_id is not None else f"vehicles.{fmt}"
+    return StreamingResponse(
+        export_vehicles(fmt, owner_id),
+        media_type=FORMATS[fmt],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'},
+    )
+
+
+@router.get("/export")
+async def export_vehicles_bulk(format: Literal["csv", "ndjson"] = Query("csv")):
+    return export_response(format)
+
+
+@router.get("/my-bikes/export")
+async def export_my_bikes(
+    current_user_id: CurrentUserId,
+    format: Literal["csv", "ndjson"] = Query("csv"),
+):
+    return export_response(format, current_user_id)
 
 
-@router.get("/my-bikes/")
-def get_my_bikes(
+@router.get("/my-bikes/", response_model=MyBikesOut, response_model_exclude_unset=True)
+async def get_my_bikes(
     request: Request,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user_id: CurrentUserId,
+    view: Literal["summary", "full"] = Query("summary"),
+    fields: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
+    db: AsyncSession = Depends(get_db)
 ):
     base_url = str(request.base_url).rstrip("/")
-    vehicles = db.query(Vehicle).filter(Vehicle.owner_id == current_user.id).all()
-    
-    result = []
-    for v in vehicles:
-        images = get_image_urls(db, v.id, base_url)
-        result.append({
-            "id": v.id,
-            "title": v.title,
-            "brand": v.brand,
-            "model": v.model,
-            "price": v.price,
-            "year": v.year,
-            "km_driven": v.km_driven,
-            "fuel_type": v.fuel_type,
-            "location": v.location,
-            "description": v.description,
-            "owner_id": v.owner_id,
-            "images": images
-        })
-    
+    selected = resolve_fields(view, fields)
+    result = await owner_listings(db, current_user_id, base_url, selected, include_archived)
+
     return {"vehicles": result, "total": len(result)}
 
 
 @router.post("/")
-def create_vehicle(
+async def create_vehicle(
     vehicle: VehicleCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user_id: CurrentUserId,
+    db: AsyncSession = Depends(get_db)
 ):
-    new_vehicle = Vehicle(**vehicle.dict(), owner_id=current_user.id)
+    new_vehicle = Vehicle(**vehicle.dict(), owner_id=current_user_id)
     db.add(new_vehicle)
-    db.commit()
-    db.refresh(new_vehicle)
+    await db.flush()
+    await search_backend.index_vehicle(db, new_vehicle)
+    await record_change(db, new_key=facet_key(new_vehicle))
+    await db.commit()
+    await mark_written(current_user_id)
+    await response_cache.invalidate("listings", "brands")
     return {"id": new_vehicle.id, "message": "Vehicle created successfully"}
 
 
-@router.get("/")
-def get_all_vehicles(
+@router.get("/", response_model=VehiclePageOut, response_model_exclude_unset=True)
+async def get_all_vehicles(
     request: Request,
-    db: Session = Depends(get_db),
+    response: Response,
+    db: AsyncSession = Depends(get_read_db),
     brand: Optional[str] = Query(None),
     min_price: Optional[float] = Query(None),
     max_price: Optional[float] = Query(None),
     search: Optional[str] = Query(None),
+    sort: Optional[Literal["relevance", "newest", "price_asc", "price_desc", "year"]] = Query(None),
     page: int = Query(1, ge=1),
-    limit: int = Query(12, ge=1, le=50)
+    cursor: Optional[str] = Query(None),
+    total: Optional[Literal["exact", "estimate", "none"]] = Query(None),
+    limit: int = Query(12, ge=1, le=50),
+    view: Literal["summary", "full"] = Query("summary"),
+    fields: Optional[str] = Query(None),
+    include_archived: bool = Query(False)
 ):
     base_url = str(request.base_url).rstrip("/")
-    query = db.query(Vehicle)
-    
+    selected = resolve_fields(view, fields)
+
+    if include_archived and cursor is not None:
+        raise HTTPException(status_code=400, detail="Archived listings support page pagination only")
+    sort = sort or ("relevance" if search and cursor is None and not include_archived else "newest")
+    if sort == "relevance":
+        if not search:
+            sort = "newest"
+        elif cursor is not None:
+            raise HTTPException(status_code=400, detail="Cursor pagination does not support relevance sort")
+        elif include_archived:
+            raise HTTPException(status_code=400, detail="Archived listings do not support relevance sort")
+
+    params = {
+        "base_url": base_url,
+        "brand": brand or None,
+        "min_price": min_price,
+        "max_price": max_price,
+        "search": search or None,
+        "sort": sort,
+        "page": page,
+        "cursor": cursor,
+        "total": total,
+        "limit": limit,
+        "fields": ",".join(selected),
+        "include_archived": include_archived,
+    }
+    cache_key = await response_cache.key("listings", **params)
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return conditional(request, response, cached["etag"], cached["body"])
+
+    if include_archived:
+        return await history_page(request, response, db, params, selected, cache_key)
+
+    query = select(Vehicle).where(active())
+
     if brand:
-        query = query.filter(Vehicle.brand.ilike(f"%{brand}%"))
+        query = search_backend.filter_brand(query, brand)
     if min_price is not None:
         query = query.filter(Vehicle.price >= min_price)
     if max_price is not None:
         query = query.filter(Vehicle.price <= max_price)
+    rank = None
     if search:
-        query = query.filter(
-            (Vehicle.model.ilike(f"%{search}%")) | 
-            (Vehicle.title.ilike(f"%{search}%"))
-        )
-    
-    total = query.count()
-    vehicles = query.offset((page - 1) * limit).limit(limit).all()
-    
-    result = []
-    for v in vehicles:
-        images = get_image_urls(db, v.id, base_url)
-        result.append({
-            "id": v.id,
-            "title": v.title,
-            "brand": v.brand,
-            "model": v.model,
-            "price": v.price,
-            "year": v.year,
-            "km_driven": v.km_driven,
-            "fuel_type": v.fuel_type,
-            "location": v.location,
-            "description": v.description,
-            "owner_id": v.owner_id,
-            "images": images
-        })
-    
-    return {"vehicles": result, "total": total, "page": page, "pages": (total + limit - 1) // limit}
+        query, rank = search_backend.search(query, search)
+
+    unfiltered = not (brand or search or min_price is not None or max_price is not None)
+
+    # An empty ?cursor= starts keyset pagination from the first row
+    if cursor is not None:
+        count = await listing_total(db, query, total or "none", unfiltered)
+        if cursor:
+            value, last_id = decode_cursor(cursor, sort)
+            query = query.filter(keyset_filter(sort, value, last_id))
+        paged = query.order_by(*order_by_clause(sort)).limit(limit + 1)
+    else:
+        count = await listing_total(db, query, total or "exact", unfiltered)
+        order_by = [rank.desc(), Vehicle.id.desc()] if sort == "relevance" else order_by_clause(sort)
+        paged = query.order_by(*order_by).offset((page - 1) * limit).limit(limit)
+
+    # A poll with a validator only needs the page's row versions to answer 304
+    if request.headers.get("if-none-match"):
+        rows = (await db.execute(paged.with_only_columns(Vehicle.id, Vehicle.version))).all()
+        etag = make_etag("listings", params, count, [[row.id, row.version] for row in rows])
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+
+    # The cursor encodes the sort column, so it is loaded even when not returned
+    sort_columns = (SORT_ORDERS[sort][0].key,) if sort in SORT_ORDERS else ()
+    vehicles = (await db.scalars(paged.options(*listing_options(selected, extra_columns=sort_columns)))).all()
+    etag = make_etag("listings", params, count, [[vehicle.id, vehicle.version] for vehicle in vehicles])
+
+    if cursor is not None:
+        next_cursor = encode_cursor(sort, vehicles[limit - 1]) if len(vehicles) > limit else None
+        result = serialize_vehicles(vehicles[:limit], base_url, selected)
+        body = {"vehicles": result, "total": count, "next_cursor": next_cursor}
+    else:
+        result = serialize_vehicles(vehicles, base_url, selected)
+        pages = (count + limit - 1) // limit if count is not None else None
+        body = {"vehicles": result, "total": count, "page": page, "pages": pages}
+
+    if await cacheable(db):
+        await response_cache.set(cache_key, {"etag": etag, "body": body})
+    return conditional(request, response, etag, body)
+
+
+async def listing_total(db, query, mode: str, unfiltered: bool):
+    # Counting the unsold rows directly scans the table; the unfiltered
+    # total has an index-only equivalent
+    if mode == "exact" and unfiltered:
+        return await active_count(db)
+    return await count_vehicles(db, query, mode)
+
+
+async def history_page(request, response, db, params, selected, cache_key):
+    """A listings page over live and archived vehicles (include_archived=true)."""
+    history = history_source(params["brand"], params["min_price"], params["max_price"], params["search"])
+    count = await count_vehicles(db, select(history.c.id), params["total"] or "exact")
+    limit = params["limit"]
+    rows = (await db.execute(
+        select(history.c.id, history.c.version, history.c.archived)
+        .order_by(*history_order(history, params["sort"]))
+        .offset((params["page"] - 1) * limit)
+        .limit(limit)
+    )).all()
+
+    # Moving a row into the archive changes its payload but not its version
+    etag = make_etag("listings", params, count, [[row.id, row.version, bool(row.archived)] for row in rows])
+    if not_modified(request, etag):
+        return not_modified_response(etag)
+
+    vehicles = await load_listed(db, rows, selected)
+    pages = (count + limit - 1) // limit if count is not None else None
+    body = {
+        "vehicles": serialize_vehicles(vehicles, params["base_url"], selected),
+        "total": count,
+        "page": params["page"],
+        "pages": pages,
+    }
+    if await cacheable(db):
+        await response_cache.set(cache_key, {"etag": etag, "body": body})
+    return conditional(request, response, etag, body)
 
 
 # ------------------------------------------
 # DYNAMIC ROUTES AFTER STATIC ROUTES
 # ------------------------------------------
 
-@router.get("/{vehicle_id}")
-def get_vehicle(vehicle_id: int, request: Request, db: Session = Depends(get_db)):
+@router.get("/{vehicle_id}", response_model=VehicleDetailOut, response_model_exclude_unset=True)
+async def get_vehicle(
+    vehicle_id: int,
+    request: Request,
+    response: Response,
+    view: Literal["summary", "full"] = Query("full"),
+    fields: Optional[str] = Query(None),
+    include_archived: bool = Query(False),
+    db: AsyncSession = Depends(get_read_db)
+):
     base_url = str(request.base_url).rstrip("/")
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
-    
+    selected = resolve_fields(view, fields, detail=True)
+    cache_key = await response_cache.key(
+        f"vehicle:{vehicle_id}", base_url=base_url, fields=",".join(selected), include_archived=include_archived
+    )
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return conditional(request, response, cached["etag"], cached["body"])
+
+    # Archived listings are looked up only when asked for, after the live table
+    models = (Vehicle, ArchivedVehicle) if include_archived else (Vehicle,)
+
+    # One indexed lookup decides a revalidation; images and owner stay unloaded
+    if request.headers.get("if-none-match"):
+        for model in models:
+            version = await db.scalar(select(model.version).where(model.id == vehicle_id))
+            if version is not None:
+                break
+        if version is None:
+            raise HTTPException(status_code=404, detail="Vehicle not found")
+        etag = make_etag("vehicle", vehicle_id, version, base_url, selected, model is ArchivedVehicle)
+        if not_modified(request, etag):
+            return not_modified_response(etag)
+
+    for model in models:
+        vehicle = await db.scalar(
+            select(model)
+            .options(*listing_options(selected, model=model))
+            .where(model.id == vehicle_id)
+        )
+        if vehicle is not None:
+            break
+
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
-    
-    owner = db.query(User).filter(User.id == vehicle.owner_id).first()
-    images = get_image_urls(db, vehicle.id, base_url)
-    
-    return {
-        "id": vehicle.id,
-        "title": vehicle.title,
-        "brand": vehicle.brand,
-        "model": vehicle.model,
-        "price": vehicle.price,
-        "year": vehicle.year,
-        "km_driven": vehicle.km_driven,
-        "fuel_type": vehicle.fuel_type,
-        "location": vehicle.location,
-        "description": vehicle.description,
-        "owner_id": vehicle.owner_id,
-        "images": images,
-        "owner": {
-            "name": owner.name if owner else None,
-            "email": owner.email if owner else None,
-            "phone": owner.phone if owner else None
-        }
-    }
+
+    etag = make_etag("vehicle", vehicle_id, vehicle.version, base_url, selected, model is ArchivedVehicle)
+    result = serialize_vehicle(vehicle, base_url, selected, variant="full")
+    if await cacheable(db):
+        await response_cache.set(cache_key, {"etag": etag, "body": result})
+    return conditional(request, response, etag, result)
 
 
 @router.put("/{vehicle_id}")
-def update_vehicle(
+async def update_vehicle(
     vehicle_id: int,
     vehicle_data: VehicleCreate,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user_id: CurrentUserId,
+    db: AsyncSession = Depends(get_db)
 ):
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    vehicle = await db.get(Vehicle, vehicle_id)
     
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
-    if vehicle.owner_id != current_user.id:
+    if vehicle.owner_id != current_user_id:
         raise HTTPException(status_code=403, detail="You can only edit your own bikes")
     
+    old_brand = vehicle.brand
+    old_facets = facet_key(vehicle)
     for key, value in vehicle_data.dict().items():
         setattr(vehicle, key, value)
-    
-    db.commit()
-    db.refresh(vehicle)
+    await db.execute(bump_version(vehicle_id))
+
+    await search_backend.index_vehicle(db, vehicle)
+    # Facets count unsold listings only
+    if not vehicle.is_sold:
+        await record_change(db, old_facets, facet_key(vehicle))
+    await db.commit()
+    await mark_written(current_user_id)
+    await response_cache.invalidate_vehicle(vehicle_id, brands=vehicle.brand != old_brand)
     return {"message": "Vehicle updated successfully"}
 
 
 @router.post("/{vehicle_id}/upload-images")
 async def upload_vehicle_images(
     vehicle_id: int,
+    current_user_id: CurrentUserId,
     files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    db: AsyncSession = Depends(get_db)
 ):
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    vehicle = await db.get(Vehicle, vehicle_id)
 
     if not vehicle:
         raise HTTPException(404, "Vehicle not found")
     
-    if vehicle.owner_id != current_user.id:
+    if vehicle.owner_id != current_user_id:
         raise HTTPException(status_code=403, detail="You can only upload images to your own bikes")
 
-    saved_images = []
+    blobs = await save_uploads(files)
 
-    for file in files:
-        clean_filename = file.filename.replace(" ", "_")
-        filename = f"{vehicle_id}_{clean_filename}"
-        filepath = os.path.join(UPLOAD_DIR, filename)
+    images = [
+        BikeImage(bike_id=vehicle_id, image_url=blob.image_url, content_hash=blob.digest)
+        for blob in blobs
+    ]
+    db.add_all(images)
+    await db.execute(bump_version(vehicle_id))
 
-        contents = await file.read()
-        with open(filepath, "wb") as buffer:
-            buffer.write(contents)
+    # A failed commit leaves new blobs unreferenced; the sweeper collects them,
+    # since another upload may already be reusing one of them
+    await db.commit()
+    await mark_written(current_user_id)
+    await response_cache.invalidate_vehicle(vehicle_id)
+    image_pipeline.submit(vehicle_id, [(img.id, img.image_url) for img in images])
 
-        img = BikeImage(bike_id=vehicle_id, image_url=filename)
-        db.add(img)
-        saved_images.append(filename)
-
-    db.commit()
-
-    return {"message": "Images uploaded successfully", "images": saved_images}
+    return {"message": "Images uploaded successfully", "images": [blob.image_url for blob in blobs]}
 
 
 @router.delete("/{vehicle_id}")
-def delete_vehicle(
+async def delete_vehicle(
     vehicle_id: int,
-    db: Session = Depends(get_db),
-    current_user: User = Depends(get_current_user)
+    current_user_id: CurrentUserId,
+    db: AsyncSession = Depends(get_db)
 ):
-    vehicle = db.query(Vehicle).filter(Vehicle.id == vehicle_id).first()
+    vehicle = await db.get(Vehicle, vehicle_id)
 
     if not vehicle:
         raise HTTPException(status_code=404, detail="Vehicle not found")
     
-    if vehicle.owner_id != current_user.id:
+    if vehicle.owner_id != current_user_id:
         raise HTTPException(status_code=403, detail="You can only delete your own bikes")
 
-    images = db.query(BikeImage).filter(BikeImage.bike_id == vehicle_id).all()
+    images = (await db.scalars(
+        select(BikeImage)
+        .options(selectinload(BikeImage.variants))
+        .where(BikeImage.bike_id == vehicle_id)
+    )).all()
 
     for img in images:
-        file_path = os.path.join(UPLOAD_DIR, img.image_url)
-        if os.path.exists(file_path):
-            os.remove(file_path)
-        db.delete(img)
-
-    db.delete(vehicle)
-    db.commit()
+        await db.delete(img)
+
+    await db.delete(vehicle)
+    await search_backend.remove_vehicle(db, vehicle_id)
+    if not vehicle.is_sold:
+        await record_change(db, old_key=facet_key(vehicle))
+    await db.flush()
+    # Files go only after the rows are gone for good; the reaper removes them
+    db.add_all(FileDeletion(path=filename) for filename in await unreferenced_files(db, images))
+    await db.commit()
+    await mark_written(current_user_id)
+    file_reaper.kick()
+    await response_cache.invalidate_vehicle(vehicle_id, brands=True)
 
     return {"message": "Vehicle deleted successfully"}
+
+
+async def owned_vehicle(db, vehicle_id: int, current_user_id: int):
+    vehicle = await db.get(Vehicle, vehicle_id)
+
+    if not vehicle:
+        raise HTTPException(status_code=404, detail="Vehicle not found")
+
+    if vehicle.owner_id != current_user_id:
+        raise HTTPException(status_code=403, detail="You can only change your own bikes")
+    return vehicle
+
+
+@router.post("/{vehicle_id}/sold")
+async def mark_vehicle_sold(
+    vehicle_id: int,
+    current_user_id: CurrentUserId,
+    db: AsyncSession = Depends(get_db)
+):
+    """Take the listing out of active inventory; the archival job moves it out later."""
+    vehicle = await owned_vehicle(db, vehicle_id, current_user_id)
+    if vehicle.is_sold:
+        return {"message": "Vehicle already marked as sold"}
+
+    vehicle.is_sold = True
+    vehicle.sold_at = datetime.utcnow()
+    await db.execute(bump_version(vehicle_id))
+    await record_change(db, old_key=facet_key(vehicle))
+    await db.commit()
+    await mark_written(current_user_id)
+    await response_cache.invalidate_vehicle(vehicle_id, brands=True)
+    return {"message": "Vehicle marked as sold"}
+
+
+@router.delete("/{vehicle_id}/sold")
+async def relist_vehicle(
+    vehicle_id: int,
+    current_user_id: CurrentUserId,
+    db: AsyncSession = Depends(get_db)
+):
+    """Undo a sale that has not been archived yet."""
+    vehicle = await owned_vehicle(db, vehicle_id, current_user_id)
+    if not vehicle.is_sold:
+        return {"message": "Vehicle is already listed"}
+
+    vehicle.is_sold = False
+    vehicle.sold_at = None
+    await db.execute(bump_version(vehicle_id))
+    await record_change(db, new_key=facet_key(vehicle))
+    await db.commit()
+    await mark_written(current_user_id)
+    await response_cache.invalidate_vehicle(vehicle_id, brands=True)
+    return {"message": "Vehicle listed again"}
@@ -1,3 +1,5 @@
+from datetime import datetime
+
 from pydantic import BaseModel
 from typing import List, Optional
 
@@ -21,13 +23,62 @@ class VehicleCreate(BaseModel):
     is_negotiable: Optional[bool] = True
 
 
-class VehicleOut(VehicleCreate):
+class VehicleOut(BaseModel):
+    # Listings project a subset of columns (?view= / ?fields=); routes drop unset fields
     id: int
-    owner_id: int
-    is_sold: bool = False
-    
-    class Config:
-        from_attributes = True
+    title: Optional[str] = None
+    brand: Optional[str] = None
+    model: Optional[str] = None
+    price: Optional[float] = None
+    year: Optional[int] = None
+    km_driven: Optional[int] = None
+    fuel_type: Optional[str] = None
+    location: Optional[str] = None
+    description: Optional[str] = None
+    owner_id: Optional[int] = None
+    owner_type: Optional[str] = None
+    engine_cc: Optional[int] = None
+    mileage: Optional[float] = None
+    color: Optional[str] = None
+    insurance_valid: Optional[str] = None
+    registration_number: Optional[str] = None
+    is_negotiable: Optional[bool] = None
+    is_sold: Optional[bool] = None
+    sold_at: Optional[datetime] = None
+    # Only set on rows served from the archive tables
+    archived: Optional[bool] = None
+    images: Optional[List[str]] = None
+
+
+class ImageVariantsOut(BaseModel):
+    original: str
+    thumb: str
+    card: str
+    full: str
+
+
+class OwnerOut(BaseModel):
+    name: Optional[str] = None
+    email: Optional[str] = None
+    phone: Optional[str] = None
+
+
+class VehicleDetailOut(VehicleOut):
+    image_variants: Optional[List[ImageVariantsOut]] = None
+    owner: Optional[OwnerOut] = None
+
+
+class VehiclePageOut(BaseModel):
+    vehicles: List[VehicleOut]
+    total: Optional[int] = None
+    page: Optional[int] = None
+    pages: Optional[int] = None
+    next_cursor: Optional[str] = None
+
+
+class MyBikesOut(BaseModel):
+    vehicles: List[VehicleOut]
+    total: int
 
 
 class BikeImageOut(BaseModel):
@@ -0,0 +1,142 @@
+"""
+Moves sold listings out of the hot tables.
+
+Vehicles sold more than ARCHIVE_SOLD_AFTER_DAYS ago are copied, with their
+bike_images and bike_image_variants rows, into the *_archive tables and
+deleted from the live ones, ARCHIVE_BATCH_SIZE vehicles per transaction.
+Ids are kept, so history views and links resolve the same listing. Run a
+pass by hand with:
+    python -m app.services.archive --dry-run
+"""
+
+import argparse
+import asyncio
+import logging
+from datetime import datetime, timedelta
+
+from anyio import from_thread
+from sqlalchemy import DateTime, delete, func, insert, literal, or_, select, true
+from starlette.concurrency import run_in_threadpool
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.archive import ArchivedBikeImage, ArchivedBikeImageVariant, ArchivedVehicle
+from app.models.vehicle import BikeImage, BikeImageVariant, Vehicle
+from app.services.search import search_backend
+
+# relationship("User") must resolve when this runs as a script
+import app.models.user  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+
+def archivable(cutoff: datetime):
+    # Rows sold before sold_at existed have no timestamp; they are old enough
+    return select(Vehicle.id).where(
+        Vehicle.is_sold == true(),
+        or_(Vehicle.sold_at.is_(None), Vehicle.sold_at <= cutoff),
+    )
+
+
+def copy_rows(db, source, target, where, **extra):
+    """INSERT INTO target SELECT ... FROM source, column for column."""
+    columns = [column.name for column in source.__table__.columns]
+    values = [literal(value, DateTime) for value in extra.values()]
+    db.execute(
+        insert(target).from_select(
+            columns + list(extra),
+            select(*source.__table__.columns, *values).where(where),
+        )
+    )
+
+
+def archive_batch(db, cutoff: datetime, batch_size: int):
+    """Archive up to batch_size vehicles in the session's transaction; returns their ids."""
+    ids = db.scalars(archivable(cutoff).order_by(Vehicle.id).limit(batch_size)).all()
+    if not ids:
+        return []
+
+    image_ids = select(BikeImage.id).where(BikeImage.bike_id.in_(ids))
+    copy_rows(db, Vehicle, ArchivedVehicle, Vehicle.id.in_(ids), archived_at=datetime.utcnow())
+    copy_rows(db, BikeImage, ArchivedBikeImage, BikeImage.bike_id.in_(ids))
+    copy_rows(db, BikeImageVariant, ArchivedBikeImageVariant, BikeImageVariant.image_id.in_(image_ids))
+
+    # Children first: SQLite does not enforce the ON DELETE CASCADE by default
+    db.execute(delete(BikeImageVariant).where(BikeImageVariant.image_id.in_(image_ids)))
+    db.execute(delete(BikeImage).where(BikeImage.bike_id.in_(ids)))
+    db.execute(delete(Vehicle).where(Vehicle.id.in_(ids)))
+    search_backend.remove_vehicles(db.connection(), ids)
+    return ids
+
+
+def archive_sold(older_than_days: int = None, batch_size: int = None, dry_run: bool = False, on_batch=None):
+    """Archive every eligible vehicle, one committed batch at a time.
+
+    Sold rows no longer count towards facets, so the counts need no update;
+    on_batch(ids) runs after each commit.
+    """
+    older_than_days = settings.ARCHIVE_SOLD_AFTER_DAYS if older_than_days is None else older_than_days
+    batch_size = batch_size or settings.ARCHIVE_BATCH_SIZE
+    cutoff = datetime.utcnow() - timedelta(days=older_than_days)
+    report = {"archived": 0, "batches": 0, "dry_run": dry_run}
+
+    if dry_run:
+        with SessionLocal() as db:
+            report["archived"] = db.scalar(select(func.count()).select_from(archivable(cutoff).subquery()))
+        return report
+
+    while True:
+        with SessionLocal() as db:
+            ids = archive_batch(db, cutoff, batch_size)
+            db.commit()
+        if not ids:
+            break
+        if on_batch is not None:
+            on_batch(ids)
+        report["archived"] += len(ids)
+        report["batches"] += 1
+        if len(ids) < batch_size:
+            break
+    return report
+
+
+def invalidate_archived(ids):
+    # Runs on a threadpool thread; the cache backend lives on the event loop
+    from_thread.run(response_cache.invalidate, "listings", *(f"vehicle:{vehicle_id}" for vehicle_id in ids))
+
+
+async def run_archive(**options):
+    """archive_sold off the event loop, invalidating listing and detail caches per batch."""
+    return await run_in_threadpool(archive_sold, on_batch=invalidate_archived, **options)
+
+
+async def archive_periodically(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await run_archive()
+            if report["archived"]:
+                logger.info("Archived sold listings: %s", report)
+        except Exception:
+            logger.exception("Archiving sold listings failed")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Move sold listings into the archive tables.")
+    parser.add_argument("--dry-run", action="store_true", help="count eligible listings without moving them")
+    parser.add_argument("--older-than-days", type=int, default=settings.ARCHIVE_SOLD_AFTER_DAYS)
+    parser.add_argument("--batch-size", type=int, default=settings.ARCHIVE_BATCH_SIZE)
+    args = parser.parse_args()
+
+    report = asyncio.run(run_archive(
+        older_than_days=args.older_than_days,
+        batch_size=args.batch_size,
+        dry_run=args.dry_run,
+    ))
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
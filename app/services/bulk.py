@@ -0,0 +1,246 @@
+"""
+Streaming CSV / NDJSON import and export of vehicle listings.
+
+Imports are parsed record by record from the request stream, validated
+against VehicleCreate and inserted in batches (COPY on Postgres, one
+executemany elsewhere), each batch in its own transaction. Exports stream
+rows straight from a server-side cursor: the public export has the unsold
+listings' summary columns, an owner's export every column of their own rows.
+"""
+
+import codecs
+import csv
+import io
+import json
+import logging
+
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import AsyncSessionLocal
+from app.models.vehicle import Vehicle
+from app.schemas.vehicle import VehicleCreate
+from app.services.facets import facet_key, record_created
+from app.services.listing import COLUMN_FIELDS, VIEWS, active
+from app.services.search import search_backend
+
+logger = logging.getLogger(__name__)
+
+FORMATS = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+IMPORT_FIELDS = list(VehicleCreate.model_fields)
+EXPORT_FIELDS = ["id", "owner_id", *IMPORT_FIELDS, "is_sold"]
+# The listing grid's columns; no seller-only details or sold listings
+PUBLIC_EXPORT_FIELDS = [name for name in VIEWS["summary"] if name == "id" or name in COLUMN_FIELDS]
+
+
+def detect_format(requested, content_type: str):
+    if requested:
+        return requested
+    content_type = (content_type or "").lower()
+    if "ndjson" in content_type or "jsonl" in content_type or "json" in content_type:
+        return "ndjson"
+    return "csv"
+
+
+async def iter_lines(chunks, max_bytes: int, report: dict):
+    """Decoded lines from a byte stream; stops (and flags the report) past max_bytes."""
+    decoder = codecs.getincrementaldecoder("utf-8-sig")()
+    received = 0
+    pending = ""
+    try:
+        async for chunk in chunks:
+            received += len(chunk)
+            if received > max_bytes:
+                report["truncated"] = f"body larger than {max_bytes} bytes"
+                return
+            pending += decoder.decode(chunk)
+            *lines, pending = pending.split("\n")
+            for line in lines:
+                yield line + "\n"
+        pending += decoder.decode(b"", final=True)
+    except UnicodeDecodeError:
+        raise HTTPException(status_code=400, detail="Import must be UTF-8 encoded")
+    if pending:
+        yield pending
+
+
+async def iter_csv_records(lines):
+    """(row number, dict, error) per CSV record; quoted fields may span lines."""
+    header = None
+    parts = []
+    quotes = 0
+    number = 0
+    async for line in lines:
+        parts.append(line)
+        quotes += line.count('"')
+        # An odd number of quotes so far means we are inside a quoted field
+        if quotes % 2:
+            continue
+        record = "".join(parts)
+        parts = []
+        quotes = 0
+        if not record.strip():
+            continue
+
+        values = next(csv.reader([record]))
+        if header is None:
+            header = [name.strip() for name in values]
+            continue
+
+        number += 1
+        if len(values) != len(header):
+            yield number, None, f"expected {len(header)} columns, got {len(values)}"
+        else:
+            yield number, dict(zip(header, values)), None
+
+    if parts:
+        yield number + 1, None, "unterminated quoted field"
+
+
+async def iter_ndjson_records(lines):
+    number = 0
+    async for line in lines:
+        if not line.strip():
+            continue
+        number += 1
+        try:
+            data = json.loads(line)
+        except ValueError as exc:
+            yield number, None, f"invalid JSON: {exc}"
+            continue
+        if isinstance(data, dict):
+            yield number, data, None
+        else:
+            yield number, None, "expected a JSON object"
+
+
+def validate_record(data: dict):
+    # Blank cells fall back to the schema defaults instead of failing coercion
+    cleaned = {
+        key: value.strip() if isinstance(value, str) else value
+        for key, value in data.items()
+        if key in VehicleCreate.model_fields and value not in ("", None)
+    }
+    try:
+        return VehicleCreate(**cleaned), None
+    except ValidationError as exc:
+        return None, [
+            {"field": ".".join(str(part) for part in error["loc"]), "message": error["msg"]}
+            for error in exc.errors()
+        ]
+
+
+async def insert_batch(db, records):
+    """Insert one batch and keep search and facets in step."""
+    # Runs first so the driver has opened the transaction COPY then joins
+    await record_created(db, [facet_key(Vehicle(**record)) for record in records])
+
+    if db.bind.dialect.name == "postgresql":
+        columns = list(records[0])
+        conn = await db.connection()
+        raw = await conn.get_raw_connection()
+        await raw.driver_connection.copy_records_to_table(
+            Vehicle.__tablename__,
+            records=[tuple(record[column] for column in columns) for record in records],
+            columns=columns,
+        )
+    else:
+        # Returning the indexed columns avoids needing the rows back in input
+        # order, which would force one INSERT per row on SQLite
+        inserted = (await db.execute(
+            insert(Vehicle).returning(Vehicle.id, Vehicle.title, Vehicle.brand, Vehicle.model),
+            records,
+        )).all()
+        await search_backend.index_vehicles(db, inserted)
+
+    await db.commit()
+
+
+async def import_vehicles(db, chunks, fmt: str, owner_id: int, dry_run: bool = False):
+    report = {"format": fmt, "received": 0, "imported": 0, "failed": 0, "errors": [], "dry_run": dry_run}
+    lines = iter_lines(chunks, settings.BULK_IMPORT_MAX_BYTES, report)
+    records = iter_ndjson_records(lines) if fmt == "ndjson" else iter_csv_records(lines)
+
+    def fail(rows, errors):
+        report["failed"] += len(rows)
+        for row in rows:
+            if len(report["errors"]) < settings.BULK_IMPORT_MAX_ERRORS:
+                report["errors"].append({"row": row, "errors": errors})
+
+    batch = []
+    batch_rows = []
+
+    async def flush():
+        if dry_run:
+            report["imported"] += len(batch)
+        else:
+            try:
+                await insert_batch(db, batch)
+                report["imported"] += len(batch)
+            except Exception:
+                # COPY raises driver errors rather than SQLAlchemyError
+                await db.rollback()
+                logger.exception("Bulk import batch failed")
+                fail(batch_rows, [{"field": None, "message": "database rejected the batch"}])
+        batch.clear()
+        batch_rows.clear()
+
+    async for number, data, error in records:
+        if report["received"] >= settings.BULK_IMPORT_MAX_ROWS:
+            report["truncated"] = f"more than {settings.BULK_IMPORT_MAX_ROWS} rows"
+            break
+        report["received"] += 1
+
+        if error is None:
+            vehicle, errors = validate_record(data)
+        else:
+            vehicle, errors = None, [{"field": None, "message": error}]
+        if vehicle is None:
+            fail([number], errors)
+            continue
+
+        batch.append({**vehicle.model_dump(), "owner_id": owner_id, "is_sold": False})
+        batch_rows.append(number)
+        if len(batch) >= settings.BULK_IMPORT_BATCH_SIZE:
+            await flush()
+
+    if batch:
+        await flush()
+
+    if report["imported"] and not dry_run:
+        await response_cache.invalidate("listings", "brands")
+    return report
+
+
+def encode_rows(fmt: str, rows, fields=EXPORT_FIELDS):
+    if fmt == "ndjson":
+        return "".join(json.dumps(dict(zip(fields, row)), default=str) + "\n" for row in rows)
+    buffer = io.StringIO()
+    csv.writer(buffer).writerows(rows)
+    return buffer.getvalue()
+
+
+async def export_vehicles(fmt: str, owner_id: int = None):
+    """Yield the export in chunks; runs in its own session because it outlives the request handler.
+
+    With owner_id, every column of that owner's listings (sold ones too), in
+    the import's format; without, the public columns of unsold listings.
+    """
+    fields = EXPORT_FIELDS if owner_id is not None else PUBLIC_EXPORT_FIELDS
+    if fmt == "csv":
+        yield encode_rows(fmt, [fields], fields)
+
+    statement = select(*[getattr(Vehicle, field) for field in fields]).order_by(Vehicle.id)
+    if owner_id is not None:
+        statement = statement.where(Vehicle.owner_id == owner_id)
+    else:
+        statement = statement.where(active())
+
+    async with AsyncSessionLocal() as db:
+        result = await db.stream(statement.execution_options(yield_per=settings.BULK_EXPORT_CHUNK_ROWS))
+        async for rows in result.partitions():
+            yield encode_rows(fmt, rows, fields)
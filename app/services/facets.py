@@ -0,0 +1,242 @@
+"""
+Precomputed facet counts (brand, fuel type, year bucket, price band).
+
+vehicle_facet_counts holds one row per combination of the four dimensions
+over unsold listings, and is adjusted in the same transaction as every
+vehicle write, sale and relisting. A periodic
+rebuild corrects any drift; run one by hand with:
+    python -m app.services.facets
+"""
+
+import asyncio
+import bisect
+import logging
+from collections import Counter
+
+from sqlalchemy import String, case, cast, delete, func, insert, literal, select, union_all, update
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.facet import VehicleFacetCount
+from app.models.vehicle import Vehicle
+from app.services.listing import active
+from app.services.search import search_backend
+
+logger = logging.getLogger(__name__)
+
+KEY_COLUMNS = ("brand", "fuel_type", "year_bucket", "price_band")
+
+# Facet name in the response -> cube column
+FACETS = {
+    "brands": "brand",
+    "fuel_types": "fuel_type",
+    "years": "year_bucket",
+    "prices": "price_band",
+}
+
+
+def year_bucket(year):
+    if year is None:
+        return -1
+    return year - year % settings.FACET_YEAR_BUCKET
+
+
+def price_band(price):
+    if price is None:
+        return -1
+    index = bisect.bisect_right(settings.FACET_PRICE_BANDS, price) - 1
+    return settings.FACET_PRICE_BANDS[index] if index >= 0 else -1
+
+
+def facet_key(vehicle):
+    return (
+        vehicle.brand or "",
+        vehicle.fuel_type or "",
+        year_bucket(vehicle.year),
+        price_band(vehicle.price),
+    )
+
+
+def key_expressions():
+    """SQL equivalents of facet_key over the vehicles table."""
+    bands = sorted(settings.FACET_PRICE_BANDS, reverse=True)
+    return (
+        func.coalesce(Vehicle.brand, "").label("brand"),
+        func.coalesce(Vehicle.fuel_type, "").label("fuel_type"),
+        func.coalesce(Vehicle.year - Vehicle.year % settings.FACET_YEAR_BUCKET, -1).label("year_bucket"),
+        case(*[(Vehicle.price >= band, band) for band in bands], else_=-1).label("price_band"),
+    )
+
+
+def upsert_statement(dialect_name: str, key, delta: int):
+    values = dict(zip(KEY_COLUMNS, key), count=delta)
+    if dialect_name == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert as dialect_insert
+    elif dialect_name == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert as dialect_insert
+    else:
+        return None
+
+    statement = dialect_insert(VehicleFacetCount).values(**values)
+    return statement.on_conflict_do_update(
+        index_elements=list(KEY_COLUMNS),
+        set_={"count": VehicleFacetCount.count + statement.excluded.count},
+    )
+
+
+async def apply_delta(db, key, delta: int):
+    statement = upsert_statement(db.bind.dialect.name, key, delta)
+    if statement is not None:
+        await db.execute(statement)
+        return
+
+    result = await db.execute(
+        update(VehicleFacetCount)
+        .where(*[getattr(VehicleFacetCount, name) == value for name, value in zip(KEY_COLUMNS, key)])
+        .values(count=VehicleFacetCount.count + delta)
+    )
+    if not result.rowcount:
+        db.add(VehicleFacetCount(**dict(zip(KEY_COLUMNS, key)), count=delta))
+
+
+async def record_change(db, old_key=None, new_key=None):
+    """Move one vehicle between facet cells; pass None for a create or delete."""
+    if old_key == new_key:
+        return
+    if old_key is not None:
+        await apply_delta(db, old_key, -1)
+    if new_key is not None:
+        await apply_delta(db, new_key, 1)
+
+
+async def record_created(db, keys):
+    """Count a batch of new vehicles, one upsert per distinct cell."""
+    for key, count in Counter(keys).items():
+        await apply_delta(db, key, count)
+
+
+def rebuild_facets():
+    """Recompute the whole table in one transaction; readers see the old counts until it commits."""
+    columns = key_expressions()
+    grouped = select(*columns, func.count().label("count")).where(active()).group_by(*columns)
+    with SessionLocal() as db:
+        db.execute(delete(VehicleFacetCount))
+        db.execute(insert(VehicleFacetCount).from_select([*KEY_COLUMNS, "count"], grouped))
+        db.commit()
+        return db.scalar(select(func.count()).select_from(VehicleFacetCount))
+
+
+def ensure_facets():
+    """Build the table on first start, when it is empty but vehicles exist."""
+    with SessionLocal() as db:
+        if db.scalar(select(VehicleFacetCount.id).limit(1)) is not None:
+            return
+        if db.scalar(select(Vehicle.id).limit(1)) is None:
+            return
+    rebuild_facets()
+
+
+async def rebuild_periodically(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            cells = await run_in_threadpool(rebuild_facets)
+            logger.info("Facet rebuild: %s cells", cells)
+        except Exception:
+            logger.exception("Facet rebuild failed")
+
+
+def dimension_filters(source, brand=None, fuel_type=None, min_year=None, max_year=None, min_price=None, max_price=None):
+    """Filters per dimension; year and price apply at bucket granularity."""
+    filters = {}
+    if brand:
+        filters["brand"] = [source.c.brand.ilike(f"%{brand}%")]
+    if fuel_type:
+        filters["fuel_type"] = [func.lower(source.c.fuel_type) == fuel_type.lower()]
+    if min_year is not None or max_year is not None:
+        filters["year_bucket"] = [source.c.year_bucket >= max(year_bucket(min_year), 0)]
+        if max_year is not None:
+            filters["year_bucket"].append(source.c.year_bucket <= year_bucket(max_year))
+    if min_price is not None or max_price is not None:
+        filters["price_band"] = [source.c.price_band >= max(price_band(min_price), 0)]
+        if max_price is not None:
+            filters["price_band"].append(source.c.price_band <= price_band(max_price))
+    return filters
+
+
+def facet_source(search=None):
+    if not search:
+        return VehicleFacetCount.__table__
+    # Text search can't be precomputed; aggregate the matching rows instead
+    columns = key_expressions()
+    query = select(*columns, func.count().label("count")).select_from(Vehicle).where(active())
+    query, _ = search_backend.search(query, search)
+    return query.group_by(*columns).cte("facet_source")
+
+
+async def facet_counts(db, search=None, **filters):
+    """Counts for every facet value in one round trip.
+
+    Each facet is filtered by the other dimensions but not by its own, so the
+    alternatives to the current selection keep their counts.
+    """
+    source = facet_source(search)
+    by_dimension = dimension_filters(source, **filters)
+
+    def other_filters(column=None):
+        return [clause for name, clauses in by_dimension.items() if name != column for clause in clauses]
+
+    queries = [
+        select(literal(facet).label("facet"), cast(source.c[column], String).label("value"), func.sum(source.c.count).label("count"))
+        .where(*other_filters(column))
+        .group_by(source.c[column])
+        .having(func.sum(source.c.count) > 0)
+        for facet, column in FACETS.items()
+    ]
+    queries.append(
+        select(literal("total").label("facet"), literal("").label("value"), func.coalesce(func.sum(source.c.count), 0).label("count"))
+        .where(*other_filters())
+    )
+
+    result = {facet: [] for facet in FACETS}
+    result["total"] = 0
+    for facet, value, count in await db.execute(union_all(*queries)):
+        count = int(count)
+        if facet == "total":
+            result["total"] = count
+        elif facet == "brands" or facet == "fuel_types":
+            if value:
+                result[facet].append({"value": value, "count": count})
+        elif int(value) >= 0:
+            result[facet].append((int(value), count))
+
+    for facet in ("brands", "fuel_types"):
+        result[facet].sort(key=lambda item: (-item["count"], item["value"].lower()))
+
+    result["years"] = [
+        {"from": start, "to": start + settings.FACET_YEAR_BUCKET - 1, "count": count}
+        for start, count in sorted(result["years"], reverse=True)
+    ]
+
+    bands = settings.FACET_PRICE_BANDS
+    upper = dict(zip(bands, bands[1:]))
+    result["prices"] = [
+        {"min": start, "max": upper.get(start), "count": count}
+        for start, count in sorted(result["prices"])
+    ]
+    return result
+
+
+async def brand_names(db):
+    return (await db.scalars(
+        select(VehicleFacetCount.brand)
+        .where(VehicleFacetCount.brand != "")
+        .group_by(VehicleFacetCount.brand)
+        .having(func.sum(VehicleFacetCount.count) > 0)
+        .order_by(VehicleFacetCount.brand)
+    )).all()
+
+
+if __name__ == "__main__":
+    print(f"cells: {rebuild_facets()}")
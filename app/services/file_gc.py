@@ -0,0 +1,202 @@
+"""
+Deferred removal of upload files, and a sweeper for orphaned ones.
+
+Run the sweeper by hand:
+    python -m app.services.file_gc --dry-run
+"""
+
+import argparse
+import asyncio
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.archive import ArchivedBikeImage, ArchivedBikeImageVariant
+from app.models.file_deletion import FileDeletion
+from app.models.vehicle import BikeImage, BikeImageVariant
+from app.services.storage import UPLOAD_DIR, remove_quietly, remove_unless_recent
+
+logger = logging.getLogger(__name__)
+
+PRECOMPRESSED_SUFFIXES = (".br", ".gz")
+
+
+def referenced_paths(db, paths):
+    """Subset of paths that an image or variant row, live or archived, still points at."""
+    paths = list(paths)
+    if not paths:
+        return set()
+    used = set()
+    for image, variant in ((BikeImage, BikeImageVariant), (ArchivedBikeImage, ArchivedBikeImageVariant)):
+        used.update(db.scalars(select(image.image_url).where(image.image_url.in_(paths))))
+        # Variants only count while their image row exists; a render that raced a
+        # delete can leave variant rows behind on databases without FK enforcement
+        used.update(db.scalars(
+            select(variant.image_url)
+            .join(image, image.id == variant.image_id)
+            .where(variant.image_url.in_(paths))
+        ))
+    return used
+
+
+class FileReaper:
+    """Drains file_deletions on a background thread once the delete has committed.
+
+    Each path is re-checked before removal, so a blob that was uploaded again
+    in the meantime is kept. Files touched within grace_seconds may belong to
+    an upload whose row has not committed yet; they are left to the sweeper.
+    """
+
+    def __init__(self, upload_dir: str, batch_size: int = 200, grace_seconds: int = 300):
+        self.upload_dir = upload_dir
+        self.batch_size = batch_size
+        self.grace_seconds = grace_seconds
+        self.removed = 0
+        self.kept = 0
+        self.deferred = 0
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="file-reaper")
+        self._scheduled = threading.Event()
+
+    def kick(self):
+        if not self._scheduled.is_set():
+            self._scheduled.set()
+            self._executor.submit(self.run)
+
+    def run(self):
+        self._scheduled.clear()
+        try:
+            while self.reap_batch():
+                pass
+        except Exception:
+            logger.exception("Reaping deleted upload files failed")
+
+    def reap_batch(self):
+        with SessionLocal() as db:
+            pending = db.scalars(select(FileDeletion).order_by(FileDeletion.id).limit(self.batch_size)).all()
+            if not pending:
+                return False
+
+            used = referenced_paths(db, {deletion.path for deletion in pending})
+            cutoff = time.time() - self.grace_seconds
+            for deletion in pending:
+                path = os.path.join(self.upload_dir, deletion.path)
+                if deletion.path in used:
+                    self.kept += 1
+                elif remove_unless_recent(path, cutoff):
+                    for suffix in PRECOMPRESSED_SUFFIXES:
+                        remove_quietly(path + suffix)
+                    self.removed += 1
+                else:
+                    self.deferred += 1
+                db.delete(deletion)
+            db.commit()
+            return len(pending) == self.batch_size
+
+    def stats(self):
+        return {"removed": self.removed, "kept": self.kept, "deferred": self.deferred}
+
+    def shutdown(self):
+        self._executor.shutdown(wait=False, cancel_futures=True)
+
+
+def iter_upload_files(upload_dir: str):
+    for root, _, files in os.walk(upload_dir):
+        for name in files:
+            full_path = os.path.join(root, name)
+            yield os.path.relpath(full_path, upload_dir).replace(os.sep, "/"), full_path
+
+
+def sweep_orphans(upload_dir: str = UPLOAD_DIR, batch_size: int = 500, grace_seconds: int = 3600, dry_run: bool = False):
+    """Reconcile the uploads directory with the image and variant tables.
+
+    Files younger than grace_seconds are left alone so in-flight uploads
+    (written to disk before their row commits) are never touched.
+    """
+    started = time.perf_counter()
+    cutoff = time.time() - grace_seconds
+    report = {"scanned": 0, "orphans": 0, "removed": 0, "bytes": 0, "dry_run": dry_run}
+
+    def flush(batch):
+        with SessionLocal() as db:
+            used = referenced_paths(db, {reference for reference, _, _ in batch})
+        for reference, full_path, size in batch:
+            if reference in used:
+                continue
+            report["orphans"] += 1
+            report["bytes"] += size
+            # Re-checked under the blob lock: an upload may have reused it since the scan
+            if not dry_run and remove_unless_recent(full_path, cutoff):
+                report["removed"] += 1
+
+    batch = []
+    for relative_path, full_path in iter_upload_files(upload_dir):
+        report["scanned"] += 1
+        try:
+            stat_result = os.stat(full_path)
+        except FileNotFoundError:
+            continue
+        if stat_result.st_mtime > cutoff:
+            continue
+
+        # .br/.gz siblings live and die with the file they compress
+        reference = relative_path
+        for suffix in PRECOMPRESSED_SUFFIXES:
+            if reference.endswith(suffix):
+                reference = reference[:-len(suffix)]
+
+        batch.append((reference, full_path, stat_result.st_size))
+        if len(batch) >= batch_size:
+            flush(batch)
+            batch = []
+
+    if batch:
+        flush(batch)
+
+    elapsed = time.perf_counter() - started
+    report["seconds"] = round(elapsed, 3)
+    report["files_per_second"] = round(report["scanned"] / elapsed, 1) if elapsed else None
+    return report
+
+
+async def sweep_periodically(interval: int):
+    while True:
+        await asyncio.sleep(interval)
+        try:
+            report = await run_in_threadpool(
+                sweep_orphans,
+                batch_size=settings.FILE_GC_BATCH_SIZE,
+                grace_seconds=settings.FILE_GC_GRACE_SECONDS,
+            )
+            logger.info("Upload sweep: %s", report)
+        except Exception:
+            logger.exception("Upload sweep failed")
+
+
+file_reaper = FileReaper(UPLOAD_DIR, grace_seconds=settings.FILE_REAP_GRACE_SECONDS)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Remove upload files no database row refers to.")
+    parser.add_argument("--dry-run", action="store_true", help="report orphans without removing them")
+    parser.add_argument("--batch-size", type=int, default=settings.FILE_GC_BATCH_SIZE)
+    parser.add_argument("--grace-seconds", type=int, default=settings.FILE_GC_GRACE_SECONDS)
+    args = parser.parse_args()
+
+    report = sweep_orphans(
+        batch_size=args.batch_size,
+        grace_seconds=args.grace_seconds,
+        dry_run=args.dry_run,
+    )
+    for key, value in report.items():
+        print(f"{key}: {value}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+import asyncio
+import logging
+import os
+from concurrent.futures import ThreadPoolExecutor
+
+from sqlalchemy import select
+
+from app.core.cache import response_cache
+from app.core.config import settings
+from app.core.database import SessionLocal
+from app.models.vehicle import BikeImage, BikeImageVariant
+from app.services.listing import bump_version
+from app.services.storage import UPLOAD_DIR
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # Pillow is optional; listings fall back to originals
+    Image = None
+
+logger = logging.getLogger(__name__)
+
+# name -> bounding box; images are only ever scaled down
+VARIANTS = {
+    "thumb": (320, 320),
+    "card": (640, 480),
+    "full": (1600, 1200),
+}
+
+FORMATS = {
+    "webp": ("WEBP", {"quality": 80, "method": 4}),
+    "jpeg": ("JPEG", {"quality": 82, "optimize": True, "progressive": True}),
+}
+
+
+def render_variants(upload_dir: str, filename: str):
+    """Writes every variant of one upload next to it; returns their metadata."""
+    extension = settings.IMAGE_VARIANT_FORMAT
+    pil_format, save_options = FORMATS[extension]
+    stem = os.path.splitext(filename)[0]
+    rendered = []
+
+    with Image.open(os.path.join(upload_dir, filename)) as source:
+        source = ImageOps.exif_transpose(source).convert("RGB")
+        for name, size in VARIANTS.items():
+            image = source.copy()
+            image.thumbnail(size, Image.LANCZOS)
+            variant_name = f"{stem}_{name}.{extension}"
+            image.save(os.path.join(upload_dir, variant_name), pil_format, **save_options)
+            rendered.append({
+                "variant": name,
+                "image_url": variant_name,
+                "width": image.width,
+                "height": image.height,
+            })
+
+    return rendered
+
+
+class ImagePipeline:
+    """Renders variants on a worker pool after the upload request has returned.
+
+    Pillow releases the GIL while decoding, resizing and encoding, so a
+    thread pool spreads the work across cores without process overhead.
+    """
+
+    def __init__(self, upload_dir: str, workers: int):
+        self.upload_dir = upload_dir
+        self.workers = workers
+        self.processed = 0
+        self.failed = 0
+        self._executor = None
+        self._loop = None
+
+    @property
+    def enabled(self):
+        return Image is not None and self.workers > 0
+
+    def submit(self, bike_id: int, images):
+        """images: [(image_id, filename), ...] already committed to bike_images.
+
+        Called from the event loop; workers hand cache invalidation back to it.
+        """
+        if not self.enabled:
+            return
+        self._loop = asyncio.get_running_loop()
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="images")
+        for image_id, filename in images:
+            self._executor.submit(self.process, bike_id, image_id, filename)
+
+    def process(self, bike_id: int, image_id: int, filename: str):
+        try:
+            with SessionLocal() as db:
+                image = db.get(BikeImage, image_id)
+                if image is None:
+                    return  # deleted before we got to it
+
+                # Identical blobs share variants; copy the rows instead of re-rendering
+                rendered = [
+                    {
+                        "variant": variant.variant,
+                        "image_url": variant.image_url,
+                        "width": variant.width,
+                        "height": variant.height,
+                    }
+                    for variant in self.existing_variants(db, image)
+                ]
+
+            # Render without holding a pooled connection
+            if not rendered:
+                rendered = render_variants(self.upload_dir, filename)
+
+            with SessionLocal() as db:
+                if db.get(BikeImage, image_id) is None:
+                    return
+                db.add_all(BikeImageVariant(image_id=image_id, **variant) for variant in rendered)
+                # Listings switch to the variant URLs, so cached copies are stale
+                db.execute(bump_version(bike_id))
+                db.commit()
+        except Exception:
+            self.failed += 1
+            logger.exception("Rendering variants for %s failed", filename)
+            return
+
+        self.processed += 1
+        invalidation = response_cache.invalidate_vehicle(bike_id)
+        try:
+            asyncio.run_coroutine_threadsafe(invalidation, self._loop)
+        except RuntimeError:
+            # The app has shut down; its cache went with it
+            invalidation.close()
+
+    @staticmethod
+    def existing_variants(db, image: BikeImage):
+        if not image.content_hash:
+            return []
+        source_id = db.scalar(
+            select(BikeImageVariant.image_id)
+            .join(BikeImage, BikeImage.id == BikeImageVariant.image_id)
+            .where(BikeImage.content_hash == image.content_hash, BikeImage.id != image.id)
+            .limit(1)
+        )
+        if source_id is None:
+            return []
+        return db.scalars(select(BikeImageVariant).where(BikeImageVariant.image_id == source_id)).all()
+
+    def stats(self):
+        return {
+            "enabled": self.enabled,
+            "workers": self.workers,
+            "processed": self.processed,
+            "failed": self.failed,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+image_pipeline = ImagePipeline(UPLOAD_DIR, settings.IMAGE_WORKERS)
@@ -0,0 +1,210 @@
+from datetime import datetime
+
+from fastapi import HTTPException
+from sqlalchemy import false, func, literal, select, true, union_all, update
+from sqlalchemy.orm import load_only, selectinload
+
+from app.models.archive import ArchivedVehicle
+from app.models.vehicle import Vehicle
+from app.services.pagination import SORT_ORDERS
+
+# Vehicle columns a response may include
+COLUMN_FIELDS = (
+    "title", "brand", "model", "price", "year", "km_driven", "fuel_type", "location",
+    "description", "owner_id", "owner_type", "engine_cc", "mileage", "color",
+    "insurance_valid", "registration_number", "is_negotiable", "is_sold", "sold_at",
+)
+DETAIL_FIELDS = ("image_variants", "owner")
+
+# Grid cards skip description (a TEXT column) and the seller-only details
+VIEWS = {
+    "summary": (
+        "id", "title", "brand", "model", "price", "year", "km_driven",
+        "fuel_type", "location", "owner_id", "images",
+    ),
+    "full": ("id", *COLUMN_FIELDS, "images"),
+}
+
+
+def image_url(url: str, base_url: str):
+    if url and (url.startswith("http://") or url.startswith("https://")):
+        return url
+    return f"{base_url}/static/uploads/vehicles/{url}"
+
+
+def resolve_fields(view: str = "summary", fields: str = None, detail: bool = False):
+    """Fields to return: an explicit ?fields= list, else the view's defaults."""
+    allowed = {"id", *COLUMN_FIELDS, "images", *(DETAIL_FIELDS if detail else ())}
+    if not fields:
+        selected = VIEWS[view] + (DETAIL_FIELDS if detail and view == "full" else ())
+        return tuple(selected)
+
+    requested = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = sorted(set(requested) - allowed)
+    if unknown:
+        raise HTTPException(
+            status_code=400,
+            detail=f"Unknown fields: {', '.join(unknown)}. Allowed: {', '.join(sorted(allowed))}",
+        )
+    return tuple(dict.fromkeys(["id", *requested]))
+
+
+def active(model=Vehicle):
+    """Unsold listings; the default scope of every public listing query.
+
+    Matches the predicate of the partial listing indexes (migration 3).
+    """
+    return model.is_sold == false()
+
+
+def sold(model=Vehicle):
+    """Matches the predicate of the partial ix_vehicles_sold_id index."""
+    return model.is_sold == true()
+
+
+async def active_count(db):
+    """Exact number of unsold listings.
+
+    Counted as every row minus the sold slice: both are index-only, while
+    counting is_sold = FALSE reads the table. is_sold is never NULL
+    (migration 5 backfills it), so the two agree.
+    """
+    every = select(func.count()).select_from(Vehicle).scalar_subquery()
+    sold_count = select(func.count()).select_from(Vehicle).where(sold()).scalar_subquery()
+    return await db.scalar(select(every - sold_count))
+
+
+def listing_options(fields=VIEWS["summary"], extra_columns=(), model=Vehicle):
+    """load_only the selected columns, and eager-load only the relationships they need.
+
+    model is Vehicle or ArchivedVehicle; both share the listing columns.
+    """
+    columns = {name for name in fields if name in COLUMN_FIELDS} | set(extra_columns)
+    options = []
+    if "images" in fields or "image_variants" in fields:
+        # One extra SELECT ... WHERE bike_id IN (...) per page instead of one per row
+        image = model.images.property.mapper.class_
+        options.append(selectinload(model.images).selectinload(image.variants))
+    if "owner" in fields:
+        # selectinload needs the foreign key loaded, or it fetches it row by row
+        columns.add("owner_id")
+        options.append(selectinload(model.owner))
+    # version feeds the ETag, so it is loaded whatever the projection
+    options.insert(0, load_only(model.id, model.version, *(getattr(model, name) for name in sorted(columns))))
+    return options
+
+
+async def owner_listings(db, owner_id: int, base_url: str, fields, include_archived: bool = False):
+    """An owner's listings, sold ones included; archived ones too when asked for."""
+    models = (Vehicle, ArchivedVehicle) if include_archived else (Vehicle,)
+    vehicles = []
+    for model in models:
+        vehicles.extend((await db.scalars(
+            select(model)
+            .options(*listing_options(fields, model=model))
+            .where(model.owner_id == owner_id)
+        )).all())
+    return serialize_vehicles(vehicles, base_url, fields)
+
+
+def history_source(brand=None, min_price=None, max_price=None, search=None):
+    """Live and archived listings matching the filters, as one UNION ALL subquery.
+
+    Carries only what paging needs (id, version, sort columns, archived);
+    search is a substring match, as the archive has no full-text index.
+    """
+    parts = []
+    for model in (Vehicle, ArchivedVehicle):
+        query = select(
+            model.id, model.version, model.price, model.year,
+            literal(model is ArchivedVehicle).label("archived"),
+        )
+        if brand:
+            query = query.where(model.brand.ilike(f"%{brand}%"))
+        if min_price is not None:
+            query = query.where(model.price >= min_price)
+        if max_price is not None:
+            query = query.where(model.price <= max_price)
+        if search:
+            pattern = f"%{search}%"
+            query = query.where(model.model.ilike(pattern) | model.title.ilike(pattern))
+        parts.append(query)
+    return union_all(*parts).subquery("history")
+
+
+def history_order(history, sort: str):
+    column, descending = SORT_ORDERS[sort]
+    column = history.c[column.key]
+    tiebreak = history.c.id.desc() if descending else history.c.id.asc()
+    if column is history.c.id:
+        return [tiebreak]
+    return [(column.desc() if descending else column.asc()).nulls_last(), tiebreak]
+
+
+async def load_listed(db, rows, fields):
+    """Load (id, archived) rows from whichever table holds them, keeping their order."""
+    wanted = {Vehicle: [], ArchivedVehicle: []}
+    for row in rows:
+        wanted[ArchivedVehicle if row.archived else Vehicle].append(row.id)
+
+    loaded = {}
+    for model, ids in wanted.items():
+        if ids:
+            for vehicle in await db.scalars(select(model).options(*listing_options(fields, model=model)).where(model.id.in_(ids))):
+                loaded[model, vehicle.id] = vehicle
+    # A row archived between the two queries is skipped rather than failing the page
+    return [
+        loaded[key] for key in ((ArchivedVehicle if row.archived else Vehicle, row.id) for row in rows)
+        if key in loaded
+    ]
+
+
+def bump_version(*vehicle_ids: int):
+    """UPDATE marking vehicles changed; execute it in the transaction that changes them."""
+    return (
+        update(Vehicle)
+        .where(Vehicle.id.in_(vehicle_ids))
+        .values(version=Vehicle.version + 1, updated_at=datetime.utcnow())
+        .execution_options(synchronize_session=False)
+    )
+
+
+def serialize_vehicle(vehicle: Vehicle, base_url: str, fields=VIEWS["summary"], variant: str = "card"):
+    # Until the pipeline has rendered a variant, variant_url() returns the original
+    data = {"id": vehicle.id}
+    for name in fields:
+        if name in COLUMN_FIELDS:
+            data[name] = getattr(vehicle, name)
+    # Payloads are cached, and the Redis cache backend stores JSON
+    if data.get("sold_at") is not None:
+        data["sold_at"] = data["sold_at"].isoformat()
+    if isinstance(vehicle, ArchivedVehicle):
+        data["archived"] = True
+
+    if "images" in fields:
+        data["images"] = [image_url(img.variant_url(variant), base_url) for img in vehicle.images]
+
+    if "image_variants" in fields:
+        data["image_variants"] = [
+            {
+                "original": image_url(img.image_url, base_url),
+                "thumb": image_url(img.variant_url("thumb"), base_url),
+                "card": image_url(img.variant_url("card"), base_url),
+                "full": image_url(img.variant_url("full"), base_url),
+            }
+            for img in vehicle.images
+        ]
+
+    if "owner" in fields:
+        owner = vehicle.owner
+        data["owner"] = {
+            "name": owner.name if owner else None,
+            "email": owner.email if owner else None,
+            "phone": owner.phone if owner else None
+        }
+
+    return data
+
+
+def serialize_vehicles(vehicles, base_url: str, fields=VIEWS["summary"]):
+    return [serialize_vehicle(v, base_url, fields) for v in vehicles]
@@ -0,0 +1,111 @@
+import base64
+import json
+import math
+
+from fastapi import HTTPException
+from sqlalchemy import and_, func, or_, select
+
+from app.models.vehicle import Vehicle
+
+# sort name -> (column, descending)
+SORT_ORDERS = {
+    "newest": (Vehicle.id, True),
+    "price_asc": (Vehicle.price, False),
+    "price_desc": (Vehicle.price, True),
+    "year": (Vehicle.year, True),
+}
+
+
+def order_by_clause(sort: str):
+    column, descending = SORT_ORDERS[sort]
+    if column is Vehicle.id:
+        return [Vehicle.id.desc() if descending else Vehicle.id.asc()]
+
+    # NULLs always go last so the keyset predicate below stays a single range
+    primary = column.desc() if descending else column.asc()
+    tiebreak = Vehicle.id.desc() if descending else Vehicle.id.asc()
+    return [primary.nulls_last(), tiebreak]
+
+
+def encode_cursor(sort: str, vehicle: Vehicle):
+    column, _ = SORT_ORDERS[sort]
+    payload = [sort, getattr(vehicle, column.key), vehicle.id]
+    raw = json.dumps(payload, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def is_integer(value):
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+def valid_sort_value(column, value):
+    if value is None:
+        return column.nullable
+    if column.type.python_type is float:
+        return (is_integer(value) or isinstance(value, float)) and math.isfinite(value)
+    return is_integer(value)
+
+
+def decode_cursor(cursor: str, sort: str):
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        cursor_sort, value, last_id = json.loads(raw)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    if cursor_sort != sort:
+        raise HTTPException(status_code=400, detail="Cursor does not match sort order")
+
+    # The payload is client-supplied; only values we could have encoded reach SQL
+    column, _ = SORT_ORDERS[sort]
+    if not is_integer(last_id) or not valid_sort_value(column, value):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+    return value, last_id
+
+
+def keyset_filter(sort: str, value, last_id: int):
+    column, descending = SORT_ORDERS[sort]
+    after_id = Vehicle.id < last_id if descending else Vehicle.id > last_id
+
+    if column is Vehicle.id:
+        return after_id
+
+    if value is None:
+        return and_(column.is_(None), after_id)
+
+    after_value = column < value if descending else column > value
+    return or_(after_value, and_(column == value, after_id), column.is_(None))
+
+
+async def estimate_count(db, statement):
+    """Row estimate from the Postgres planner, exact count elsewhere."""
+    bind = db.get_bind()
+    if bind.dialect.name != "postgresql":
+        return await exact_count(db, statement)
+
+    compiled = statement.order_by(None).compile(bind)
+    if compiled.positional:
+        params = tuple(compiled.params[name] for name in compiled.positiontup)
+    else:
+        params = compiled.params
+
+    conn = await db.connection()
+    result = await conn.exec_driver_sql(f"EXPLAIN (FORMAT JSON) {compiled}", params)
+    plan = result.scalar()
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+async def exact_count(db, statement):
+    count_statement = select(func.count()).select_from(statement.order_by(None).subquery())
+    return (await db.execute(count_statement)).scalar_one()
+
+
+async def count_vehicles(db, statement, mode: str):
+    if mode == "exact":
+        return await exact_count(db, statement)
+    if mode == "estimate":
+        return await estimate_count(db, statement)
+    return None
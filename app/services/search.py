@@ -0,0 +1,161 @@
+import re
+
+from sqlalchemy import column, func, literal_column, or_, select, table, text
+
+from app.core.config import settings
+from app.core.database import engine
+from app.models.vehicle import Vehicle
+
+
+class LikeSearchBackend:
+    """Unindexed ILIKE matching; used for dialects without a dedicated backend."""
+
+    name = "like"
+
+    def setup(self, engine):
+        pass
+
+    def reindex(self, engine):
+        pass
+
+    def search(self, query, term: str):
+        pattern = f"%{term}%"
+        query = query.filter(Vehicle.model.ilike(pattern) | Vehicle.title.ilike(pattern))
+        return query, Vehicle.id
+
+    def filter_brand(self, query, brand: str):
+        return query.filter(Vehicle.brand.ilike(f"%{brand}%"))
+
+    async def index_vehicle(self, db, vehicle: Vehicle):
+        pass
+
+    async def index_vehicles(self, db, vehicles):
+        pass
+
+    async def remove_vehicle(self, db, vehicle_id: int):
+        pass
+
+    def remove_vehicles(self, conn, vehicle_ids):
+        """Synchronous removal, for maintenance jobs running outside a request."""
+        pass
+
+
+class PostgresSearchBackend(LikeSearchBackend):
+    """tsvector + GIN for full-text matches, pg_trgm GIN for substrings and typos.
+
+    The column and indexes come from migration 6. The tsvector is a generated
+    column, so Postgres keeps it current on every write and the index hooks
+    have nothing to do.
+    """
+
+    name = "postgres"
+
+    def search(self, query, term: str):
+        vector = literal_column("vehicles.search_vector")
+        tsquery = func.websearch_to_tsquery("simple", term)
+        pattern = f"%{term}%"
+
+        # Every branch is served by one of the GIN indexes of migration 6 (BitmapOr)
+        query = query.filter(
+            or_(
+                vector.op("@@")(tsquery),
+                Vehicle.title.ilike(pattern),
+                Vehicle.model.ilike(pattern),
+                Vehicle.title.op("%")(term),
+                Vehicle.model.op("%")(term),
+            )
+        )
+        rank = func.ts_rank(vector, tsquery) + func.greatest(
+            func.similarity(Vehicle.title, term),
+            func.similarity(Vehicle.model, term),
+        )
+        return query, rank
+
+
+class SqliteSearchBackend(LikeSearchBackend):
+    """FTS5 external index for local development and tests."""
+
+    name = "sqlite"
+
+    fts = table("vehicles_fts", column("rowid"), column("rank"))
+
+    BACKFILL = (
+        "INSERT INTO vehicles_fts (rowid, title, brand, model) "
+        "SELECT id, coalesce(title, ''), coalesce(brand, ''), coalesce(model, '') FROM vehicles"
+    )
+
+    def setup(self, engine):
+        with engine.begin() as conn:
+            conn.execute(text(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS vehicles_fts "
+                "USING fts5(title, brand, model, tokenize='unicode61 remove_diacritics 2', prefix='2 3')"
+            ))
+            if not conn.execute(text("SELECT count(*) FROM vehicles_fts")).scalar():
+                conn.execute(text(self.BACKFILL))
+
+    def reindex(self, engine):
+        """Rebuild the index after writes that bypassed the hooks (seeding, bulk loads)."""
+        with engine.begin() as conn:
+            conn.execute(text("DELETE FROM vehicles_fts"))
+            conn.execute(text(self.BACKFILL))
+
+    @staticmethod
+    def match_expression(term: str):
+        tokens = re.findall(r"\w+", term)
+        return " ".join(f'"{token}"*' for token in tokens)
+
+    def search(self, query, term: str):
+        expression = self.match_expression(term)
+        if not expression:
+            return super().search(query, term)
+
+        matches = (
+            select(self.fts.c.rowid, self.fts.c.rank)
+            .where(text("vehicles_fts MATCH :expression").bindparams(expression=expression))
+            .subquery()
+        )
+        query = query.join(matches, matches.c.rowid == Vehicle.id)
+        # bm25 rank is lower-is-better
+        return query, -matches.c.rank
+
+    async def index_vehicle(self, db, vehicle: Vehicle):
+        await self.index_vehicles(db, [vehicle])
+
+    async def index_vehicles(self, db, vehicles):
+        await db.execute(
+            text(
+                "INSERT OR REPLACE INTO vehicles_fts (rowid, title, brand, model) "
+                "VALUES (:id, :title, :brand, :model)"
+            ),
+            [
+                {
+                    "id": vehicle.id,
+                    "title": vehicle.title or "",
+                    "brand": vehicle.brand or "",
+                    "model": vehicle.model or "",
+                }
+                for vehicle in vehicles
+            ],
+        )
+
+    async def remove_vehicle(self, db, vehicle_id: int):
+        await db.execute(text("DELETE FROM vehicles_fts WHERE rowid = :id"), {"id": vehicle_id})
+
+    def remove_vehicles(self, conn, vehicle_ids):
+        conn.execute(text("DELETE FROM vehicles_fts WHERE rowid = :id"), [{"id": id_} for id_ in vehicle_ids])
+
+
+BACKENDS = {
+    backend.name: backend
+    for backend in (LikeSearchBackend, PostgresSearchBackend, SqliteSearchBackend)
+}
+
+
+def get_search_backend(dialect_name: str):
+    name = settings.SEARCH_BACKEND
+    if name == "auto":
+        name = {"postgresql": "postgres", "sqlite": "sqlite"}.get(dialect_name, "like")
+    return BACKENDS[name]()
+
+
+search_backend = get_search_backend(engine.dialect.name)
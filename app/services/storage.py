@@ -0,0 +1,198 @@
+import asyncio
+import hashlib
+import os
+import threading
+import uuid
+from typing import NamedTuple, Optional
+
+import anyio
+from fastapi import HTTPException, UploadFile
+from sqlalchemy import select, union
+
+from app.core.config import settings
+from app.models.archive import ArchivedBikeImage
+from app.models.vehicle import BikeImage
+
+UPLOAD_DIR = "app/static/uploads/vehicles"
+
+# Serializes dedup hits against reaping, so a blob is never removed between
+# an upload finding it on disk and that upload's row committing
+blob_lock = threading.Lock()
+
+# (offset, magic bytes) -> image type; WEBP is "RIFF....WEBP"
+IMAGE_SIGNATURES = [
+    (0, b"\xff\xd8\xff", "jpeg"),
+    (0, b"\x89PNG\r\n\x1a\n", "png"),
+    (0, b"GIF87a", "gif"),
+    (0, b"GIF89a", "gif"),
+    (8, b"WEBP", "webp"),
+]
+
+SNIFF_BYTES = 16
+
+
+def sniff_image_type(head: bytes):
+    for offset, magic, kind in IMAGE_SIGNATURES:
+        if head[offset:offset + len(magic)] == magic:
+            if kind == "webp" and not head.startswith(b"RIFF"):
+                continue
+            return kind
+    return None
+
+
+class UploadBudget:
+    """Bytes still allowed for one request, shared by its concurrent file writers."""
+
+    def __init__(self, limit: int):
+        self.remaining = limit
+
+    def consume(self, size: int):
+        self.remaining -= size
+        if self.remaining < 0:
+            raise HTTPException(
+                status_code=413,
+                detail=f"Upload exceeds {settings.MAX_UPLOAD_REQUEST_BYTES} bytes per request",
+            )
+
+
+class StoredBlob(NamedTuple):
+    image_url: str  # path relative to UPLOAD_DIR
+    digest: str
+    kind: str
+    size: int
+    # mtime this call left on the blob it wrote; None when an identical blob was
+    # already stored. A later mtime means another upload has reused the file.
+    stored_at: Optional[float]
+
+
+def blob_path(digest: str, kind: str):
+    extension = "jpg" if kind == "jpeg" else kind
+    return f"{digest[:2]}/{digest}.{extension}"
+
+
+def commit_blob(tmp_path: str, image_url: str):
+    """Move the upload into place; returns the new blob's mtime, or None on a dedup hit."""
+    path = os.path.join(UPLOAD_DIR, image_url)
+    with blob_lock:
+        try:
+            # A fresh mtime keeps the reaper and sweeper off a blob that is in use again
+            os.utime(path)
+        except FileNotFoundError:
+            os.makedirs(os.path.dirname(path), exist_ok=True)
+            os.replace(tmp_path, path)
+            return os.stat(path).st_mtime
+    os.remove(tmp_path)
+    return None
+
+
+async def save_upload(file: UploadFile, budget: UploadBudget):
+    """Stream one upload to disk, hashing as we go, and store it under its digest."""
+    head = await file.read(SNIFF_BYTES)
+    kind = sniff_image_type(head)
+    if kind is None:
+        raise HTTPException(status_code=415, detail=f"{file.filename} is not a supported image")
+
+    # Unique temp name so concurrent uploads never share a partial file
+    tmp_path = os.path.join(UPLOAD_DIR, f".{uuid.uuid4().hex}.part")
+    digest = hashlib.sha256()
+    size = 0
+    try:
+        async with await anyio.open_file(tmp_path, "wb") as out:
+            chunk = head
+            while chunk:
+                size += len(chunk)
+                if size > settings.MAX_UPLOAD_FILE_BYTES:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"{file.filename} exceeds {settings.MAX_UPLOAD_FILE_BYTES} bytes",
+                    )
+                budget.consume(len(chunk))
+                digest.update(chunk)
+                await out.write(chunk)
+                chunk = await file.read(settings.UPLOAD_CHUNK_BYTES)
+
+        hexdigest = digest.hexdigest()
+        image_url = blob_path(hexdigest, kind)
+        stored_at = await anyio.to_thread.run_sync(commit_blob, tmp_path, image_url)
+    except BaseException:
+        await anyio.to_thread.run_sync(remove_quietly, tmp_path)
+        raise
+
+    return StoredBlob(image_url, hexdigest, kind, size, stored_at)
+
+
+async def save_uploads(files):
+    """Store uploads in parallel; on any failure remove the blobs this call created.
+
+    A concurrent upload may already have deduplicated onto one of them, so a
+    blob whose mtime moved since we wrote it is kept for the sweeper.
+    """
+    budget = UploadBudget(settings.MAX_UPLOAD_REQUEST_BYTES)
+    results = await asyncio.gather(
+        *(save_upload(file, budget) for file in files),
+        return_exceptions=True,
+    )
+
+    errors = [result for result in results if isinstance(result, BaseException)]
+    if errors:
+        created = [
+            (os.path.join(UPLOAD_DIR, result.image_url), result.stored_at)
+            for result in results
+            if isinstance(result, StoredBlob) and result.stored_at is not None
+        ]
+        await anyio.to_thread.run_sync(remove_untouched, created)
+        raise errors[0]
+
+    return results
+
+
+async def unreferenced_files(db, images):
+    """Files of the given (already deleted, flushed) images that no other row still uses.
+
+    Blobs are shared between listings through identical digests, so a file
+    is only garbage once no bike_images row, live or archived, points at it
+    any more.
+    """
+    local = [img for img in images if not img.image_url.startswith(("http://", "https://"))]
+    if not local:
+        return []
+
+    paths = {img.image_url for img in local}
+    still_used = set(await db.scalars(
+        union(
+            select(BikeImage.image_url).where(BikeImage.image_url.in_(paths)),
+            select(ArchivedBikeImage.image_url).where(ArchivedBikeImage.image_url.in_(paths)),
+        )
+    ))
+
+    filenames = set()
+    for img in local:
+        if img.image_url not in still_used:
+            filenames.add(img.image_url)
+            filenames.update(variant.image_url for variant in img.variants)
+    return sorted(filenames)
+
+
+def remove_quietly(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+
+
+def remove_unless_recent(path: str, cutoff: float):
+    """Remove path unless it was written or deduplicated after cutoff; True once it is gone."""
+    with blob_lock:
+        try:
+            if os.stat(path).st_mtime > cutoff:
+                return False
+        except FileNotFoundError:
+            return True
+        remove_quietly(path)
+    return True
+
+
+def remove_untouched(blobs):
+    """blobs: [(path, mtime), ...]; removes each one still carrying that mtime."""
+    for path, mtime in blobs:
+        remove_unless_recent(path, mtime)
@@ -1,3 +1,11 @@
+import asyncio
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+from fastapi import HTTPException
+from starlette.concurrency import run_in_threadpool
+
+from app.core.config import settings
 from app.core.security import pwd_context
 
 
@@ -7,3 +15,88 @@ def hash_password(password: str):
 
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
+
+
+def verify_and_update(plain_password, hashed_password):
+    """Returns (valid, new_hash); new_hash is set when the stored cost is outdated."""
+    return pwd_context.verify_and_update(plain_password, hashed_password)
+
+
+class HashingPool:
+    """Runs bcrypt in worker processes with a cap on in-flight and queued jobs.
+
+    Callers beyond max_concurrency wait; callers beyond queue_limit get a
+    503 straight away instead of piling up behind the CPU.
+    """
+
+    def __init__(self, workers: int, max_concurrency: int, queue_limit: int):
+        self.workers = workers
+        self.max_concurrency = max_concurrency
+        self.queue_limit = queue_limit
+        self.pending = 0
+        self.rejected = 0
+        self._executor = None
+        self._semaphore = None
+
+    @property
+    def saturated(self):
+        return self.pending >= self.max_concurrency + self.queue_limit
+
+    def _get_executor(self):
+        if self._executor is None and self.workers > 0:
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    async def run(self, fn, *args):
+        if self.saturated:
+            self.rejected += 1
+            raise HTTPException(
+                status_code=503,
+                detail="Authentication is busy, try again shortly",
+                headers={"Retry-After": "1"},
+            )
+
+        if self._semaphore is None:
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+        self.pending += 1
+        try:
+            async with self._semaphore:
+                executor = self._get_executor()
+                if executor is None:
+                    return await run_in_threadpool(fn, *args)
+                return await asyncio.get_running_loop().run_in_executor(executor, fn, *args)
+        finally:
+            self.pending -= 1
+
+    def stats(self):
+        return {
+            "workers": self.workers,
+            "max_concurrency": self.max_concurrency,
+            "queue_limit": self.queue_limit,
+            "pending": self.pending,
+            "rejected": self.rejected,
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+
+hashing_pool = HashingPool(
+    workers=settings.HASH_WORKERS,
+    max_concurrency=settings.HASH_MAX_CONCURRENCY,
+    queue_limit=settings.HASH_QUEUE_LIMIT,
+)
+
+
+async def hash_password_async(password: str):
+    return await hashing_pool.run(hash_password, password)
+
+
+async def verify_and_update_async(plain_password, hashed_password):
+    return await hashing_pool.run(verify_and_update, plain_password, hashed_password)
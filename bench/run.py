@@ -0,0 +1,300 @@
+"""
+Endpoint benchmarks against a generated SQLite catalogue.
+
+    python -m bench.run                      # run and compare with bench/baseline.json
+    python -m bench.run --update-baseline    # record a new baseline on this machine
+    python -m bench.run --only detail,list_search --requests 500
+
+The app runs in-process behind httpx's ASGI transport, so numbers measure the
+application and database, not the network. Exits 1 when a scenario fails
+requests or regresses past the tolerances, 2 when the baseline was recorded
+with different settings.
+"""
+
+import argparse
+import asyncio
+import io
+import json
+import os
+import random
+import shutil
+import sqlite3
+import subprocess
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+DATA_DIR = os.path.join(ROOT, "bench", ".data")
+BASELINE_PATH = os.path.join(ROOT, "bench", "baseline.json")
+
+# A scenario regresses when its p50 or p95 exceeds baseline * (1 + tolerance)
+# plus the floor (absorbs timer noise on sub-millisecond endpoints), or when it
+# issues more queries per request than the baseline did
+LATENCY_TOLERANCE = 0.25
+LATENCY_FLOOR_MS = 2.0
+QUERY_TOLERANCE = 0.5
+
+BRANDS = ["honda", "hero", "bajaj", "royal enfield", "ktm", "yamaha"]
+SEARCH_TERMS = ["classic", "pulsar", "duke", "activa", "splendor", "r15"]
+SORTS = ["newest", "price_asc", "price_desc", "year"]
+PRICE_RANGES = [(None, 75000), (50000, 150000), (100000, 300000), (200000, None)]
+
+DEMO_EMAIL = "john@example.com"
+DEMO_PASSWORD = "password123"
+
+
+def params(**values):
+    return {"params": {key: value for key, value in values.items() if value is not None}}
+
+
+def price_sorted(rng, ctx):
+    low, high = rng.choice(PRICE_RANGES)
+    return "GET", "/vehicles/", params(min_price=low, max_price=high, sort=rng.choice(SORTS))
+
+
+def upload(rng, ctx):
+    payload = rng.choice(ctx["images"])
+    files = [("files", ("bench.jpg", payload, "image/jpeg"))]
+    return "POST", f"/vehicles/{ctx['own_vehicle']}/upload-images", {"files": files, "headers": ctx["auth"]}
+
+
+# name -> (request factory, share of --requests it runs)
+SCENARIOS = {
+    "list_default": (lambda rng, ctx: ("GET", "/vehicles/", {}), 1),
+    "list_brand": (lambda rng, ctx: ("GET", "/vehicles/", params(brand=rng.choice(BRANDS))), 1),
+    "list_price_sorted": (price_sorted, 1),
+    "list_search": (lambda rng, ctx: ("GET", "/vehicles/", params(search=rng.choice(SEARCH_TERMS))), 1),
+    "list_cursor": (lambda rng, ctx: ("GET", "/vehicles/", params(cursor="", sort=rng.choice(SORTS))), 1),
+    "list_deep_page": (lambda rng, ctx: ("GET", "/vehicles/", params(page=rng.randint(20, 200))), 1),
+    "facets": (lambda rng, ctx: ("GET", "/vehicles/facets", params(brand=rng.choice(BRANDS + [None]))), 1),
+    "detail": (lambda rng, ctx: ("GET", f"/vehicles/{rng.randint(1, ctx['max_id'])}", {}), 1),
+    "me": (lambda rng, ctx: ("GET", "/auth/me", {"headers": ctx["auth"]}), 1),
+    # bcrypt and disk writes dominate these; fewer requests keep runs short
+    "login": (lambda rng, ctx: ("POST", "/auth/login", {"json": {"email": DEMO_EMAIL, "password": DEMO_PASSWORD}}), 0.1),
+    "upload": (upload, 0.25),
+}
+
+
+def percentile(sorted_values, pct):
+    if not sorted_values:
+        return 0.0
+    index = max(0, min(len(sorted_values) - 1, round(pct / 100 * len(sorted_values) + 0.5) - 1))
+    return sorted_values[index]
+
+
+def prepare_database(args):
+    """Seed a template database once per size/seed, then copy it so every run starts identical."""
+    os.makedirs(DATA_DIR, exist_ok=True)
+    template = os.path.join(DATA_DIR, f"catalogue-{args.users}-{args.vehicles}-{args.seed}.db")
+    if not os.path.exists(template):
+        print(f"Generating {args.vehicles} vehicles / {args.users} users (one-off)...")
+        subprocess.run(
+            [sys.executable, "seed_data.py", "--users", str(args.users), "--vehicles", str(args.vehicles), "--seed", str(args.seed)],
+            cwd=ROOT,
+            env={**os.environ, "DATABASE_URL": f"sqlite:///{template}"},
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+
+    workdir = os.path.join(DATA_DIR, "run")
+    shutil.rmtree(workdir, ignore_errors=True)
+    os.makedirs(workdir)
+    database = os.path.join(workdir, "bench.db")
+    shutil.copyfile(template, database)
+    with sqlite3.connect(database) as conn:
+        max_id = conn.execute("SELECT max(id) FROM vehicles").fetchone()[0]
+    return workdir, database, max_id
+
+
+def sample_images(count: int, rng):
+    try:
+        from PIL import Image
+    except ImportError:
+        return [b"\xff\xd8\xff\xe0" + rng.randbytes(64 * 1024) for _ in range(count)]
+
+    images = []
+    for _ in range(count):
+        buffer = io.BytesIO()
+        color = tuple(rng.randrange(256) for _ in range(3))
+        Image.new("RGB", (1600, 1200), color).save(buffer, "JPEG", quality=85)
+        images.append(buffer.getvalue())
+    return images
+
+
+async def run_scenario(client, factory, count, concurrency, ctx, rng, queries, no_cache):
+    from app.core.cache import response_cache
+
+    planned = iter([factory(rng, ctx) for _ in range(count)])
+    latencies = []
+    errors = 0
+
+    async def worker():
+        nonlocal errors
+        for method, url, kwargs in planned:
+            if no_cache:
+                await response_cache.backend.clear()
+            started = time.perf_counter()
+            response = await client.request(method, url, **kwargs)
+            latencies.append(time.perf_counter() - started)
+            if response.status_code >= 400:
+                errors += 1
+
+    queries["count"] = 0
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    return {
+        "requests": count,
+        "errors": errors,
+        "rps": round(count / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 50) * 1000, 2),
+        "p95_ms": round(percentile(latencies, 95) * 1000, 2),
+        "p99_ms": round(percentile(latencies, 99) * 1000, 2),
+        "queries_per_request": round(queries["count"] / count, 2),
+    }
+
+
+async def run_benchmarks(args, names, max_id):
+    import httpx
+    from sqlalchemy import event
+
+    from app.core.database import async_engine
+    from app.main import app
+
+    queries = {"count": 0}
+
+    @event.listens_for(async_engine.sync_engine, "before_cursor_execute")
+    def count_query(*_):
+        queries["count"] += 1
+
+    rng = random.Random(args.seed)
+    results = {}
+    transport = httpx.ASGITransport(app=app)
+    async with app.router.lifespan_context(app), httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+        login = await client.post("/auth/login", json={"email": DEMO_EMAIL, "password": DEMO_PASSWORD})
+        login.raise_for_status()
+        auth = {"Authorization": f"Bearer {login.json()['token']}"}
+        own = await client.get("/vehicles/my-bikes/", headers=auth)
+        ctx = {
+            "auth": auth,
+            "max_id": max_id,
+            "own_vehicle": own.json()["vehicles"][0]["id"],
+            "images": sample_images(8, rng) if "upload" in names else [],
+        }
+
+        for name in names:
+            factory, share = SCENARIOS[name]
+            count = max(10, int(args.requests * share))
+            for _ in range(args.warmup):
+                method, url, kwargs = factory(rng, ctx)
+                await client.request(method, url, **kwargs)
+            results[name] = await run_scenario(client, factory, count, args.concurrency, ctx, rng, queries, args.no_cache)
+            print_row(name, results[name])
+    return results
+
+
+def print_row(name, result):
+    print(
+        f"{name:<18} {result['requests']:>6} {result['errors']:>6} {result['rps']:>9} "
+        f"{result['p50_ms']:>9} {result['p95_ms']:>9} {result['p99_ms']:>9} {result['queries_per_request']:>8}"
+    )
+
+
+def compare(results, baseline, tolerance):
+    failures = []
+    for name, result in results.items():
+        if result["errors"]:
+            failures.append(f"{name}: {result['errors']} of {result['requests']} requests failed")
+        base = baseline["results"].get(name)
+        if base is None:
+            continue
+        for metric in ("p50_ms", "p95_ms"):
+            limit = base[metric] * (1 + tolerance) + LATENCY_FLOOR_MS
+            if result[metric] > limit:
+                failures.append(f"{name}: {metric} {result[metric]} > {limit:.2f} (baseline {base[metric]})")
+        if result["queries_per_request"] > base["queries_per_request"] + QUERY_TOLERANCE:
+            failures.append(
+                f"{name}: {result['queries_per_request']} queries/request (baseline {base['queries_per_request']})"
+            )
+    return failures
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark API endpoints against a generated catalogue.")
+    parser.add_argument("--users", type=int, default=2000)
+    parser.add_argument("--vehicles", type=int, default=50000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--requests", type=int, default=200, help="requests per scenario (login/upload run a share)")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--warmup", type=int, default=5)
+    parser.add_argument("--no-cache", action="store_true", help="clear the response cache before every request")
+    parser.add_argument("--only", help="comma-separated scenario names")
+    parser.add_argument("--tolerance", type=float, default=LATENCY_TOLERANCE)
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--update-baseline", action="store_true")
+    parser.add_argument("--json", help="also write the results to this file")
+    args = parser.parse_args()
+
+    names = args.only.split(",") if args.only else list(SCENARIOS)
+    unknown = [name for name in names if name not in SCENARIOS]
+    if unknown:
+        parser.error(f"unknown scenarios: {', '.join(unknown)} (have {', '.join(SCENARIOS)})")
+
+    workdir, database, max_id = prepare_database(args)
+    # Must be set before the app (and its settings) are imported
+    os.environ.update({
+        "DATABASE_URL": f"sqlite:///{database}",
+        "FILE_GC_INTERVAL_SECONDS": "0",
+        "FACET_REBUILD_INTERVAL_SECONDS": "0",
+        "ARCHIVE_INTERVAL_SECONDS": "0",
+        # Templates seeded by an older checkout may predate newer migrations
+        "DB_MIGRATE_ON_STARTUP": "true",
+        # Every request comes from one address; measure the endpoints, not the limits
+        "RATE_LIMIT_ENABLED": "false",
+    })
+    sys.path.insert(0, ROOT)
+    # Uploads land under the working directory; keep them out of the checkout
+    os.chdir(workdir)
+
+    config = {
+        key: getattr(args, key)
+        for key in ("users", "vehicles", "seed", "requests", "concurrency", "no_cache")
+    }
+    print(f"{'scenario':<18} {'reqs':>6} {'errors':>6} {'req/s':>9} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'queries':>8}")
+    results = asyncio.run(run_benchmarks(args, names, max_id))
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+
+    if args.update_baseline:
+        with open(args.baseline, "w") as f:
+            json.dump({"config": config, "results": results}, f, indent=2)
+            f.write("\n")
+        print(f"\nBaseline written to {os.path.relpath(args.baseline, ROOT)}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print("\nNo baseline yet; record one with --update-baseline")
+        return 0
+
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    if baseline["config"] != config:
+        print(f"\nBaseline was recorded with {baseline['config']}, this run used {config}")
+        return 2
+
+    failures = compare(results, baseline, args.tolerance)
+    if failures:
+        print("\nREGRESSIONS:")
+        for failure in failures:
+            print(f"  {failure}")
+        return 1
+    print("\nNo regressions against the baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
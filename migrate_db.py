@@ -1,56 +1,51 @@
 """
-Migration script to update column sizes in MySQL
-Run: python migrate_db.py
+Apply pending schema migrations (app/migrations/versions.py), then set up the
+search index and facet table. Run once per deploy, before starting workers.
+Run: python migrate_db.py [--list] [--target VERSION]
 """
 
-from sqlalchemy import text
+import argparse
+
+from sqlalchemy import inspect
+
 from app.core.database import engine
+from app.migrations.runner import schema_migrations
+from app.core.startup import prepare_schema
+from app.migrations.versions import MIGRATIONS, run_migrations
+
+
+def show_status():
+    # Read-only, like the startup schema check: a never-migrated database lists everything pending
+    with engine.connect() as conn:
+        applied = {}
+        if inspect(conn).has_table(schema_migrations.name):
+            applied = {row.version: row.applied_at for row in conn.execute(schema_migrations.select())}
+    for migration in MIGRATIONS:
+        status = f"applied {applied[migration.version]:%Y-%m-%d %H:%M}" if migration.version in applied else "pending"
+        print(f"{migration.version:>4}  {migration.name:<45} {status}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations.")
+    parser.add_argument("--list", action="store_true", help="show applied and pending versions")
+    parser.add_argument("--target", type=int, help="stop after this version")
+    args = parser.parse_args()
+
+    if args.list:
+        show_status()
+        return
+
+    print(f"Running database migrations on {engine.dialect.name}...")
+    # A partial upgrade may predate the tables search and facets rely on
+    applied = run_migrations(engine, args.target) if args.target else prepare_schema(engine)
+    for version in applied:
+        name = next(m.name for m in MIGRATIONS if m.version == version)
+        print(f"✓ {version} {name}")
+    if not applied:
+        print("  Nothing to apply")
+
+    print("\nMigration complete! Now run: python seed_data.py")
+
 
-print("Running database migrations...")
-
-with engine.connect() as conn:
-    # Alter description column to TEXT
-    try:
-        conn.execute(text("ALTER TABLE vehicles MODIFY COLUMN description TEXT"))
-        conn.commit()
-        print("✓ Updated vehicles.description to TEXT")
-    except Exception as e:
-        print(f"  vehicles.description: {e}")
-    
-    # Alter image_url column to VARCHAR(500)
-    try:
-        conn.execute(text("ALTER TABLE bike_images MODIFY COLUMN image_url VARCHAR(500)"))
-        conn.commit()
-        print("✓ Updated bike_images.image_url to VARCHAR(500)")
-    except Exception as e:
-        print(f"  bike_images.image_url: {e}")
-    
-    # Add phone column to users table
-    try:
-        conn.execute(text("ALTER TABLE users ADD COLUMN phone VARCHAR(20)"))
-        conn.commit()
-        print("✓ Added users.phone column")
-    except Exception as e:
-        print(f"  users.phone: {e}")
-    
-    # Add new selling-specific columns to vehicles
-    new_columns = [
-        ("owner_type", "VARCHAR(50) DEFAULT 'first_owner'"),
-        ("engine_cc", "INT"),
-        ("mileage", "FLOAT"),
-        ("color", "VARCHAR(50)"),
-        ("insurance_valid", "VARCHAR(100)"),
-        ("registration_number", "VARCHAR(50)"),
-        ("is_negotiable", "BOOLEAN DEFAULT TRUE"),
-        ("is_sold", "BOOLEAN DEFAULT FALSE"),
-    ]
-    
-    for col_name, col_type in new_columns:
-        try:
-            conn.execute(text(f"ALTER TABLE vehicles ADD COLUMN {col_name} {col_type}"))
-            conn.commit()
-            print(f"✓ Added vehicles.{col_name}")
-        except Exception as e:
-            print(f"  vehicles.{col_name}: {e}")
-
-print("\nMigration complete! Now run: python seed_data.py")
+if __name__ == "__main__":
+    main()
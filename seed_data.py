@@ -1,46 +1,44 @@
 """
-Seed script to populate database with sample users and bikes
-Run: python seed_data.py
-"""
+Seed script: demo accounts and bikes, plus an optional synthetic catalogue
+for load testing.
 
-from app.core.database import SessionLocal, engine, Base
-from app.models.user import User
-from app.models.vehicle import Vehicle, BikeImage
-from app.utils.hashing import hash_password
+Run:
+    python seed_data.py                                     # demo data only
+    python seed_data.py --users 100000 --vehicles 1000000   # add a synthetic catalogue
+    python seed_data.py --reset ...                         # wipe all tables first
 
-# Create tables
-Base.metadata.create_all(bind=engine)
+Generated rows depend only on --seed and their row number, and progress is
+committed with each batch, so re-running an interrupted command resumes it.
+"""
 
-db = SessionLocal()
+import argparse
+import csv
+import io
+import random
+import time
+from datetime import date
+from itertools import accumulate
 
-# Clear existing data (optional)
-db.query(BikeImage).delete()
-db.query(Vehicle).delete()
-db.query(User).delete()
-db.commit()
+from sqlalchemy import Column, Integer, MetaData, String, Table, func, insert, select, text
 
-print("Creating users...")
+from app.core.database import engine
+from app.migrations.versions import run_migrations
+from app.models.archive import ArchivedBikeImage, ArchivedBikeImageVariant, ArchivedVehicle
+from app.models.facet import VehicleFacetCount
+from app.models.file_deletion import FileDeletion
+from app.models.user import User
+from app.models.vehicle import BikeImage, BikeImageVariant, Vehicle
+from app.services.facets import rebuild_facets
+from app.services.search import search_backend
+from app.utils.hashing import hash_password
 
-# Sample Users
-users_data = [
+DEMO_USERS = [
     {"name": "John Doe", "email": "john@example.com", "phone": "+91 9876543210", "password": "password123"},
     {"name": "Jane Smith", "email": "jane@example.com", "phone": "+91 9123456789", "password": "password123"},
     {"name": "Admin User", "email": "admin@bikerent.com", "phone": "+91 9988776655", "password": "admin123"},
 ]
 
-users = []
-for u in users_data:
-    user = User(name=u["name"], email=u["email"], phone=u["phone"], password=hash_password(u["password"]))
-    db.add(user)
-    db.commit()
-    db.refresh(user)
-    users.append(user)
-    print(f"  Created user: {u['email']} / {u['password']}")
-
-print("\nCreating bikes...")
-
-# Sample Bikes
-bikes_data = [
+DEMO_BIKES = [
     {
         "title": "Royal Enfield Classic 350",
         "brand": "Royal Enfield",
@@ -159,33 +157,360 @@ bikes_data = [
     },
 ]
 
-for i, bike_data in enumerate(bikes_data):
-    images = bike_data.pop("images")
-    owner = users[i % len(users)]
-    
-    vehicle = Vehicle(**bike_data, owner_id=owner.id)
-    db.add(vehicle)
-    db.commit()
-    db.refresh(vehicle)
-    
-    # Add images
-    for img_url in images:
-        img = BikeImage(bike_id=vehicle.id, image_url=img_url)
-        db.add(img)
-    
-    db.commit()
-    print(f"  Created bike: {bike_data['title']}")
-
-db.close()
-
-print("\n" + "="*50)
-print("SEED DATA CREATED SUCCESSFULLY!")
-print("="*50)
-print("\n📧 LOGIN CREDENTIALS:")
-print("-"*50)
-print("Email: john@example.com     | Password: password123")
-print("Email: jane@example.com     | Password: password123")
-print("Email: admin@bikerent.com   | Password: admin123")
-print("-"*50)
-print(f"\n🏍️  {len(bikes_data)} bikes added to database")
-print("\nYou can now start the server: uvicorn app.main:app --reload")
+# brand -> (share of listings, [(model, engine cc, new price in INR, fuel type)])
+CATALOGUE = {
+    "Hero": (22, [
+        ("Splendor Plus", 97, 75000, "Petrol"),
+        ("HF Deluxe", 97, 60000, "Petrol"),
+        ("Passion Pro", 113, 80000, "Petrol"),
+        ("Xtreme 160R", 163, 125000, "Petrol"),
+    ]),
+    "Honda": (20, [
+        ("Activa 6G", 110, 78000, "Petrol"),
+        ("Shine", 124, 82000, "Petrol"),
+        ("SP 125", 124, 90000, "Petrol"),
+        ("Unicorn", 162, 110000, "Petrol"),
+        ("CB350", 348, 210000, "Petrol"),
+        ("CBR 650R", 649, 950000, "Petrol"),
+    ]),
+    "Bajaj": (15, [
+        ("Platina 110", 115, 70000, "Petrol"),
+        ("Pulsar 150", 149, 115000, "Petrol"),
+        ("Pulsar NS200", 199, 150000, "Petrol"),
+        ("Avenger 220", 220, 145000, "Petrol"),
+        ("Dominar 400", 373, 230000, "Petrol"),
+        ("Chetak", 0, 130000, "Electric"),
+    ]),
+    "TVS": (13, [
+        ("Jupiter", 110, 76000, "Petrol"),
+        ("Ntorq 125", 124, 90000, "Petrol"),
+        ("Raider 125", 124, 95000, "Petrol"),
+        ("Apache RTR 160", 160, 125000, "Petrol"),
+        ("iQube", 0, 120000, "Electric"),
+    ]),
+    "Royal Enfield": (9, [
+        ("Classic 350", 349, 200000, "Petrol"),
+        ("Bullet 350", 349, 175000, "Petrol"),
+        ("Hunter 350", 349, 160000, "Petrol"),
+        ("Meteor 350", 349, 210000, "Petrol"),
+        ("Himalayan 450", 452, 290000, "Petrol"),
+    ]),
+    "Yamaha": (7, [
+        ("Fascino 125", 125, 85000, "Petrol"),
+        ("FZ-S V3", 149, 125000, "Petrol"),
+        ("MT-15 V2", 155, 170000, "Petrol"),
+        ("R15 V4", 155, 185000, "Petrol"),
+    ]),
+    "Suzuki": (5, [
+        ("Access 125", 124, 85000, "Petrol"),
+        ("Burgman Street", 124, 98000, "Petrol"),
+        ("Gixxer SF 250", 249, 200000, "Petrol"),
+    ]),
+    "KTM": (3, [
+        ("125 Duke", 125, 180000, "Petrol"),
+        ("200 Duke", 199, 200000, "Petrol"),
+        ("390 Duke", 373, 310000, "Petrol"),
+        ("RC 390", 373, 320000, "Petrol"),
+    ]),
+    "Ather": (2, [("450X", 0, 150000, "Electric"), ("Rizta", 0, 120000, "Electric")]),
+    "Ola": (2, [("S1 Pro", 0, 140000, "Electric"), ("S1 Air", 0, 110000, "Electric")]),
+    "Kawasaki": (1, [("Ninja 300", 296, 340000, "Petrol"), ("Z900", 948, 920000, "Petrol")]),
+    "Harley-Davidson": (0.5, [("X440", 440, 240000, "Petrol"), ("Iron 883", 883, 1100000, "Petrol")]),
+    "BMW": (0.5, [("G 310 R", 313, 290000, "Petrol"), ("R 1250 GS", 1254, 2100000, "Petrol")]),
+}
+
+# City, share of listings, state registration prefix
+CITIES = [
+    ("Delhi", 14, "DL"), ("Mumbai", 12, "MH"), ("Bangalore", 12, "KA"), ("Hyderabad", 9, "TS"),
+    ("Chennai", 8, "TN"), ("Pune", 7, "MH"), ("Kolkata", 7, "WB"), ("Ahmedabad", 6, "GJ"),
+    ("Jaipur", 5, "RJ"), ("Lucknow", 4, "UP"), ("Surat", 3, "GJ"), ("Indore", 3, "MP"),
+    ("Chandigarh", 2, "CH"), ("Kochi", 2, "KL"), ("Bhubaneswar", 2, "OD"), ("Guwahati", 2, "AS"),
+    ("Coimbatore", 2, "TN"),
+]
+
+FIRST_NAMES = [
+    "Aarav", "Vivaan", "Aditya", "Arjun", "Rohan", "Ishaan", "Kabir", "Rahul", "Vikram", "Karan",
+    "Ananya", "Diya", "Priya", "Sneha", "Kavya", "Meera", "Neha", "Pooja", "Riya", "Sara",
+]
+LAST_NAMES = [
+    "Sharma", "Verma", "Patel", "Reddy", "Nair", "Iyer", "Gupta", "Singh", "Khan", "Das",
+    "Joshi", "Mehta", "Rao", "Kulkarni", "Chatterjee", "Menon", "Pillai", "Bose", "Shah", "Yadav",
+]
+COLORS = ["Black", "Red", "Blue", "White", "Grey", "Silver", "Matte Black", "Green", "Orange", "Yellow"]
+DESCRIPTIONS = [
+    "Well maintained, all services done at the authorised service centre.",
+    "Single owner, never raced. Minor scratches on the tank.",
+    "New tyres and battery. Papers clear, ready for transfer.",
+    "Garage kept, regularly serviced. Selling because I am relocating.",
+    "Good condition, daily commuter. Insurance recently renewed.",
+    "Accident free, original paint. Test ride available on weekends.",
+]
+IMAGE_POOL = [url for bike in DEMO_BIKES for url in bike["images"]]
+
+BRANDS = list(CATALOGUE)
+BRAND_WEIGHTS = list(accumulate(share for share, _ in CATALOGUE.values()))
+CITY_WEIGHTS = list(accumulate(share for _, share, _ in CITIES))
+CURRENT_YEAR = date.today().year
+
+PHASES = {"users": 1, "vehicles": 2}
+
+seed_progress = Table(
+    "seed_progress",
+    MetaData(),
+    Column("phase", String(20), primary_key=True),
+    Column("seed", Integer, nullable=False),
+    Column("done", Integer, nullable=False),
+)
+
+
+def row_random(rng, seed, phase, index):
+    # Reseeding per row makes each row independent of batch size and resume point
+    rng.seed((seed << 40) | (PHASES[phase] << 36) | index)
+    return rng
+
+
+def user_row(rng, seed, index, dealers, password_hash):
+    first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+    return {
+        "name": f"{last} Motors" if index < dealers else f"{first} {last}",
+        "email": f"user{index}.s{seed}@seed.example",
+        "phone": f"+91 {rng.randint(6, 9)}{rng.randrange(10 ** 9):09d}",
+        "password": password_hash,
+    }
+
+
+def vehicle_row(rng, owner_ids, dealers, max_images):
+    brand = rng.choices(BRANDS, cum_weights=BRAND_WEIGHTS)[0]
+    model, cc, new_price, fuel_type = rng.choice(CATALOGUE[brand][1])
+    city, _, state = rng.choices(CITIES, cum_weights=CITY_WEIGHTS)[0]
+
+    # Most listings are a few years old; a long tail goes back 15 years
+    age = min(int(rng.expovariate(1 / 3.5)), 15)
+    price = new_price * 0.85 ** age * rng.lognormvariate(0, 0.12)
+    km_driven = int(rng.gammavariate(2.0, 3000) * max(age, 0.25))
+    previous_owners = sum(rng.random() < min(0.08 * age, 0.6) for _ in range(2))
+
+    # Dealers (the first few users) hold about half of the listings
+    if dealers and rng.random() < 0.5:
+        owner_id = owner_ids[rng.randrange(dealers)]
+    else:
+        owner_id = owner_ids[rng.randrange(len(owner_ids))]
+
+    row = {
+        "title": f"{CURRENT_YEAR - age} {brand} {model}",
+        "brand": brand,
+        "model": model,
+        "price": float(max(5000, round(price / 500) * 500)),
+        "year": CURRENT_YEAR - age,
+        "km_driven": km_driven,
+        "fuel_type": fuel_type,
+        "location": city,
+        "description": rng.choice(DESCRIPTIONS),
+        "owner_type": ("first_owner", "second_owner", "third_owner")[previous_owners],
+        "engine_cc": cc or None,
+        "mileage": round(rng.uniform(25, 45) if cc > 300 else rng.uniform(40, 70), 1) if cc else None,
+        "color": rng.choice(COLORS),
+        "insurance_valid": f"{CURRENT_YEAR + rng.randint(0, 2)}-{rng.randint(1, 12):02d}" if rng.random() < 0.8 else "Expired",
+        "registration_number": f"{state}{rng.randint(1, 50):02d}{chr(65 + rng.randrange(26))}{chr(65 + rng.randrange(26))}{rng.randint(1, 9999):04d}",
+        "is_negotiable": rng.random() < 0.7,
+        "is_sold": rng.random() < 0.08,
+        "owner_id": owner_id,
+    }
+    images = rng.sample(IMAGE_POOL, min(int(rng.expovariate(1 / 2.5)), max_images, len(IMAGE_POOL)))
+    return row, images
+
+
+def bulk_insert(conn, table, rows):
+    """COPY on Postgres, executemany elsewhere."""
+    if not rows:
+        return
+    if conn.dialect.name != "postgresql":
+        conn.execute(insert(table), rows)
+        return
+
+    columns = list(rows[0])
+    buffer = io.StringIO()
+    # None is written as an unquoted empty field, which COPY ... csv reads as NULL
+    csv.writer(buffer).writerows([row[column] for column in columns] for row in rows)
+    buffer.seek(0)
+    cursor = conn.connection.cursor()
+    cursor.copy_expert(f"COPY {table.name} ({', '.join(columns)}) FROM STDIN WITH (FORMAT csv)", buffer)
+    cursor.close()
+
+
+def inserted_ids(conn, table, after_id, count):
+    # Seeding runs alone, so the ids handed out in this transaction are the next ones
+    return conn.scalars(select(table.c.id).where(table.c.id > after_id).order_by(table.c.id).limit(count)).all()
+
+
+def load_progress(conn, phase, seed):
+    row = conn.execute(select(seed_progress).where(seed_progress.c.phase == phase)).first()
+    if row is None:
+        return 0
+    if row.seed != seed:
+        raise SystemExit(f"{phase} were generated with --seed {row.seed}; rerun with that seed or --reset")
+    return row.done
+
+
+def save_progress(conn, phase, seed, done):
+    updated = conn.execute(
+        seed_progress.update().where(seed_progress.c.phase == phase).values(seed=seed, done=done)
+    ).rowcount
+    if not updated:
+        conn.execute(seed_progress.insert().values(phase=phase, seed=seed, done=done))
+
+
+def report(phase, done, target, started, first):
+    elapsed = time.perf_counter() - started
+    rate = (done - first) / elapsed if elapsed else 0
+    print(f"  {phase}: {done}/{target} ({rate:,.0f} rows/s)", end="\r", flush=True)
+
+
+def reset():
+    print("Clearing existing data...")
+    tables = [
+        ArchivedBikeImageVariant.__table__, ArchivedBikeImage.__table__, ArchivedVehicle.__table__,
+        BikeImageVariant.__table__, BikeImage.__table__, FileDeletion.__table__,
+        VehicleFacetCount.__table__, Vehicle.__table__, User.__table__, seed_progress,
+    ]
+    with engine.begin() as conn:
+        if conn.dialect.name == "postgresql":
+            conn.execute(text(f"TRUNCATE {', '.join(t.name for t in tables)} RESTART IDENTITY CASCADE"))
+        else:
+            for table in tables:
+                conn.execute(table.delete())
+
+
+def seed_demo():
+    with engine.begin() as conn:
+        if conn.scalar(select(User.id).where(User.email == DEMO_USERS[0]["email"])) is not None:
+            print("Demo data already present")
+            return
+
+        print("Creating demo users and bikes...")
+        hashes = {password: hash_password(password) for password in {u["password"] for u in DEMO_USERS}}
+        user_ids = []
+        for u in DEMO_USERS:
+            user_ids.append(conn.execute(
+                insert(User.__table__).returning(User.id),
+                {**u, "password": hashes[u["password"]]},
+            ).scalar_one())
+
+        for i, bike in enumerate(DEMO_BIKES):
+            data = {key: value for key, value in bike.items() if key != "images"}
+            vehicle_id = conn.execute(
+                insert(Vehicle.__table__).returning(Vehicle.id),
+                {**data, "owner_id": user_ids[i % len(user_ids)]},
+            ).scalar_one()
+            conn.execute(insert(BikeImage.__table__), [{"bike_id": vehicle_id, "image_url": url} for url in bike["images"]])
+
+
+def generate_users(args, password_hash):
+    with engine.begin() as conn:
+        done = load_progress(conn, "users", args.seed)
+    if done >= args.users:
+        return
+
+    dealers = max(1, args.users // 20)
+    rng = random.Random()
+    started, first = time.perf_counter(), done
+    while done < args.users:
+        end = min(done + args.batch_size, args.users)
+        rows = [user_row(row_random(rng, args.seed, "users", i), args.seed, i, dealers, password_hash) for i in range(done, end)]
+        with engine.begin() as conn:
+            bulk_insert(conn, User.__table__, rows)
+            save_progress(conn, "users", args.seed, end)
+        done = end
+        report("users", done, args.users, started, first)
+    print()
+
+
+def generate_vehicles(args):
+    with engine.begin() as conn:
+        done = load_progress(conn, "vehicles", args.seed)
+        if done >= args.vehicles:
+            return
+        owner_ids = conn.scalars(
+            select(User.id).where(User.email.like(f"%.s{args.seed}@seed.example")).order_by(User.id)
+        ).all() or conn.scalars(select(User.id).order_by(User.id)).all()
+
+    dealers = max(1, len(owner_ids) // 20) if len(owner_ids) > 20 else 0
+    rng = random.Random()
+    started, first = time.perf_counter(), done
+    while done < args.vehicles:
+        end = min(done + args.batch_size, args.vehicles)
+        generated = [
+            vehicle_row(row_random(rng, args.seed, "vehicles", i), owner_ids, dealers, args.max_images)
+            for i in range(done, end)
+        ]
+        with engine.begin() as conn:
+            last_id = conn.scalar(select(func.coalesce(func.max(Vehicle.id), 0)))
+            bulk_insert(conn, Vehicle.__table__, [row for row, _ in generated])
+            ids = inserted_ids(conn, Vehicle.__table__, last_id, len(generated))
+            bulk_insert(conn, BikeImage.__table__, [
+                {"bike_id": vehicle_id, "image_url": url}
+                for vehicle_id, (_, images) in zip(ids, generated)
+                for url in images
+            ])
+            save_progress(conn, "vehicles", args.seed, end)
+        done = end
+        report("vehicles", done, args.vehicles, started, first)
+    print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Seed demo data and an optional synthetic catalogue.")
+    parser.add_argument("--users", type=int, default=0, help="synthetic users to generate")
+    parser.add_argument("--vehicles", type=int, default=0, help="synthetic vehicles to generate")
+    parser.add_argument("--max-images", type=int, default=6, help="images per vehicle, at most")
+    parser.add_argument("--seed", type=int, default=1, help="random seed; the same seed gives the same rows")
+    parser.add_argument("--batch-size", type=int, default=5000)
+    parser.add_argument("--password", default="password123", help="password of every synthetic user")
+    parser.add_argument("--reset", action="store_true", help="delete all users, vehicles and images first")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    run_migrations(engine)
+    search_backend.setup(engine)
+    seed_progress.create(engine, checkfirst=True)
+    if args.reset:
+        reset()
+
+    seed_demo()
+    if args.users or args.vehicles:
+        print("Generating synthetic data...")
+        # One bcrypt hash shared by every synthetic user
+        generate_users(args, hash_password(args.password))
+        generate_vehicles(args)
+
+    print("Rebuilding search index and facet counts...")
+    search_backend.reindex(engine)
+    rebuild_facets()
+    # Postgres autovacuum refreshes planner statistics; SQLite needs asking
+    if engine.dialect.name == "sqlite":
+        with engine.begin() as conn:
+            conn.execute(text("ANALYZE"))
+
+    with engine.connect() as conn:
+        counts = {
+            table.name: conn.scalar(select(func.count()).select_from(table))
+            for table in (User.__table__, Vehicle.__table__, BikeImage.__table__)
+        }
+
+    print("\n" + "="*50)
+    print("SEED DATA CREATED SUCCESSFULLY!")
+    print("="*50)
+    print("\n📧 LOGIN CREDENTIALS:")
+    print("-"*50)
+    print("Email: john@example.com     | Password: password123")
+    print("Email: jane@example.com     | Password: password123")
+    print("Email: admin@bikerent.com   | Password: admin123")
+    if args.users:
+        print(f"Email: user0.s{args.seed}@seed.example | Password: {args.password}  (up to user{args.users - 1})")
+    print("-"*50)
+    print(f"\n🏍️  {counts['vehicles']} bikes, {counts['users']} users, {counts['bike_images']} images in {time.perf_counter() - started:.1f}s")
+    print("\nYou can now start the server: uvicorn app.main:app --reload")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,42 @@
+import os
+import tempfile
+
+# Settings are read at import time, so point the app at a scratch database first
+DATA_DIR = tempfile.mkdtemp(prefix="bike-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{DATA_DIR}/test.db")
+os.environ.setdefault("DB_MIGRATE_ON_STARTUP", "true")
+os.environ.setdefault("RATE_LIMIT_ENABLED", "false")
+os.environ.setdefault("HASH_WORKERS", "0")
+os.environ.setdefault("BCRYPT_ROUNDS", "4")
+os.environ.setdefault("IMAGE_WORKERS", "0")
+os.environ.setdefault("FILE_GC_INTERVAL_SECONDS", "0")
+
+import pytest  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    # The app, redis.asyncio and aiosqlite all run on asyncio
+    return "asyncio"
+
+
+@pytest.fixture(scope="session")
+def client():
+    from fastapi.testclient import TestClient
+
+    from app.main import app
+
+    with TestClient(app) as client:
+        yield client
+
+
+@pytest.fixture
+def register(client):
+    """register(email) -> (user id, auth headers) for a fresh account."""
+    def register(email: str):
+        response = client.post("/auth/register", json={"name": "Test", "email": email, "password": "pw123456"})
+        assert response.status_code == 200, response.text
+        body = response.json()
+        return body["user"]["id"], {"Authorization": f"Bearer {body['token']}"}
+
+    return register
@@ -0,0 +1,87 @@
+from functools import partial
+
+import pytest
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.services.archive import run_archive
+
+VEHICLE = {
+    "title": "Roadster", "brand": "Yezdi", "model": "Roadster", "price": 2100, "year": 2022,
+    "km_driven": 2500, "fuel_type": "Petrol", "location": "Mysuru", "description": "Twin exhaust",
+}
+
+
+def table_of(vehicle_id):
+    with SessionLocal() as db:
+        for table in ("vehicles", "vehicles_archive"):
+            if db.scalar(text(f"SELECT count(*) FROM {table} WHERE id = :id"), {"id": vehicle_id}):
+                return table
+
+
+@pytest.fixture
+def seller(client, register, tmp_path):
+    """A seller with one listing on sale, one sold and archived, and one sold after the archive pass."""
+    _, headers = register(f"archive-{tmp_path.name}@example.com")
+
+    def create(**overrides):
+        return client.post("/vehicles/", headers=headers, json={**VEHICLE, **overrides}).json()["id"]
+
+    ids = {"unsold": create(), "archived": create(title="Roadster Classic")}
+    assert client.post(f"/vehicles/{ids['archived']}/sold", headers=headers).status_code == 200
+    report = client.portal.call(partial(run_archive, older_than_days=0))
+    assert report["archived"] >= 1
+
+    ids["sold"] = create(title="Roadster Dark")
+    assert client.post(f"/vehicles/{ids['sold']}/sold", headers=headers).status_code == 200
+    return headers, ids
+
+
+def test_run_archive_moves_only_sold_rows(seller):
+    _, ids = seller
+
+    assert table_of(ids["archived"]) == "vehicles_archive"
+    assert table_of(ids["unsold"]) == "vehicles"
+    assert table_of(ids["sold"]) == "vehicles"
+
+
+def test_archived_detail_needs_include_archived(client, seller):
+    _, ids = seller
+    path = f"/vehicles/{ids['archived']}"
+
+    assert client.get(path).status_code == 404
+    response = client.get(path, params={"include_archived": True})
+    assert response.status_code == 200
+    assert response.json()["title"] == "Roadster Classic"
+
+
+def test_archived_rows_are_listed_with_include_archived(client, seller):
+    _, ids = seller
+
+    def listed(**params):
+        body = client.get("/vehicles/", params={"brand": "Yezdi", "limit": 50, **params}).json()
+        return {vehicle["id"] for vehicle in body["vehicles"]}
+
+    assert ids["archived"] not in listed()
+    assert ids["archived"] in listed(include_archived=True)
+    assert ids["unsold"] in listed(include_archived=True)
+
+
+def test_relisting_an_archived_vehicle_is_404(client, seller):
+    headers, ids = seller
+
+    assert client.delete(f"/vehicles/{ids['archived']}/sold", headers=headers).status_code == 404
+    assert table_of(ids["archived"]) == "vehicles_archive"
+
+
+@pytest.mark.parametrize("path", ["/auth/my-bikes", "/vehicles/my-bikes/"])
+def test_my_bikes_totals(client, seller, path):
+    headers, ids = seller
+
+    live = client.get(path, headers=headers).json()
+    assert live["total"] == 2
+    assert {vehicle["id"] for vehicle in live["vehicles"]} == {ids["unsold"], ids["sold"]}
+
+    everything = client.get(path, headers=headers, params={"include_archived": True}).json()
+    assert everything["total"] == 3
+    assert {vehicle["id"] for vehicle in everything["vehicles"]} == set(ids.values())
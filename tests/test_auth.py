@@ -0,0 +1,38 @@
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.models.user import User
+from app.routers.auth import user_cache
+
+VEHICLE = {
+    "title": "Pulsar 150", "brand": "Bajaj", "model": "Pulsar", "price": 650, "year": 2019,
+    "km_driven": 12000, "fuel_type": "Petrol", "location": "Pune", "description": "Serviced",
+}
+
+
+def test_deleted_user_token_is_refused(client, register):
+    user_id, headers = register("deleted@example.com")
+    assert client.post("/vehicles/", json=VEHICLE, headers=headers).status_code == 200
+
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM vehicles WHERE owner_id = :id"), {"id": user_id})
+        db.delete(db.get(User, user_id))
+        db.commit()
+
+    response = client.post("/vehicles/", json=VEHICLE, headers=headers)
+    assert response.status_code == 401
+    assert client.get("/auth/me", headers=headers).status_code == 401
+    assert client.get("/auth/my-bikes", headers=headers).status_code == 401
+
+
+def test_user_deleted_by_another_process_is_refused_after_the_cache_ttl(client, register):
+    user_id, headers = register("removed-elsewhere@example.com")
+    assert client.get("/auth/me", headers=headers).status_code == 200
+
+    # Raw SQL fires no ORM events, like a delete made by another worker or a script
+    with SessionLocal() as db:
+        db.execute(text("DELETE FROM users WHERE id = :id"), {"id": user_id})
+        db.commit()
+    user_cache.delete(f"user:{user_id}")  # what the TTL does
+
+    assert client.post("/vehicles/", json=VEHICLE, headers=headers).status_code == 401
@@ -0,0 +1,113 @@
+import csv
+import io
+import json
+
+import pytest
+
+from app.services.bulk import PUBLIC_EXPORT_FIELDS
+
+CONTENT_TYPES = {"csv": "text/csv", "ndjson": "application/x-ndjson"}
+
+ROWS = [
+    {"title": "Hunter 350", "brand": "Royal Enfield", "model": "Hunter", "price": 1700, "year": 2023,
+     "km_driven": 800, "fuel_type": "Petrol", "location": "Kochi", "description": "Dapper grey, \"as new\""},
+    {"title": "Ather 450X", "brand": "Ather", "model": "450X", "price": 1400, "year": 2022,
+     "km_driven": 5200, "fuel_type": "Electric", "location": "Bengaluru", "description": "Two lines\nof notes",
+     "engine_cc": None, "color": "White", "is_negotiable": False},
+]
+
+
+def encode(fmt, rows):
+    if fmt == "ndjson":
+        return "".join(json.dumps(row) + "\n" for row in rows)
+    fields = list(dict.fromkeys(name for row in rows for name in row))
+    buffer = io.StringIO()
+    writer = csv.DictWriter(buffer, fields)
+    writer.writeheader()
+    writer.writerows(rows)
+    return buffer.getvalue()
+
+
+def decode(fmt, body):
+    if fmt == "ndjson":
+        return [json.loads(line) for line in body.splitlines()]
+    return list(csv.DictReader(io.StringIO(body)))
+
+
+def import_rows(client, headers, fmt, body):
+    response = client.post("/vehicles/import", headers={**headers, "Content-Type": CONTENT_TYPES[fmt]}, content=body)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def owner_export(client, headers, fmt):
+    response = client.get("/vehicles/my-bikes/export", headers=headers, params={"format": fmt})
+    assert response.status_code == 200
+    return response.text
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_owner_export_imports_back_unchanged(client, register, fmt):
+    _, seller = register(f"bulk-seller-{fmt}@example.com")
+    _, buyer = register(f"bulk-buyer-{fmt}@example.com")
+
+    report = import_rows(client, seller, fmt, encode(fmt, ROWS))
+    assert (report["received"], report["imported"], report["failed"]) == (2, 2, 0)
+
+    exported = owner_export(client, seller, fmt)
+    # The export carries ids and ownership, which the import ignores
+    assert import_rows(client, buyer, fmt, exported)["imported"] == 2
+
+    def listing(row):
+        return {name: value for name, value in row.items() if name not in ("id", "owner_id")}
+
+    copied = decode(fmt, owner_export(client, buyer, fmt))
+    assert [listing(row) for row in copied] == [listing(row) for row in decode(fmt, exported)]
+    assert [row["description"] for row in copied] == [row["description"] for row in ROWS]
+
+
+@pytest.mark.parametrize("fmt, body, failed", [
+    ("csv", encode("csv", ROWS[:1]) + "Broken,row\n", [2]),
+    ("csv", encode("csv", [ROWS[0], {**ROWS[0], "price": "cheap"}, {**ROWS[0], "title": ""}]), [2, 3]),
+    ("ndjson", encode("ndjson", ROWS[:1]) + "{not json\n[1, 2]\n" + json.dumps({**ROWS[0], "year": "old"}), [2, 3, 4]),
+])
+def test_bad_rows_are_reported_and_the_rest_imported(client, register, fmt, body, failed):
+    _, headers = register(f"bulk-bad-{fmt}-{len(failed)}@example.com")
+
+    report = import_rows(client, headers, fmt, body)
+
+    assert report["imported"] == 1
+    assert report["failed"] == len(failed)
+    assert [error["row"] for error in report["errors"]] == failed
+    assert len(decode(fmt, owner_export(client, headers, fmt))) == 1
+
+
+def test_dry_run_writes_nothing(client, register):
+    _, headers = register("bulk-dry-run@example.com")
+
+    response = client.post("/vehicles/import", headers=headers, params={"format": "csv", "dry_run": True},
+                           content=encode("csv", ROWS))
+
+    assert response.json()["imported"] == 2
+    assert decode("csv", owner_export(client, headers, "csv")) == []
+
+
+def test_owner_export_requires_auth(client):
+    assert client.get("/vehicles/my-bikes/export").status_code == 401
+    assert client.get("/vehicles/my-bikes/export", headers={"Authorization": "Bearer junk"}).status_code == 401
+
+
+@pytest.mark.parametrize("fmt", ["csv", "ndjson"])
+def test_public_export_has_active_summary_rows_only(client, register, fmt):
+    _, headers = register(f"bulk-public-{fmt}@example.com")
+    import_rows(client, headers, fmt, encode(fmt, [{**ROWS[0], "title": f"Kept {fmt}"}, {**ROWS[0], "title": f"Sold {fmt}"}]))
+    sold = next(row for row in decode(fmt, owner_export(client, headers, fmt)) if row["title"] == f"Sold {fmt}")
+    assert client.post(f"/vehicles/{sold['id']}/sold", headers=headers).status_code == 200
+
+    response = client.get("/vehicles/export", params={"format": fmt})
+
+    rows = decode(fmt, response.text)
+    titles = {row["title"] for row in rows}
+    assert f"Kept {fmt}" in titles and f"Sold {fmt}" not in titles
+    assert all(list(row) == PUBLIC_EXPORT_FIELDS for row in rows)
+    assert "description" not in PUBLIC_EXPORT_FIELDS and "is_sold" not in PUBLIC_EXPORT_FIELDS
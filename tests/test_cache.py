@@ -0,0 +1,76 @@
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.core.cache import MemoryCacheBackend, RedisCacheBackend, ResponseCache
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+def redis_cache(server):
+    return ResponseCache(RedisCacheBackend(FakeRedis(server=server), ttl=60))
+
+
+async def test_redis_backend_round_trip(server):
+    backend = RedisCacheBackend(FakeRedis(server=server), ttl=60)
+
+    await backend.set("listing", {"etag": "abc", "body": [1, 2]})
+    assert await backend.get("listing") == {"etag": "abc", "body": [1, 2]}
+    assert await backend.get("missing") is None
+
+    assert await backend.get_counter("gen:listings") == 0
+    assert await backend.incr("gen:listings") == 1
+    assert await backend.get_counter("gen:listings") == 1
+
+    await backend.delete("listing")
+    assert await backend.get("listing") is None
+
+
+async def test_redis_backend_ttl_is_at_least_one_second(server):
+    client = FakeRedis(server=server)
+    backend = RedisCacheBackend(client, ttl=60, prefix="t:")
+
+    await backend.set("short", 1, ttl=0.2)
+    assert 0 < await client.ttl("t:short") <= 1
+
+
+async def test_invalidation_reaches_other_workers_through_redis(server):
+    writer, reader = redis_cache(server), redis_cache(server)
+
+    key = await reader.key("vehicle:7", view="detail")
+    await reader.set(key, {"etag": "v1", "body": {}})
+    assert await reader.get(await reader.key("vehicle:7", view="detail")) is not None
+
+    await writer.invalidate_vehicle(7)
+
+    assert await reader.get(await reader.key("vehicle:7", view="detail")) is None
+    assert await reader.get(await reader.key("listings")) is None
+
+
+async def test_memory_backend_invalidation_is_per_process():
+    writer, reader = ResponseCache(MemoryCacheBackend()), ResponseCache(MemoryCacheBackend())
+
+    key = await reader.key("listings")
+    await reader.set(key, {"etag": "v1", "body": []})
+    await writer.invalidate("listings")
+
+    # Documented limit: a second worker keeps its copy until the TTL runs out
+    assert await reader.get(await reader.key("listings")) == {"etag": "v1", "body": []}
+    assert reader.stats()["hits"] == 1
+
+
+async def test_keys_fold_free_text_but_keep_opaque_values_verbatim():
+    cache = ResponseCache(MemoryCacheBackend())
+
+    assert await cache.key("listings", search="Royal  Enfield", brand="HONDA ") == \
+        await cache.key("listings", search="royal enfield", brand="honda")
+    # Cursors are case-sensitive base64 and URLs may differ only in case
+    assert await cache.key("listings", cursor="WyJuZXdlc3QiLDQyXQ") != \
+        await cache.key("listings", cursor="wyjuzxdlc3qildqyxq")
+    assert await cache.key("vehicle:1", base_url="http://cdn.example.com/Assets") != \
+        await cache.key("vehicle:1", base_url="http://cdn.example.com/assets")
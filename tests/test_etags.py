@@ -0,0 +1,65 @@
+import io
+
+import pytest
+from PIL import Image
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.services import storage
+
+VEHICLE = {
+    "title": "Apache RTR", "brand": "TVS", "model": "Apache", "price": 1100, "year": 2022,
+    "km_driven": 3000, "fuel_type": "Petrol", "location": "Chennai", "description": "Racing red",
+}
+
+
+def png():
+    buffer = io.BytesIO()
+    Image.new("RGB", (32, 32), (200, 30, 30)).save(buffer, format="PNG")
+    return buffer.getvalue()
+
+
+def version(vehicle_id):
+    with SessionLocal() as db:
+        return db.scalar(text("SELECT version FROM vehicles WHERE id = :id"), {"id": vehicle_id})
+
+
+@pytest.fixture
+def vehicle(client, register, tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", str(tmp_path))
+    _, headers = register(f"etag-{tmp_path.name}@example.com")
+    response = client.post("/vehicles/", headers=headers, json=VEHICLE)
+    assert response.status_code == 200, response.text
+    return response.json()["id"], headers
+
+
+@pytest.mark.parametrize("path", ["/vehicles/{id}", "/vehicles/?brand=TVS&limit=7"])
+def test_matching_validator_gets_an_empty_304(client, vehicle, path):
+    path = path.format(id=vehicle[0])
+    etag = client.get(path).headers["ETag"]
+
+    response = client.get(path, headers={"If-None-Match": etag})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.parametrize("change", [
+    lambda client, vehicle_id, headers: client.put(
+        f"/vehicles/{vehicle_id}", headers=headers, json={**VEHICLE, "price": 999}),
+    lambda client, vehicle_id, headers: client.post(f"/vehicles/{vehicle_id}/sold", headers=headers),
+    lambda client, vehicle_id, headers: client.post(
+        f"/vehicles/{vehicle_id}/upload-images", headers=headers, files=[("files", ("bike.png", png(), "image/png"))]),
+], ids=["update", "sold", "upload"])
+def test_changes_bump_the_version_and_the_etag(client, vehicle, change):
+    vehicle_id, headers = vehicle
+    before = version(vehicle_id)
+    etag = client.get(f"/vehicles/{vehicle_id}").headers["ETag"]
+
+    assert change(client, vehicle_id, headers).status_code == 200
+
+    assert version(vehicle_id) == before + 1
+    response = client.get(f"/vehicles/{vehicle_id}", headers={"If-None-Match": etag})
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
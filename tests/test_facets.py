@@ -0,0 +1,80 @@
+from collections import Counter
+
+from sqlalchemy import select, text
+
+from app.core.cache import response_cache
+from app.core.database import SessionLocal
+from app.models.vehicle import Vehicle
+from app.services.facets import facet_key, rebuild_facets
+from app.services.listing import active
+
+VEHICLE = {
+    "title": "FZ-S", "brand": "Yamaha", "model": "FZ", "price": 1300, "year": 2020,
+    "km_driven": 15000, "fuel_type": "Petrol", "location": "Jaipur", "description": "Matte blue",
+}
+
+
+def served(client):
+    body = client.get("/vehicles/facets").json()
+    return {
+        "brands": {item["value"]: item["count"] for item in body["brands"]},
+        "fuel_types": {item["value"]: item["count"] for item in body["fuel_types"]},
+        "years": {item["from"]: item["count"] for item in body["years"]},
+        "prices": {item["min"]: item["count"] for item in body["prices"]},
+        "total": body["total"],
+    }
+
+
+def counted():
+    """The same counts straight from the unsold vehicle rows."""
+    with SessionLocal() as db:
+        keys = [facet_key(vehicle) for vehicle in db.scalars(select(Vehicle).where(active()))]
+    facets = {}
+    for position, name in enumerate(("brands", "fuel_types", "years", "prices")):
+        unknown = "" if position < 2 else -1
+        facets[name] = dict(Counter(key[position] for key in keys if key[position] != unknown))
+    facets["total"] = len(keys)
+    return facets
+
+
+def rebuild(client):
+    rebuild_facets()
+    client.portal.call(response_cache.invalidate, "listings")
+
+
+def test_counts_follow_every_write(client, register):
+    _, headers = register("facets-writer@example.com")
+    # Other tests delete rows with raw SQL, which the cube never hears about
+    rebuild(client)
+    assert served(client) == counted()
+
+    vehicle_id = client.post("/vehicles/", headers=headers, json=VEHICLE).json()["id"]
+    assert served(client) == counted()
+
+    changed = {**VEHICLE, "brand": "Suzuki", "fuel_type": "CNG", "year": 2012, "price": 400}
+    assert client.put(f"/vehicles/{vehicle_id}", headers=headers, json=changed).status_code == 200
+    assert served(client) == counted()
+
+    assert client.post(f"/vehicles/{vehicle_id}/sold", headers=headers).status_code == 200
+    assert served(client) == counted()
+
+    assert client.delete(f"/vehicles/{vehicle_id}/sold", headers=headers).status_code == 200
+    assert served(client) == counted()
+
+    assert client.delete(f"/vehicles/{vehicle_id}", headers=headers).status_code == 200
+    assert served(client) == counted()
+
+
+def test_rebuild_corrects_drift(client, register):
+    _, headers = register("facets-drift@example.com")
+    client.post("/vehicles/", headers=headers, json={**VEHICLE, "brand": "Jawa"})
+
+    with SessionLocal() as db:
+        db.execute(text("UPDATE vehicle_facet_counts SET count = count + 3 WHERE brand = 'Jawa'"))
+        db.execute(text("DELETE FROM vehicle_facet_counts WHERE brand = 'Yamaha'"))
+        db.commit()
+    client.portal.call(response_cache.invalidate, "listings")
+    assert served(client) != counted()
+
+    rebuild(client)
+    assert served(client) == counted()
@@ -0,0 +1,120 @@
+import io
+import os
+import time
+
+import pytest
+from fastapi import HTTPException, UploadFile
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.database import SessionLocal
+from app.models.file_deletion import FileDeletion
+from app.services import storage
+from app.services.file_gc import FileReaper, sweep_orphans
+
+HOUR_AGO = time.time() - 3600
+
+
+def write_file(path, mtime=None):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "wb") as out:
+        out.write(b"\x89PNG\r\n\x1a\n")
+    if mtime is not None:
+        os.utime(path, (mtime, mtime))
+
+
+def test_dedup_hit_refreshes_the_stored_blob(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", str(tmp_path))
+    stored = tmp_path / "ab" / "abcd.png"
+    write_file(str(stored), mtime=HOUR_AGO)
+    upload = tmp_path / ".upload.part"
+    write_file(str(upload))
+
+    assert storage.commit_blob(str(upload), "ab/abcd.png") is None
+    assert not upload.exists()
+    assert stored.stat().st_mtime > time.time() - 60
+
+
+def test_reaper_leaves_recently_reused_blobs_to_the_sweeper(client, tmp_path):
+    write_file(str(tmp_path / "fresh.png"))
+    write_file(str(tmp_path / "stale.png"), mtime=HOUR_AGO)
+    with SessionLocal() as db:
+        db.add_all([FileDeletion(path="fresh.png"), FileDeletion(path="stale.png")])
+        db.commit()
+
+    reaper = FileReaper(str(tmp_path), grace_seconds=300)
+    reaper.reap_batch()
+    reaper.shutdown()
+
+    assert (tmp_path / "fresh.png").exists()
+    assert not (tmp_path / "stale.png").exists()
+    assert reaper.stats() == {"removed": 1, "kept": 0, "deferred": 1}
+    with SessionLocal() as db:
+        assert db.query(FileDeletion).count() == 0
+
+
+def test_sweeper_skips_files_reused_after_the_scan(client, tmp_path, monkeypatch):
+    write_file(str(tmp_path / "orphan.png"), mtime=HOUR_AGO)
+    write_file(str(tmp_path / "reused.png"), mtime=HOUR_AGO)
+
+    remove_unless_recent = storage.remove_unless_recent
+
+    def reuse_then_remove(path, cutoff):
+        # An upload deduplicates onto the blob between the scan and the removal
+        if path.endswith("reused.png"):
+            os.utime(path)
+        return remove_unless_recent(path, cutoff)
+
+    monkeypatch.setattr("app.services.file_gc.remove_unless_recent", reuse_then_remove)
+    report = sweep_orphans(str(tmp_path), grace_seconds=60)
+
+    assert report["removed"] == 1
+    assert not (tmp_path / "orphan.png").exists()
+    assert (tmp_path / "reused.png").exists()
+
+
+def test_failed_upload_commit_leaves_new_blobs_to_the_sweeper(client, register, tmp_path, monkeypatch):
+    _, headers = register("commit-fails@example.com")
+    vehicle = client.post("/vehicles/", headers=headers, json={
+        "title": "Classic 350", "brand": "Royal Enfield", "model": "Classic", "price": 1800, "year": 2020,
+        "km_driven": 9000, "fuel_type": "Petrol", "location": "Goa", "description": "Chrome",
+    }).json()
+    monkeypatch.setattr(storage, "UPLOAD_DIR", str(tmp_path))
+
+    async def fail(self):
+        raise RuntimeError("database went away")
+
+    monkeypatch.setattr(AsyncSession, "commit", fail)
+    with pytest.raises(RuntimeError):
+        client.post(
+            f"/vehicles/{vehicle['id']}/upload-images",
+            headers=headers,
+            files=[("files", ("bike.png", b"\x89PNG\r\n\x1a\n" + b"\x00" * 64, "image/png"))],
+        )
+
+    # Another upload may already reference the blob; only the sweeper may decide
+    assert [path.suffix for path in tmp_path.rglob("*") if path.is_file()] == [".png"]
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("reused", [False, True])
+async def test_failed_batch_removes_only_blobs_nobody_reused(tmp_path, monkeypatch, reused):
+    monkeypatch.setattr(storage, "UPLOAD_DIR", str(tmp_path))
+    commit_blob = storage.commit_blob
+
+    def commit_then_maybe_reuse(tmp, image_url):
+        stored_at = commit_blob(tmp, image_url)
+        if reused:
+            # A concurrent upload of the same bytes dedups onto the new blob
+            path = os.path.join(str(tmp_path), image_url)
+            os.utime(path, (stored_at + 1, stored_at + 1))
+        return stored_at
+
+    monkeypatch.setattr(storage, "commit_blob", commit_then_maybe_reuse)
+    files = [
+        UploadFile(io.BytesIO(b"\x89PNG\r\n\x1a\n" + b"\x01" * 64), filename="ok.png"),
+        UploadFile(io.BytesIO(b"not an image at all"), filename="bad.txt"),
+    ]
+    with pytest.raises(HTTPException):
+        await storage.save_uploads(files)
+
+    assert bool(list(tmp_path.rglob("*.png"))) is reused
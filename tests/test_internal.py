@@ -0,0 +1,42 @@
+from types import SimpleNamespace
+
+import pytest
+
+from app.core.config import settings
+from app.core.replicas import Replica
+
+PATHS = ["/metrics", "/internal/cache", "/internal/replicas", "/internal/files"]
+
+
+@pytest.fixture
+def internal_token(monkeypatch):
+    monkeypatch.setattr(settings, "INTERNAL_TOKEN", "s3cret")
+    return {"Authorization": "Bearer s3cret"}
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_hidden_without_a_configured_token(client, path):
+    assert client.get(path).status_code == 404
+
+
+@pytest.mark.parametrize("path", PATHS)
+def test_requires_the_internal_token(client, register, internal_token, path):
+    _, user_headers = register(f"internal-{path.strip('/').replace('/', '-')}@example.com")
+
+    assert client.get(path).status_code == 401
+    assert client.get(path, headers=user_headers).status_code == 401
+    assert client.get(path, headers=internal_token).status_code == 200
+
+
+@pytest.mark.anyio
+async def test_replica_error_hides_connection_details(monkeypatch):
+    replica = Replica("replica0", "sqlite+aiosqlite://")
+
+    def refuse():
+        raise ConnectionRefusedError("could not connect to db.internal:5432 as admin")
+
+    monkeypatch.setattr(replica, "engine", SimpleNamespace(connect=refuse, dialect=replica.engine.dialect))
+    await replica.check(timeout=1, max_lag=5)
+
+    assert not replica.healthy
+    assert replica.stats()["error"] == "ConnectionRefusedError"
@@ -0,0 +1,37 @@
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+
+
+def create(client, headers, **overrides):
+    vehicle = {
+        "title": "Duke 390", "brand": "KTM", "model": "Duke", "price": 2500, "year": 2021,
+        "km_driven": 4000, "fuel_type": "Petrol", "location": "Pune", "description": "Orange", **overrides,
+    }
+    response = client.post("/vehicles/", json=vehicle, headers=headers)
+    assert response.status_code == 200, response.text
+    return response.json()["id"]
+
+
+def unsold_count():
+    with SessionLocal() as db:
+        return db.scalar(text("SELECT count(*) FROM vehicles WHERE is_sold = 0"))
+
+
+def test_exact_total_is_a_real_count_even_when_facets_drift(client, register):
+    _, headers = register("exact-total@example.com")
+    create(client, headers)
+    sold_id = create(client, headers)
+    assert client.post(f"/vehicles/{sold_id}/sold", headers=headers).status_code == 200
+
+    with SessionLocal() as db:
+        db.execute(text("UPDATE vehicle_facet_counts SET count = count + 100"))
+        db.commit()
+    try:
+        # A limit no other test uses, so the response cache cannot answer
+        body = client.get("/vehicles/", params={"limit": 13, "total": "exact"}).json()
+        assert body["total"] == unsold_count()
+    finally:
+        with SessionLocal() as db:
+            db.execute(text("UPDATE vehicle_facet_counts SET count = count - 100"))
+            db.commit()
@@ -0,0 +1,89 @@
+from types import SimpleNamespace
+
+from sqlalchemy import create_engine, event, inspect, text
+from sqlalchemy.schema import CreateTable
+
+from app.core.database import Base
+from app.migrations.runner import pending_migrations
+from app.migrations.versions import ARCHIVES, MIGRATIONS, run_migrations
+
+
+def test_pending_check_never_touches_the_schema(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/empty.db")
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    pending = pending_migrations(engine, MIGRATIONS)
+
+    assert [migration.version for migration in pending] == sorted(migration.version for migration in MIGRATIONS)
+    assert inspect(engine).get_table_names() == []
+    assert not [statement for statement in statements if statement.lstrip().upper().startswith(("CREATE", "ALTER", "DROP"))]
+    engine.dispose()
+
+
+def test_migrate_records_every_version(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/migrated.db")
+
+    assert run_migrations(engine, target=2) == [1, 2]
+    assert [migration.version for migration in pending_migrations(engine, MIGRATIONS)] == \
+        sorted(migration.version for migration in MIGRATIONS if migration.version > 2)
+    run_migrations(engine)
+    assert pending_migrations(engine, MIGRATIONS) == []
+    engine.dispose()
+
+
+def test_fresh_database_builds_each_index_once(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/fresh.db")
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda conn, cursor, statement, *args: statements.append(statement))
+
+    run_migrations(engine)
+
+    assert not [statement for statement in statements if statement.lstrip().upper().startswith("DROP")]
+    indexes = {index["name"] for index in inspect(engine).get_indexes("vehicles")}
+    assert {"ix_vehicles_active_price_id", "ix_vehicles_active_year_id", "ix_vehicles_sold_id"} <= indexes
+    engine.dispose()
+
+
+def test_search_indexes_build_concurrently_on_postgres():
+    statements = []
+
+    def execute(statement, params=None):
+        statements.append(" ".join(str(statement).split()))
+        return SimpleNamespace(scalar=lambda: None)
+
+    conn = SimpleNamespace(dialect=SimpleNamespace(name="postgresql"), execute=execute)
+    migration = next(migration for migration in MIGRATIONS if migration.name.startswith("full-text"))
+    for step in migration.steps:
+        migration.run_step(conn, step)
+
+    assert migration.concurrent
+    assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehicles_title_trgm ON vehicles USING gin (title gin_trgm_ops)" in statements
+    assert "CREATE INDEX CONCURRENTLY IF NOT EXISTS ix_vehicles_search_vector ON vehicles USING gin (search_vector)" in statements
+
+
+def test_upgraded_sqlite_tables_stop_reusing_archived_ids(tmp_path):
+    engine = create_engine(f"sqlite:///{tmp_path}/upgraded.db")
+    with engine.begin() as conn:
+        # As created before the models declared sqlite_autoincrement
+        for name in ARCHIVES:
+            ddl = str(CreateTable(Base.metadata.tables[name]).compile(dialect=conn.dialect))
+            conn.execute(text(ddl.replace(" AUTOINCREMENT", "")))
+    run_migrations(engine, target=6)
+    indexes = {index["name"] for index in inspect(engine).get_indexes("vehicles")}
+
+    with engine.begin() as conn:
+        conn.execute(text("INSERT INTO vehicles (id, title, version) VALUES (1, 'kept', 1), (2, 'archived', 1)"))
+        conn.execute(text("INSERT INTO vehicles_archive (id, title, version) SELECT id, title, version FROM vehicles WHERE id = 2"))
+        conn.execute(text("DELETE FROM vehicles WHERE id = 2"))
+    run_migrations(engine)
+
+    with engine.begin() as conn:
+        new_id = conn.execute(text("INSERT INTO vehicles (title, version) VALUES ('new', 1) RETURNING id")).scalar()
+        assert conn.scalar(text("SELECT title FROM vehicles WHERE id = 1")) == "kept"
+        for name in ARCHIVES:
+            ddl = conn.scalar(text("SELECT sql FROM sqlite_master WHERE name = :name"), {"name": name})
+            assert "AUTOINCREMENT" in ddl
+    assert new_id == 3
+    assert {index["name"] for index in inspect(engine).get_indexes("vehicles")} == indexes
+    engine.dispose()
@@ -0,0 +1,62 @@
+import base64
+import json
+
+import pytest
+from fastapi import HTTPException
+
+from app.services.pagination import decode_cursor
+
+
+def cursor(*payload):
+    return base64.urlsafe_b64encode(json.dumps(payload).encode()).decode().rstrip("=")
+
+
+@pytest.mark.parametrize("sort, value, last_id", [
+    ("newest", 42, 42),
+    ("price_asc", 1500.5, 7),
+    ("price_desc", 1500, 7),
+    ("price_asc", None, 7),
+    ("year", 2019, 3),
+    ("year", None, 3),
+])
+def test_accepts_values_of_the_sort_column_type(sort, value, last_id):
+    assert decode_cursor(cursor(sort, value, last_id), sort) == (value, last_id)
+
+
+@pytest.mark.parametrize("sort, value, last_id", [
+    ("newest", 42, "42"),
+    ("newest", 42, 4.2),
+    ("newest", 42, True),
+    ("newest", 42, None),
+    ("newest", None, 42),
+    ("newest", "42", 42),
+    ("price_asc", "cheap", 7),
+    ("price_asc", [1], 7),
+    ("price_asc", {"$gt": 0}, 7),
+    ("price_asc", False, 7),
+    ("year", 2019.5, 3),
+    ("year", "2019", 3),
+])
+def test_rejects_mistyped_payloads(sort, value, last_id):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(cursor(sort, value, last_id), sort)
+    assert (error.value.status_code, error.value.detail) == (400, "Invalid cursor")
+
+
+@pytest.mark.parametrize("raw", ["not base64!", cursor("newest", 1), cursor({"a": 1, "b": 2, "c": 3})])
+def test_rejects_malformed_cursors(raw):
+    with pytest.raises(HTTPException) as error:
+        decode_cursor(raw, "newest")
+    assert error.value.status_code == 400
+
+
+def test_rejects_non_finite_prices():
+    raw = base64.urlsafe_b64encode(b'["price_asc",NaN,7]').decode()
+    with pytest.raises(HTTPException):
+        decode_cursor(raw, "price_asc")
+
+
+def test_listing_answers_400_for_a_forged_cursor(client):
+    response = client.get("/vehicles/", params={"sort": "year", "cursor": cursor("year", "2019' OR 1=1", 1)})
+    assert response.status_code == 400
+    assert response.json()["detail"] == "Invalid cursor"
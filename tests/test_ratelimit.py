@@ -0,0 +1,93 @@
+import pytest
+from fakeredis import FakeServer
+from fakeredis.aioredis import FakeRedis
+
+from app.core import ratelimit
+from app.core.ratelimit import MemoryRateLimitStore, RateLimiter, RedisRateLimitStore
+
+pytestmark = pytest.mark.anyio
+
+
+@pytest.fixture
+def server():
+    return FakeServer()
+
+
+STORES = pytest.mark.parametrize("make_store", [
+    lambda server: MemoryRateLimitStore(),
+    lambda server: RedisRateLimitStore(FakeRedis(server=server)),
+], ids=["memory", "redis"])
+
+
+@STORES
+async def test_bucket_drains_then_reports_wait(server, make_store):
+    store = make_store(server)
+
+    for _ in range(3):
+        assert await store.take(["login:ip:1.2.3.4"], capacity=3, rate=1 / 60) == [0.0]
+
+    [wait] = await store.take(["login:ip:1.2.3.4"], capacity=3, rate=1 / 60)
+    assert 59 < wait <= 60
+    # Other keys have their own bucket
+    assert await store.take(["login:ip:5.6.7.8"], capacity=3, rate=1 / 60) == [0.0]
+
+
+@STORES
+async def test_buckets_are_charged_all_or_none(server, make_store):
+    store = make_store(server)
+    assert await store.take(["upload:user:1"], capacity=2, rate=1 / 60) == [0.0]
+    assert await store.take(["upload:user:1"], capacity=2, rate=1 / 60) == [0.0]
+
+    ip_wait, user_wait = await store.take(["upload:ip:1.2.3.4", "upload:user:1"], capacity=2, rate=1 / 60)
+    assert ip_wait == 0.0 and user_wait > 59
+
+    # The rejected request left the IP bucket full
+    assert await store.take(["upload:ip:1.2.3.4"], capacity=2, rate=1 / 60) == [0.0]
+    assert await store.take(["upload:ip:1.2.3.4"], capacity=2, rate=1 / 60) == [0.0]
+
+
+async def test_redis_buckets_are_shared_and_expire(server):
+    first = RedisRateLimitStore(FakeRedis(server=server))
+    second = RedisRateLimitStore(FakeRedis(server=server))
+
+    assert await first.take(["upload:user:1"], capacity=1, rate=1) == [0.0]
+    assert await second.take(["upload:user:1"], capacity=1, rate=1) != [0.0]
+    assert 0 < await FakeRedis(server=server).pttl("bike:rl:upload:user:1") <= 1000
+
+
+async def test_limiter_rejects_per_identity(server, monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMIT_LOGIN", "2/minute")
+    limiter = RateLimiter(RedisRateLimitStore(FakeRedis(server=server)))
+
+    assert await limiter.retry_after("login", ip="1.2.3.4") is None
+    assert await limiter.retry_after("login", ip="1.2.3.4") is None
+    assert await limiter.retry_after("login", ip="1.2.3.4") == 30
+    assert limiter.stats()["rejected"] == {"login:ip": 1}
+
+
+@STORES
+async def test_throttled_user_does_not_drain_the_ip_bucket(server, make_store, monkeypatch):
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMIT_UPLOAD", "2/minute")
+    limiter = RateLimiter(make_store(server))
+
+    for _ in range(2):
+        assert await limiter.retry_after("upload", ip="10.0.0.1", user=7) is None
+    # The spent user keeps retrying from a shared address, e.g. an office NAT
+    for _ in range(5):
+        assert await limiter.retry_after("upload", ip="10.0.0.2", user=7) == 30
+
+    assert limiter.stats()["rejected"] == {"upload:user": 5}
+    # Those rejections cost the address nothing; its other users keep their full allowance
+    assert await limiter.retry_after("upload", ip="10.0.0.2", user=8) is None
+    assert await limiter.retry_after("upload", ip="10.0.0.2", user=9) is None
+
+
+async def test_limiter_allows_when_store_fails(monkeypatch):
+    class BrokenStore:
+        async def take(self, *args, **kwargs):
+            raise ConnectionError("redis is down")
+
+    monkeypatch.setattr(ratelimit.settings, "RATE_LIMIT_LOGIN", "1/minute")
+    limiter = RateLimiter(BrokenStore())
+
+    assert await limiter.retry_after("login", ip="1.2.3.4") is None
@@ -0,0 +1,87 @@
+import sqlite3
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.engine import make_url
+
+from app.core import replicas
+from app.core.config import settings
+from app.core.replicas import Replica, ReplicaSet
+
+VEHICLE = {
+    "title": "Unicorn 160", "brand": "Honda", "model": "Unicorn", "price": 900, "year": 2021,
+    "km_driven": 4000, "fuel_type": "Petrol", "location": "Delhi", "description": "One owner",
+}
+
+
+@pytest.fixture
+def replica(client, tmp_path, monkeypatch):
+    """A second SQLite database holding a snapshot of the primary, so rows written afterwards only exist on the primary."""
+    path = tmp_path / "replica.db"
+    with sqlite3.connect(make_url(settings.DATABASE_URL).database) as primary, sqlite3.connect(path) as snapshot:
+        primary.backup(snapshot)
+    replica_set = ReplicaSet([f"sqlite:///{path}"])
+    monkeypatch.setattr(replicas, "replica_set", replica_set)
+    yield replica_set.replicas[0]
+    client.portal.call(replica_set.dispose)
+
+
+def test_reads_go_to_the_replica(client, register, replica):
+    _, headers = register("replica-reader@example.com")
+    vehicle = client.post("/vehicles/", headers=headers, json=VEHICLE).json()
+
+    # Anonymous reads never pin to the primary, and the snapshot predates the row
+    assert client.get(f"/vehicles/{vehicle['id']}").status_code == 404
+    assert replica.healthy
+
+
+def test_reads_fall_back_to_the_primary_when_the_replica_is_unhealthy(client, register, replica):
+    _, headers = register("replica-down@example.com")
+    vehicle = client.post("/vehicles/", headers=headers, json=VEHICLE).json()
+
+    replica.healthy = False
+    assert client.get(f"/vehicles/{vehicle['id']}").status_code == 200
+
+
+@pytest.mark.anyio
+async def test_lagging_replica_is_taken_out_of_rotation():
+    replica_set = ReplicaSet(["sqlite+aiosqlite://"])
+    replica = replica_set.replicas[0]
+
+    class LaggingConnection:
+        async def __aenter__(self):
+            return self
+
+        async def __aexit__(self, *exc):
+            return False
+
+        async def execute(self, statement):
+            return None
+
+        async def scalar(self, statement):
+            return 30.0
+
+    dialect = SimpleNamespace(name="postgresql")
+    real_engine = replica.engine
+    replica.engine = SimpleNamespace(connect=LaggingConnection, dialect=dialect)
+    await replica.check(timeout=1, max_lag=5)
+    await real_engine.dispose()
+
+    assert not replica.healthy
+    assert replica.stats()["error"] == "lag 30.0s"
+    assert replica_set.choose() is None
+
+
+def test_writer_reads_from_the_primary_until_the_window_passes(client, register, replica, monkeypatch):
+    monkeypatch.setattr(settings, "READ_YOUR_WRITES_SECONDS", 1)
+    _, headers = register("replica-writer@example.com")
+    vehicle = client.post("/vehicles/", headers=headers, json=VEHICLE).json()
+    path = f"/vehicles/{vehicle['id']}"
+
+    # Primary answers are cached, so each read asks for different fields to reach a database
+    assert client.get(path, headers=headers, params={"fields": "title"}).status_code == 200
+    assert client.get(path, params={"fields": "brand"}).status_code == 404
+
+    time.sleep(1.1)
+    assert client.get(path, headers=headers, params={"fields": "model"}).status_code == 404